@@ -1,16 +1,54 @@
 
-from typing import Dict, Any, Tuple, Optional
+import asyncio
+from dataclasses import dataclass, field
+from typing import AsyncIterator, Awaitable, Callable, Dict, Any, List, Tuple, Optional, Union
+import hashlib
 import httpx
 import json
 import re
 import os
 from sqlalchemy.exc import IntegrityError
-from models import Article, Analysis
-from heuristics import extract_features, CATEGORIES
-from scraper import fetch_html, extract_article
+from db import run_db
+from models import EXCERPT_CHARS, Article, Analysis, normalize_confidence
+import metrics
+import search_index
+import trending
+import near_duplicates
+import local_classifier
+from local_classifier import cascade_stats
+from heuristics import source_domain
+from scraper import fetch_page
+from cpu_pool import cpu_pool, extract_and_featurize
+from prompt_compaction import PROMPT_TOKEN_BUDGET, compact
+from http_pool import PooledClient, env_float, env_int
+from verdict_cache import LRUVerdictCache, VERDICT_CACHE_SIZE, VERDICT_CACHE_TTL, normalize_text
 
 LLM_GATEWAY_URL = os.getenv("LLM_GATEWAY_URL", "http://127.0.0.1:8001").rstrip("/")
-LLM_TIMEOUT = httpx.Timeout(180.0)
+LLM_TIMEOUT = httpx.Timeout(
+    env_float("LLM_TIMEOUT", 180.0),
+    connect=env_float("LLM_CONNECT_TIMEOUT", 10.0),
+)
+LLM_LIMITS = httpx.Limits(
+    max_connections=env_int("LLM_MAX_CONNECTIONS", 20),
+    max_keepalive_connections=env_int("LLM_MAX_KEEPALIVE", 10),
+    keepalive_expiry=env_float("LLM_KEEPALIVE_EXPIRY", 60.0),
+)
+
+LLM_MAX_RETRIES = env_int("LLM_MAX_RETRIES", 2)
+LLM_RETRY_MAX_WAIT = env_float("LLM_RETRY_MAX_WAIT", 30.0)
+
+# Langlebiger Pool zum LLM-Gateway (Lifecycle in main.py)
+llm_client = PooledClient("llm", timeout=LLM_TIMEOUT, limits=LLM_LIMITS)
+
+# Modell hinter dem Gateway – muss zu LLM_MODEL im llm_gateway passen
+LLM_MODEL = os.getenv("LLM_MODEL", "llama3")
+
+# Bei jeder Änderung an build_prompt (oder am SYSTEM_PROMPT im Gateway) erhöhen,
+# damit gecachte Urteile des alten Prompts nicht mehr verwendet werden.
+# Das Token-Budget verändert den gesendeten Text und gehört deshalb dazu.
+PROMPT_VERSION = f"2/{PROMPT_TOKEN_BUDGET}"
+
+verdict_cache = LRUVerdictCache(PROMPT_VERSION, LLM_MODEL, VERDICT_CACHE_SIZE, VERDICT_CACHE_TTL)
 
 DEFAULT_COUNTER_SOURCES = [
     "https://www.tagesschau.de/faktenfinder/",
@@ -39,12 +77,28 @@ def determine_category(label: str, features: dict) -> str:
 
 
 # ---------- LLM Call ----------
+def _retry_wait(value) -> float:
+    try:
+        wait = float(value if value is not None else 1)
+    except (TypeError, ValueError):
+        wait = 1.0
+    return min(max(wait, 0.0), LLM_RETRY_MAX_WAIT)
+
+
+def _retry_after(r: httpx.Response) -> float:
+    return _retry_wait(r.headers.get("Retry-After"))
+
+
 async def call_llm(prompt: str) -> Tuple[Optional[Dict[str, Any]], str]:
     try:
-        async with httpx.AsyncClient(timeout=LLM_TIMEOUT) as client:
-            r = await client.post(f"{LLM_GATEWAY_URL}/classify", json={"text": prompt})
-            r.raise_for_status()
-            data = r.json()
+        for attempt in range(LLM_MAX_RETRIES + 1):
+            r = await llm_client.post(f"{LLM_GATEWAY_URL}/classify", json={"text": prompt})
+            # Gateway ausgelastet (429/503): Retry-After abwarten statt Fallback
+            if r.status_code not in (429, 503) or attempt == LLM_MAX_RETRIES:
+                break
+            await asyncio.sleep(_retry_after(r))
+        r.raise_for_status()
+        data = r.json()
     except Exception as e:
         return None, f"LLM error: {e}"
 
@@ -53,6 +107,48 @@ async def call_llm(prompt: str) -> Tuple[Optional[Dict[str, Any]], str]:
 
     return None, "no-parseable-json"
 
+async def call_llm_stream(
+    prompt: str, on_event: Callable[[dict], Awaitable[None]]
+) -> Tuple[Optional[Dict[str, Any]], str]:
+    # Teilfelder des Gateway-Streams sofort weiterreichen
+    data = None
+    retry_wait = None
+    streamed = False
+    try:
+        async with llm_client.stream(
+            "POST", f"{LLM_GATEWAY_URL}/classify/stream", json={"text": prompt}
+        ) as r:
+            if r.status_code in (429, 503):
+                retry_wait = _retry_after(r)
+            else:
+                r.raise_for_status()
+                async for line in r.aiter_lines():
+                    if not line.strip():
+                        continue
+                    event = json.loads(line)
+                    if event.get("type") == "fields":
+                        streamed = True
+                        await on_event({"type": "fields", "fields": event.get("fields", {})})
+                    elif event.get("type") == "result":
+                        data = event
+                    elif event.get("type") == "error":
+                        # Admission Control lehnt ab, bevor ein Token kommt – wie bei call_llm erneut versuchen
+                        if event.get("status") in (429, 503) and not streamed:
+                            retry_wait = _retry_wait(event.get("retry_after"))
+                            break
+                        return None, f"LLM error: {event.get('detail')}"
+    except Exception as e:
+        return None, f"LLM error: {e}"
+
+    if retry_wait is not None:
+        # Ausgelastet → Retry-After abwarten, dann normaler Call mit dessen Retry-Behandlung
+        await asyncio.sleep(retry_wait)
+        return await call_llm(prompt)
+    if isinstance(data, dict) and isinstance(data.get("parsed"), dict):
+        return data["parsed"], "parsed-ok"
+
+    return None, "no-parseable-json"
+
 #Kategorie im Backend ableiten
 def map_label_to_category(label: str, features: dict) -> str:
     if features.get("is_satire_domain"):
@@ -67,45 +163,250 @@ def map_label_to_category(label: str, features: dict) -> str:
 
 
 # ---------- Prompt ----------
+# Regeln und Antwortschema stehen im SYSTEM_PROMPT des Gateways – hier nur noch
+# FEATURES, META und der (verdichtete) Text. Die Kategorie leitet das Backend selbst ab.
 def build_prompt(title: str, url: str, text: str, features: dict) -> str:
     return f"""
-Du bist FakeNewsGuard.
-
-KATEGORIEN:
-{", ".join(CATEGORIES)}
-
-REGELN:
-- Satire ≠ Fake News
-- Propaganda, Falschmeldung, Manipulation → Fake
-- Clickbait/Irreführend → Unsicher
-
-MESSWERTE:
+FEATURES:
 - word_count: {features['word_count']}
+- has_enough_text: {features.get('has_enough_text', True)}
 - fake_trigger_hits: {features['fake_trigger_hits']}
 - uncertainty_hits: {features['uncertainty_hits']}
 - emotion_hits: {features['emotion_hits']}
 - is_satire_domain: {features['is_satire_domain']}
 
-ANTWORTFORMAT (NUR JSON):
-{{
-  "label": "likely_fake | uncertain | likely_real",
-  "confidence": 0-100,
-  "category": "...",
-  "red_flags": [string],
-  "reasoning_summary": string,
-  "suggested_counter_sources": [string]
-}}
+META:
+- title: {title}
+- url: {url}
 
 TEXT:
-{text[:8000]}
+{text}
 """.strip()
 
 
+def content_hash(text: str) -> str:
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def result_from_analysis(article: Article, analysis: Analysis) -> Dict[str, Any]:
+    # Gespeichertes Urteil im selben Format wie analyze_url zurückgeben
+    return {
+        "label": analysis.label,
+        "confidence": int(analysis.confidence or 0),
+        "category": analysis.category,
+        "analysis_text": analysis.analysis_text or analysis.reasoning_summary or "",
+        "red_flags": json.loads(analysis.red_flags) if analysis.red_flags else [],
+        "verdict_source": "not_modified",
+        "reasoning_summary": analysis.reasoning_summary or "",
+        "suggested_counter_sources": [],
+        "title": article.title,
+        "word_count": article.word_count or 0,
+        "excerpt": article.excerpt or "",
+    }
+
+
+def latest_analysis(db, article_id: int) -> Optional[Analysis]:
+    return (
+        db.query(Analysis)
+        .filter(Analysis.article_id == article_id)
+        .order_by(Analysis.created_at.desc(), Analysis.id.desc())
+        .first()
+    )
+
+
+def known_validators(db, url: str) -> Tuple[Optional[str], Optional[str]]:
+    row = (
+        db.query(Article.etag, Article.last_modified)
+        .filter(Article.url == url)
+        .first()
+    )
+    if row is None:
+        return None, None
+    return row.etag, row.last_modified
+
+
+def stored_result(db, url: str) -> Optional[Dict[str, Any]]:
+    article = db.query(Article).filter(Article.url == url).first()
+    if article is None:
+        return None
+    analysis = latest_analysis(db, article.id)
+    if analysis is None:
+        return None
+    return result_from_analysis(article, analysis)
+
+
+# ---------- Fetch + Extraktion ----------
+@dataclass
+class PreparedArticle:
+    url: str
+    title: str = ""
+    text: str = ""
+    excerpt: str = ""
+    features: Dict[str, Any] = field(default_factory=dict)
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    content_hash: Optional[str] = None
+    simhash: Optional[int] = None
+    not_modified: bool = False
+
+
+async def prepare_article(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> PreparedArticle:
+    with metrics.stage_seconds.time("fetch"):
+        page = await fetch_page(url, etag=etag, last_modified=last_modified)
+    if page.not_modified:
+        return PreparedArticle(
+            url=url,
+            etag=page.etag,
+            last_modified=page.last_modified,
+            not_modified=True,
+        )
+
+    # Parsing + Features sind CPU-lastig → Worker-Pool statt Event-Loop
+    record = await cpu_pool.run(extract_and_featurize, page.html, url)
+    for stage, seconds in record.timings.items():
+        metrics.stage_seconds.observe(seconds, stage)
+
+    return PreparedArticle(
+        url=url,
+        title=record.title,
+        text=record.text,
+        excerpt=record.excerpt,
+        features=record.features,
+        etag=page.etag,
+        last_modified=page.last_modified,
+        content_hash=content_hash(record.text),
+        simhash=record.simhash,
+    )
+
+
+# ---------- Near-Duplicates ----------
+def _load_simhash_index(db):
+    rows = db.query(Article.id, Article.simhash).filter(Article.simhash.isnot(None)).all()
+    near_duplicates.index.load(rows)
+
+
+def near_duplicate_result(db, prepared: PreparedArticle) -> Optional[Dict[str, Any]]:
+    """Letztes Urteil eines fast identischen anderen Artikels, angepasst an diesen Artikel."""
+    index = near_duplicates.index
+    if not index.loaded:
+        _load_simhash_index(db)
+
+    index.lookups += 1
+    for article_id, distance in index.candidates(prepared.simhash):
+        article = db.get(Article, article_id)
+        if article is None or article.url == prepared.url:
+            continue
+        analysis = latest_analysis(db, article_id)
+        # Nur echte Urteile weitergeben: Fallback/Satire sagen nichts über den Text,
+        # übernommene Urteile würden über Ketten A~B~C ungewollt weiterwandern
+        if analysis is None or analysis.verdict_source in ("llm_fallback", "satire_rule", "near_duplicate", "local"):
+            continue
+
+        index.hits += 1
+        features = prepared.features
+        return {
+            "label": analysis.label,
+            "confidence": int(analysis.confidence or 0),
+            "category": determine_category(analysis.label, features),
+            "analysis_text": analysis.analysis_text or analysis.reasoning_summary or "",
+            "red_flags": json.loads(analysis.red_flags) if analysis.red_flags else [],
+            "verdict_source": "near_duplicate",
+            "reasoning_summary": analysis.reasoning_summary or "",
+            "suggested_counter_sources": [],
+            "near_duplicate_of": article.url,
+            "similarity": round(1 - distance / near_duplicates.BITS, 3),
+            "title": prepared.title,
+            "word_count": features.get("word_count", 0),
+            "excerpt": prepared.excerpt,
+        }
+    return None
+
+
+def local_result(prepared: PreparedArticle, prediction: local_classifier.Prediction) -> Dict[str, Any]:
+    features = prepared.features
+    return {
+        "label": prediction.label,
+        "confidence": int(round(prediction.probability * 100)),
+        "category": determine_category(prediction.label, features),
+        "analysis_text": "Lokaler Klassifikator (ohne LLM).",
+        "red_flags": [],
+        "verdict_source": "local",
+        "reasoning_summary": f"Lokales Modell, p={prediction.probability:.3f}",
+        "suggested_counter_sources": DEFAULT_COUNTER_SOURCES if prediction.label != "likely_real" else [],
+        "title": prepared.title,
+        "word_count": features.get("word_count", 0),
+        "excerpt": prepared.excerpt,
+    }
+
+
 # ---------- Hauptanalyse ----------
-async def analyze_url(url: str) -> Dict[str, Any]:
-    html = await fetch_html(url)
-    title, text, excerpt = extract_article(html, url)
-    features = extract_features(text, url)
+EventCallback = Callable[[dict], Awaitable[None]]
+
+
+async def _no_event(event: dict):
+    pass
+
+
+async def analyze_url(
+    url: str, on_event: Optional[EventCallback] = None, revalidate: bool = True
+) -> Dict[str, Any]:
+    """Analysiert eine URL.
+
+    Mit revalidate wird ein bereits bekannter Artikel per Conditional GET revalidiert;
+    bei 304 wird das letzte gespeicherte Urteil wiederverwendet. Unter "_meta"
+    liegt der PreparedArticle für store_result. on_event bekommt Fortschritt
+    ({"type": "stage"}, {"type": "article"}) und LLM-Teilfelder ({"type": "fields"}).
+    """
+    with metrics.analyses_in_flight.track():
+        return await _analyze_url(url, on_event, revalidate)
+
+
+async def _analyze_url(url: str, on_event: Optional[EventCallback], revalidate: bool) -> Dict[str, Any]:
+    emit = on_event or _no_event
+    await emit({"type": "stage", "stage": "fetch"})
+
+    etag, last_modified = await run_db(known_validators, url) if revalidate else (None, None)
+
+    if etag or last_modified:
+        prepared = await prepare_article(url, etag, last_modified)
+        if prepared.not_modified:
+            result = await run_db(stored_result, url)
+            if result is not None:
+                metrics.verdicts_total.inc("not_modified")
+                result["_meta"] = prepared
+                return result
+            prepared = await prepare_article(url)
+    else:
+        prepared = await prepare_article(url)
+
+    await emit({
+        "type": "article",
+        "title": prepared.title,
+        "word_count": prepared.features.get("word_count", 0),
+        "excerpt": prepared.excerpt,
+    })
+    await emit({"type": "stage", "stage": "classify"})
+
+    result = await classify_article(prepared, on_event)
+    result["_meta"] = prepared
+    return result
+
+
+async def classify_article(
+    prepared: PreparedArticle, on_event: Optional[EventCallback] = None
+) -> Dict[str, Any]:
+    result = await _classify_article(prepared, on_event)
+    metrics.verdicts_total.inc(result.get("verdict_source") or "unknown")
+    return result
+
+
+async def _classify_article(prepared: PreparedArticle, on_event: Optional[EventCallback]) -> Dict[str, Any]:
+    title, url, text = prepared.title, prepared.url, prepared.text
+    excerpt, features = prepared.excerpt, prepared.features
 
     #  Harte Satire-Regel (ohne LLM)
     if features.get("is_satire_domain"):
@@ -114,6 +415,7 @@ async def analyze_url(url: str) -> Dict[str, Any]:
             "confidence": 40,
             "category": "Satire / Parodie",
             "red_flags": ["satire_domain"],
+            "verdict_source": "satire_rule",
             "analysis_text": "Bekannte Satire-Seite.",
             "reasoning_summary": "Satire ist keine Fake News im engeren Sinne.",
             "suggested_counter_sources": [],
@@ -122,59 +424,173 @@ async def analyze_url(url: str) -> Dict[str, Any]:
             "excerpt": excerpt,
         }
 
-    prompt = build_prompt(title, url, text, features)
-    parsed, debug = await call_llm(prompt)
+    cache_key = verdict_cache.key(text, features)
+    parsed = await verdict_cache.aget(cache_key)
+    verdict_source = "cache"
+
+    # Near-Duplicate (z. B. dieselbe Agenturmeldung auf anderer Seite) → Urteil übernehmen
+    if parsed is None and near_duplicates.NEAR_DUP_ENABLED and prepared.simhash is not None:
+        reused = await run_db(near_duplicate_result, prepared)
+        if reused is not None:
+            return reused
+
+    # Lokaler Klassifikator: sichere Fälle ohne LLM, der Rest eskaliert
+    local_prediction = None
+    if parsed is None and local_classifier.available():
+        local_prediction = await cpu_pool.run(local_classifier.predict, text, features)
+        if local_prediction is not None:
+            cascade_stats.consulted += 1
+            if not local_prediction.confident:
+                cascade_stats.escalated += 1
+            elif local_classifier.should_shadow():
+                cascade_stats.shadowed += 1
+            else:
+                cascade_stats.local += 1
+                return local_result(prepared, local_prediction)
+
+    prompt_stats: Dict[str, Any] = {}
+    if parsed is None:
+        # Nur die informativsten Sätze im Token-Budget an das LLM schicken
+        with metrics.stage_seconds.time("prompt"):
+            compacted = await cpu_pool.run(compact, text)
+            prompt = build_prompt(title, url, compacted.text, features)
+        prompt_stats = {"prompt_budget": compacted.budget, "prompt_compression": compacted.compression}
+        with metrics.stage_seconds.time("llm"):
+            if on_event is not None:
+                parsed, debug = await call_llm_stream(prompt, on_event)
+            else:
+                parsed, debug = await call_llm(prompt)
+        verdict_source = "llm"
+        if isinstance(parsed, dict):
+            # Vor dem Cachen normalisieren, sonst scheitert jeder spätere Insert am selben Verdict
+            parsed["confidence"] = normalize_confidence(parsed.get("confidence"), 50)
+            await verdict_cache.aput(cache_key, parsed)
 
     #  LLM-Fallback
     if not isinstance(parsed, dict):
+        metrics.llm_fallback_total.inc("llm_error" if debug.startswith("LLM error") else "no_json")
         return {
             "label": "uncertain",
             "confidence": 50,
             "category": determine_category("uncertain", features),
             "analysis_text": "LLM-Fallback",
             "red_flags": ["llm_fallback"],
+            "verdict_source": "llm_fallback",
             "reasoning_summary": debug,
             "suggested_counter_sources": DEFAULT_COUNTER_SOURCES,
             "title": title,
             "word_count": features["word_count"],
             "excerpt": excerpt,
+            **prompt_stats,
         }
 
     label = parsed.get("label", "uncertain")
     category = determine_category(label, features)
+    if local_prediction is not None:
+        cascade_stats.record_comparison(local_prediction, label)
 
     return {
         "label": label,
-        "confidence": parsed.get("confidence", 50),
+        "confidence": normalize_confidence(parsed.get("confidence"), 50),
         "category": category,
         "analysis_text": parsed.get("reasoning_summary", ""),
         "red_flags": parsed.get("red_flags", []),
+        "verdict_source": verdict_source,
         "reasoning_summary": parsed.get("reasoning_summary", ""),
         "suggested_counter_sources": parsed.get("suggested_counter_sources", []),
         "title": title,
         "word_count": features["word_count"],
         "excerpt": excerpt,
+        **prompt_stats,
     }
 
 
 
-async def analyze_and_store(url: str, db):
+async def analyze_and_store(url: str):
     result = await analyze_url(url)
+    prepared = result.pop("_meta", None) or PreparedArticle(url=url)
+    return await run_db(store_result, prepared, result)
+
+
+async def analyze_and_store_stream(url: str) -> AsyncIterator[dict]:
+    """Wie analyze_and_store, liefert aber Fortschritt und LLM-Teilfelder als Events."""
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def run():
+        try:
+            result = await analyze_url(url, on_event=events.put)
+            prepared = result.pop("_meta", None) or PreparedArticle(url=url)
+            await events.put({"type": "stage", "stage": "store"})
+            await events.put({"type": "result", "result": await run_db(store_result, prepared, result)})
+        except Exception as e:
+            await events.put({"type": "error", "detail": f"{type(e).__name__}: {e}"})
+        finally:
+            await events.put(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+    finally:
+        # Client weg → Analyse abbrechen
+        if not task.done():
+            task.cancel()
+
+
+def _apply_article(article: Article, prepared: PreparedArticle, result: Dict[str, Any]):
+    article.title = result.get("title")
+    article.text = prepared.text
+    article.excerpt = prepared.excerpt or (prepared.text or "")[:EXCERPT_CHARS]
+    article.source_domain = source_domain(prepared.url)
+    article.word_count = result.get("word_count", 0)
+    article.etag = prepared.etag
+    article.last_modified = prepared.last_modified
+    article.content_hash = prepared.content_hash
+    article.simhash = near_duplicates.to_signed(prepared.simhash) if prepared.simhash is not None else None
+
+
+def _new_analysis(article_id: int, result: Dict[str, Any]) -> Analysis:
+    return Analysis(
+        article_id=article_id,
+        label=result["label"],
+        confidence=normalize_confidence(result.get("confidence")),
+        category=result.get("category"),
+        reasoning_summary=result.get("reasoning_summary"),
+        analysis_text=result.get("analysis_text"),
+        red_flags=json.dumps(result.get("red_flags", [])),
+        verdict_source=result.get("verdict_source"),
+        prompt_budget=result.get("prompt_budget"),
+        prompt_compression=result.get("prompt_compression"),
+    )
+
+
+def store_result(db, prepared: PreparedArticle, result: Dict[str, Any]):
+    with metrics.stage_seconds.time("persist"):
+        return _store_result(db, prepared, result)
+
+
+def _store_result(db, prepared: PreparedArticle, result: Dict[str, Any]):
+    url = prepared.url
 
     # 🔹 1. Article holen oder neu anlegen
     article = db.query(Article).filter(Article.url == url).first()
 
-    if not article:
-        article = Article(
-            url=url,
-            title=result.get("title"),
-            text=result.get("analysis_text", ""),
-            word_count=result.get("word_count", 0),
-        )
+    if prepared.not_modified and article:
+        # 304: Text und letztes Urteil bleiben gültig, nur Validatoren auffrischen
+        article.etag = prepared.etag
+        article.last_modified = prepared.last_modified
+        db.commit()
+        return result
+
+    if article:
+        _apply_article(article, prepared, result)
+    else:
+        article = Article(url=url)
+        _apply_article(article, prepared, result)
         db.add(article)
         try:
-            db.commit()
-            db.refresh(article)
+            # Nur flushen: Artikel und Analysis landen gemeinsam im Commit unten
+            db.flush()
         except IntegrityError:
             db.rollback()
             if not isinstance(url, str):
@@ -183,17 +599,110 @@ async def analyze_and_store(url: str, db):
             article = db.query(Article).filter(Article.url == url).first()
 
     # 🔹 2. Neue Analysis IMMER anlegen
-    analysis = Analysis(
-        article_id=article.id,
-        label=result["label"],
-        confidence=result["confidence"],
-        category=result.get("category"),
-        reasoning_summary=result.get("reasoning_summary"),
-        red_flags=json.dumps(result.get("red_flags", [])),
-    )
-
+    analysis = _new_analysis(article.id, result)
     db.add(analysis)
+    db.flush()
+    article.latest_analysis_id = analysis.id
+    search_index.index_article(db, article.id, article.title, prepared.text, url)
+    trending.record(db, [(analysis.category, analysis.confidence)])
+    article_id = article.id
     db.commit()
+    near_duplicates.index.add(article_id, prepared.simhash)
 
     return result
 
+
+def store_results(
+    db, items: List[Tuple[PreparedArticle, Optional[Dict[str, Any]]]]
+) -> List[Union[Dict[str, Any], Exception]]:
+    """Schreibt mehrere Ergebnisse in einer Transaktion.
+
+    Ein IN-Lookup für alle URLs, ein Flush für neue Artikel, ein Commit.
+    Schlägt der Batch fehl (URL parallel angelegt, fehlerhafte Zeile, ...),
+    wird einzeln nachgeschrieben; an der Stelle einer Zeile, die auch einzeln
+    scheitert, steht dann deren Exception. Für unveränderte Artikel (304,
+    result None) wird das letzte Urteil geliefert.
+    """
+    if not items:
+        return []
+    with metrics.stage_seconds.time("persist"):
+        return _store_results(db, items)
+
+
+def _store_results(
+    db, items: List[Tuple[PreparedArticle, Optional[Dict[str, Any]]]]
+) -> List[Union[Dict[str, Any], Exception]]:
+
+    urls = {prepared.url for prepared, _ in items}
+    articles = {a.url: a for a in db.query(Article).filter(Article.url.in_(urls))}
+
+    results: List[Dict[str, Any]] = []
+    pending = []   # (Article, result) – Analysis erst nach dem Flush (article.id)
+    simhashes = []
+    try:
+        for prepared, result in items:
+            article = articles.get(prepared.url)
+
+            if prepared.not_modified and article:
+                article.etag = prepared.etag
+                article.last_modified = prepared.last_modified
+                if not result:
+                    analysis = latest_analysis(db, article.id)
+                    result = result_from_analysis(article, analysis) if analysis else {}
+                results.append(result)
+                continue
+
+            if not result:
+                results.append({})
+                continue
+
+            if article is None:
+                article = Article(url=prepared.url)
+                db.add(article)
+                articles[prepared.url] = article
+            _apply_article(article, prepared, result)
+            pending.append((article, result))
+            simhashes.append((article, prepared.simhash))
+            results.append(result)
+
+        db.flush()
+        analyses = [(article, _new_analysis(article.id, result)) for article, result in pending]
+        db.add_all([analysis for _, analysis in analyses])
+        db.flush()
+        for article, analysis in analyses:
+            article.latest_analysis_id = analysis.id
+            search_index.index_article(db, article.id, article.title, article.text, article.url)
+        trending.record(db, [(analysis.category, analysis.confidence) for _, analysis in analyses])
+        ids = [(article.id, value) for article, value in simhashes]
+        db.commit()
+        for article_id, value in ids:
+            near_duplicates.index.add(article_id, value)
+    except Exception:
+        db.rollback()
+        # Einzeln nachschreiben – eine kaputte Zeile kostet nur sich selbst
+        results = []
+        for prepared, result in items:
+            try:
+                results.append(_store_one(db, prepared, result))
+            except Exception as e:
+                db.rollback()
+                results.append(e)
+
+    return results
+
+
+def _store_one(db, prepared: PreparedArticle, result: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    # Wie ein Element im Batch-Pfad, aber in eigener Transaktion
+    if result:
+        return _store_result(db, prepared, result)
+    if not prepared.not_modified:
+        return {}
+    article = db.query(Article).filter(Article.url == prepared.url).first()
+    if article is None:
+        # 304 für einen Artikel, den es (nicht mehr) gibt – nichts zu schreiben
+        return {}
+    article.etag = prepared.etag
+    article.last_modified = prepared.last_modified
+    db.commit()
+    analysis = latest_analysis(db, article.id)
+    return result_from_analysis(article, analysis) if analysis else {}
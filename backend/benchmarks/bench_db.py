@@ -0,0 +1,132 @@
+"""SQLite unter Last: Standard-Engine gegen WAL + Pragmas.
+
+    cd backend && python -m benchmarks.bench_db [--writers 4] [--readers 8] [--ops 200]
+
+Schreiber legen Article + Analysis an (ein Commit pro Artikel, wie
+store_result), Leser führen die Dashboard-Abfrage aus. Beide Konfigurationen
+laufen auf einer frischen Datenbank in einem Temp-Verzeichnis.
+"""
+import argparse
+import os
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.orm import sessionmaker
+
+from benchmarks.common import print_table
+from db import SQLITE_BUSY_TIMEOUT_MS, Base, apply_sqlite_pragmas
+from models import Analysis, Article
+
+
+def make_engine(path: str, tuned: bool):
+    if not tuned:
+        # Stand vor WAL/Pragmas: Default-Journal, 5 s Default-Timeout von sqlite3
+        return create_engine(f"sqlite:///{path}", connect_args={"check_same_thread": False})
+
+    engine = create_engine(
+        f"sqlite:///{path}",
+        connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+    )
+    event.listen(engine, "connect", lambda conn, _: apply_sqlite_pragmas(conn))
+    return engine
+
+
+def percentile(values: list, q: float) -> float:
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+
+def run(tuned: bool, writers: int, readers: int, ops: int) -> dict:
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = make_engine(os.path.join(tmp, "bench.db"), tuned)
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine, autoflush=False)
+
+        lock = threading.Lock()
+        write_lat, read_lat = [], []
+        errors = 0
+        writers_done = threading.Event()
+
+        def writer(n: int):
+            nonlocal errors
+            for i in range(ops):
+                db = Session()
+                started = time.perf_counter()
+                try:
+                    article = Article(url=f"https://bench.test/{n}/{i}", title="t", text="x " * 400, word_count=400)
+                    db.add(article)
+                    db.flush()
+                    db.add(Analysis(article_id=article.id, label="uncertain", confidence=50, category="Manipulation"))
+                    db.commit()
+                    with lock:
+                        write_lat.append(time.perf_counter() - started)
+                except OperationalError:
+                    db.rollback()
+                    with lock:
+                        errors += 1
+                finally:
+                    db.close()
+
+        def reader():
+            nonlocal errors
+            while not writers_done.is_set():
+                db = Session()
+                started = time.perf_counter()
+                try:
+                    (
+                        db.query(Analysis, Article)
+                        .join(Article, Analysis.article_id == Article.id)
+                        .filter(Analysis.confidence >= 40)
+                        .order_by(Analysis.created_at.desc())
+                        .limit(50)
+                        .all()
+                    )
+                    with lock:
+                        read_lat.append(time.perf_counter() - started)
+                except OperationalError:
+                    with lock:
+                        errors += 1
+                finally:
+                    db.close()
+
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=writers + readers) as pool:
+            read_futures = [pool.submit(reader) for _ in range(readers)]
+            write_futures = [pool.submit(writer, n) for n in range(writers)]
+            for f in write_futures:
+                f.result()
+            writers_done.set()
+            for f in read_futures:
+                f.result()
+        elapsed = time.perf_counter() - started
+        engine.dispose()
+
+    return {
+        "modus": "wal+pragmas" if tuned else "default",
+        "writes/s": f"{len(write_lat) / elapsed:.0f}",
+        "reads/s": f"{len(read_lat) / elapsed:.0f}",
+        "write p95 ms": f"{percentile(write_lat, 0.95) * 1000:.1f}",
+        "read p95 ms": f"{percentile(read_lat, 0.95) * 1000:.1f}",
+        "fehler": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--ops", type=int, default=200, help="Artikel pro Schreiber")
+    args = parser.parse_args()
+
+    rows = [run(tuned, args.writers, args.readers, args.ops) for tuned in (False, True)]
+    print_table(rows, ["modus", "writes/s", "reads/s", "write p95 ms", "read p95 ms", "fehler"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Extraktion: lxml-Einzelparse (extractor) gegen die alten BeautifulSoup-Pfade.
+
+    cd backend && python -m benchmarks.bench_extract [--repeat 20]
+"""
+import argparse
+
+from bs4 import BeautifulSoup
+from readability import Document
+
+from benchmarks.common import load_corpus, measure, print_table
+from extractor import clean_text, extract_page
+
+
+# ---------- Stand vor extractor.py (zum Vergleich) ----------
+def legacy_extract_article(html: str, url: str):
+    soup = BeautifulSoup(html, "html.parser")
+
+    title = ""
+    og_title = soup.find("meta", property="og:title")
+    if og_title and og_title.get("content"):
+        title = og_title["content"]
+    elif soup.title:
+        title = soup.title.text.strip()
+
+    paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
+    text = " ".join(paragraphs)
+
+    if len(text.split()) < 20:
+        meta_desc = soup.find("meta", attrs={"name": "description"})
+        if meta_desc and meta_desc.get("content"):
+            text = meta_desc["content"]
+
+    return title or "(unbekannt)", text or "", text[:300] or ""
+
+
+def legacy_extract_main_text(url: str, html: str):
+    title = ""
+    main_text = ""
+    try:
+        doc = Document(html)
+        title = (doc.short_title() or "").strip()
+        soup = BeautifulSoup(doc.summary(), "lxml")
+        for tag in soup(["script", "style", "noscript"]):
+            tag.decompose()
+        main_text = clean_text(soup.get_text("\n", strip=True))
+    except Exception:
+        main_text = ""
+
+    if len(main_text.split()) < 50:
+        soup_full = BeautifulSoup(html, "lxml")
+        for tag in soup_full(["script", "style", "noscript", "header",
+                              "footer", "nav", "form", "aside"]):
+            tag.decompose()
+        body_text = clean_text(soup_full.get_text("\n", strip=True))
+        if len(body_text.split()) > len(main_text.split()):
+            main_text = body_text
+
+    if not title:
+        soup_head = BeautifulSoup(html, "lxml")
+        if soup_head.title and soup_head.title.string:
+            title = soup_head.title.string.strip()
+
+    return title or "Unbekannter Titel", main_text
+
+
+CANDIDATES = {
+    "legacy extract_article (html.parser)": lambda html: legacy_extract_article(html, ""),
+    "extract_page": lambda html: extract_page(html, ""),
+    "legacy extract_main_text (readability)": lambda html: legacy_extract_main_text("", html),
+    "extract_page(use_readability=True)": lambda html: extract_page(html, "", use_readability=True),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+    pages = list(corpus.values())
+    total_kib = sum(len(p.encode("utf-8")) for p in pages) / 1024
+    print(f"Korpus: {len(pages)} Seiten, {total_kib:.0f} KiB\n")
+
+    rows = []
+    for name, fn in CANDIDATES.items():
+        m = measure(lambda: [fn(p) for p in pages], args.repeat)
+        rows.append({
+            "funktion": name,
+            "seiten/s": f"{len(pages) * args.repeat / m['seconds']:.1f}",
+            "ms/korpus": f"{m['per_call_ms']:.1f}",
+            "peak KiB": f"{m['peak_kib']:.0f}",
+        })
+    print_table(rows, ["funktion", "seiten/s", "ms/korpus", "peak KiB"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Heuristik-Features: Trie-Regex-Matcher gegen str.count pro Begriff.
+
+    cd backend && python -m benchmarks.bench_features [--repeat 20]
+
+Die Lexika werden künstlich auf 10/100/1000 Begriffe aufgebläht, um zu
+zeigen, wie die Kosten mit der Lexikongröße wachsen.
+"""
+import argparse
+import random
+
+from benchmarks.common import load_corpus, measure, print_table
+from extractor import extract_page
+from heuristics import LexiconMatcher
+
+
+def legacy_count(text_l: str, lexicons: dict) -> dict:
+    return {cat: sum(text_l.count(w) for w in terms) for cat, terms in lexicons.items()}
+
+
+def synthetic_lexicons(size: int, vocabulary: list) -> dict:
+    rng = random.Random(size)
+    terms = rng.sample(vocabulary, min(size, len(vocabulary)))
+    while len(terms) < size:
+        terms.append(" ".join(rng.sample(vocabulary, 2)))
+    third = max(1, size // 3)
+    return {
+        "fake_trigger_hits": terms[:third],
+        "uncertainty_hits": terms[third:2 * third],
+        "emotion_hits": terms[2 * third:],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    texts = [extract_page(html).text.lower() for html in load_corpus().values()]
+    vocabulary = sorted({w for t in texts for w in t.split() if len(w) > 3})
+
+    rows = []
+    for size in (10, 100, 1000):
+        lexicons = synthetic_lexicons(size, vocabulary)
+        matcher = LexiconMatcher(lexicons)
+        legacy = measure(lambda: [legacy_count(t, lexicons) for t in texts], args.repeat)
+        new = measure(lambda: [matcher.count(t) for t in texts], args.repeat)
+        rows.append({
+            "begriffe": size,
+            "str.count ms": f"{legacy['per_call_ms']:.2f}",
+            "matcher ms": f"{new['per_call_ms']:.2f}",
+        })
+    print_table(rows, ["begriffe", "str.count ms", "matcher ms"])
+
+
+if __name__ == "__main__":
+    main()
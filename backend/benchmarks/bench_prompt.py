@@ -0,0 +1,91 @@
+"""Prompt-Verdichtung: Prompt-Größe und LLM-Latenz je Token-Budget.
+
+    cd backend && python -m benchmarks.bench_prompt [--budgets 0,400,800,1200,2000] [--gateway]
+
+Budget 0 ist das alte Verhalten (die ersten 8000 Zeichen). Ohne --gateway
+werden nur Prompt-Größe und Verdichtungszeit gemessen; mit --gateway geht
+jeder Prompt an LLM_GATEWAY_URL/classify (Ollama muss dahinter laufen) und
+es kommen Latenz und Label-Übereinstimmung mit Budget 0 dazu.
+"""
+import argparse
+import os
+import statistics
+import time
+
+import httpx
+
+from benchmarks.common import load_corpus, measure, print_table
+from extractor import extract_page
+from heuristics import extract_features
+from prompt_compaction import compact, estimate_tokens
+
+LLM_GATEWAY_URL = os.getenv("LLM_GATEWAY_URL", "http://127.0.0.1:8001").rstrip("/")
+
+
+def prompts_for(budget: int, pages: dict) -> dict:
+    from analysis_service import build_prompt
+
+    prompts = {}
+    for name, html in pages.items():
+        page = extract_page(html)
+        url = f"https://example.com/{name}"
+        compacted = compact(page.text, budget)
+        prompts[name] = build_prompt(page.title, url, compacted.text, extract_features(page.text, url))
+    return prompts
+
+
+def classify(client: httpx.Client, prompt: str):
+    started = time.perf_counter()
+    r = client.post(f"{LLM_GATEWAY_URL}/classify", json={"text": prompt})
+    r.raise_for_status()
+    parsed = r.json().get("parsed") or {}
+    return time.perf_counter() - started, parsed.get("label")
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--budgets", default="0,400,800,1200,2000")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--gateway", action="store_true", help="echte LLM-Aufrufe über das Gateway")
+    args = parser.parse_args()
+
+    pages = load_corpus()
+    texts = {name: extract_page(html).text for name, html in pages.items()}
+    budgets = [int(b) for b in args.budgets.split(",")]
+
+    client = httpx.Client(timeout=300.0) if args.gateway else None
+    baseline_labels = {}
+    rows = []
+    for budget in budgets:
+        prompts = prompts_for(budget, pages)
+        compaction = measure(lambda: [compact(t, budget) for t in texts.values()], args.repeat)
+        row = {
+            "budget": budget or "8000 Zeichen",
+            "prompt_tokens_avg": round(statistics.mean(estimate_tokens(p) for p in prompts.values())),
+            "prompt_tokens_max": max(estimate_tokens(p) for p in prompts.values()),
+            "compaction_ms": round(compaction["per_call_ms"] / len(texts), 3),
+            "llm_p50_s": "-",
+            "llm_max_s": "-",
+            "same_label": "-",
+        }
+        if client is not None:
+            latencies, labels = [], {}
+            for name, prompt in prompts.items():
+                seconds, labels[name] = classify(client, prompt)
+                latencies.append(seconds)
+            if not baseline_labels:
+                baseline_labels = labels
+            row["llm_p50_s"] = round(statistics.median(latencies), 2)
+            row["llm_max_s"] = round(max(latencies), 2)
+            row["same_label"] = f"{sum(labels[n] == baseline_labels.get(n) for n in labels)}/{len(labels)}"
+        rows.append(row)
+
+    if client is not None:
+        client.close()
+
+    print(f"Korpus: {len(pages)} Seiten, Tokens geschätzt (Zeichen/{os.getenv('PROMPT_CHARS_PER_TOKEN', '4.0')})")
+    print_table(rows, ["budget", "prompt_tokens_avg", "prompt_tokens_max", "compaction_ms", "llm_p50_s", "llm_max_s", "same_label"])
+
+
+if __name__ == "__main__":
+    main()
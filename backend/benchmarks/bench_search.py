@@ -0,0 +1,122 @@
+"""Dashboard-Suche: LIKE '%q%' gegen FTS5-Index.
+
+    cd backend && python -m benchmarks.bench_search [--sizes 100000,1000000] [--repeat 20]
+
+Erzeugt pro Größe eine synthetische Datenbank (Wörter aus dem Benchmark-
+Korpus) in einem Temp-Verzeichnis. Der Aufbau bei 1M Artikeln dauert einige
+Minuten und braucht ~1 GB Platz.
+"""
+import argparse
+import os
+import random
+import sqlite3
+import tempfile
+import time
+
+from benchmarks.common import load_corpus, print_table
+from extractor import extract_page
+from search_index import BM25_WEIGHTS, FTS_SCHEMA, FTS_TABLE, fts_query
+
+DOMAINS = ["tagesschau.de", "spiegel.de", "der-postillon.com", "zeit.de", "bild.de", "nius.de", "example.com"]
+WORDS_PER_ARTICLE = 60
+QUERIES = ["impfung", "regierung berlin", "schockierend", "wahrheit verschweigen"]
+
+
+def vocabulary() -> list:
+    words = {w.strip(".,;:!?\"'()").lower() for html in load_corpus().values() for w in extract_page(html).text.split()}
+    words = sorted(w for w in words if len(w) > 3)
+    # Abfragebegriffe kommen selten vor, damit Treffer nicht die halbe Tabelle sind
+    return [w for w in words if w not in {t for q in QUERIES for t in q.split()}]
+
+
+def build(path: str, size: int, vocab: list):
+    rng = random.Random(size)
+    rare = [t for q in QUERIES for t in q.split()]
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=OFF")
+    conn.execute("CREATE TABLE articles (id INTEGER PRIMARY KEY, url TEXT, title TEXT, text TEXT)")
+    conn.execute(FTS_SCHEMA)
+
+    batch = []
+    for i in range(1, size + 1):
+        words = rng.choices(vocab, k=WORDS_PER_ARTICLE)
+        if rng.random() < 0.01:
+            words[rng.randrange(len(words))] = rng.choice(rare)
+        domain = rng.choice(DOMAINS)
+        title = " ".join(words[:6]).capitalize()
+        batch.append((i, f"https://www.{domain}/artikel/{i}", title, " ".join(words), domain))
+        if len(batch) >= 10000:
+            _flush(conn, batch)
+            batch = []
+    _flush(conn, batch)
+    conn.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')")
+    conn.commit()
+    return conn
+
+
+def _flush(conn, batch):
+    conn.executemany("INSERT INTO articles VALUES (?, ?, ?, ?)", [b[:4] for b in batch])
+    conn.executemany(
+        f"INSERT INTO {FTS_TABLE} (rowid, title, body, domain) VALUES (?, ?, ?, ?)",
+        [(b[0], b[2], b[3], b[4]) for b in batch],
+    )
+
+
+def timed(conn, sql: str, params: tuple, repeat: int) -> float:
+    conn.execute(sql, params).fetchall()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        conn.execute(sql, params).fetchall()
+    return (time.perf_counter() - started) / repeat * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="100000,1000000")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    vocab = vocabulary()
+    w_title, w_body, w_domain = BM25_WEIGHTS
+    rows = []
+    for size in (int(s) for s in args.sizes.split(",")):
+        with tempfile.TemporaryDirectory() as tmp:
+            started = time.perf_counter()
+            conn = build(os.path.join(tmp, "search.db"), size, vocab)
+            build_s = time.perf_counter() - started
+
+            for q in QUERIES:
+                word = q.split()[0]
+                like_title = timed(
+                    conn,
+                    "SELECT id FROM articles WHERE title LIKE ? OR url LIKE ? ORDER BY id DESC LIMIT 50",
+                    (f"%{word}%", f"%{word}%"), args.repeat,
+                )
+                like_text = timed(
+                    conn,
+                    "SELECT id FROM articles WHERE title LIKE ? OR text LIKE ? ORDER BY id DESC LIMIT 50",
+                    (f"%{word}%", f"%{word}%"), args.repeat,
+                )
+                fts = timed(
+                    conn,
+                    f"SELECT rowid, bm25({FTS_TABLE}, {w_title}, {w_body}, {w_domain}) AS rank, "
+                    f"snippet({FTS_TABLE}, 1, '<mark>', '</mark>', '…', 24) "
+                    f"FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH ? ORDER BY rank LIMIT 50",
+                    (fts_query(q),), args.repeat,
+                )
+                rows.append({
+                    "artikel": size,
+                    "aufbau s": f"{build_s:.1f}",
+                    "query": q,
+                    "like titel/url ms": f"{like_title:.2f}",
+                    "like +text ms": f"{like_text:.2f}",
+                    "fts5 ranked ms": f"{fts:.2f}",
+                })
+            conn.close()
+
+    print_table(rows, ["artikel", "aufbau s", "query", "like titel/url ms", "like +text ms", "fts5 ranked ms"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Speicherbedarf und Dashboard-Latenz: unkomprimierter Volltext gegen CompressedText + excerpt.
+
+    cd backend && python -m benchmarks.bench_storage [--articles 20000] [--limit 200] [--repeat 20]
+
+Legt eine Datenbank im alten Format an (TEXT, Dashboard lädt ganze Entities
+und schneidet text[:280]), misst sie, migriert sie mit migrate_storage.migrate
+und misst erneut mit dem aktuellen dashboard_page.
+"""
+import argparse
+import json
+import os
+import random
+import tempfile
+from urllib.parse import urlparse
+
+from sqlalchemy import create_engine, text
+from sqlalchemy.orm import sessionmaker, undefer
+
+from benchmarks.common import load_corpus, measure, print_table
+from dashboard import dashboard_page
+from db import Base
+from extractor import extract_page
+from migrate_storage import migrate
+from models import Analysis, Article
+
+
+def legacy_dashboard(db, limit: int) -> list:
+    rows = (
+        db.query(Analysis, Article)
+        .join(Article, Analysis.article_id == Article.id)
+        .options(undefer(Article.text), undefer(Analysis.analysis_text))
+        .order_by(Analysis.created_at.desc(), Analysis.id.desc())
+        .limit(limit)
+        .all()
+    )
+    # Wie /dashboard vor der Umstellung
+    return [
+        {
+            "url": article.url,
+            "analyzed_at": analysis.created_at.isoformat(),
+            "source_domain": urlparse(article.url).netloc,
+            "result": {
+                "label": analysis.label,
+                "confidence": int(analysis.confidence),
+                "category": analysis.category,
+                "reasoning_summary": analysis.reasoning_summary,
+                "red_flags": json.loads(analysis.red_flags) if analysis.red_flags else [],
+                "title": article.title,
+                "word_count": article.word_count,
+                "excerpt": article.text[:280] if article.text else "",
+            },
+        }
+        for analysis, article in rows
+    ]
+
+
+def populate(engine, count: int):
+    sentences = [
+        s.strip() + "."
+        for html in load_corpus().values()
+        for s in extract_page(html).text.split(".")
+        if len(s.split()) > 3
+    ]
+    rng = random.Random(count)
+    with engine.begin() as conn:
+        for start in range(0, count, 1000):
+            articles, analyses = [], []
+            for i in range(start + 1, min(count, start + 1000) + 1):
+                body = " ".join(rng.choices(sentences, k=40))
+                articles.append({"id": i, "url": f"https://bench.test/{i}", "title": f"Artikel {i}", "text": body, "wc": len(body.split())})
+                analyses.append({"id": i, "aid": i, "conf": rng.randint(0, 100), "flags": json.dumps(["emotional_language"]), "atext": body[:600]})
+            # Altes Format: Volltext als TEXT, ohne excerpt
+            conn.execute(text("INSERT INTO articles (id, url, title, text, word_count) VALUES (:id, :url, :title, :text, :wc)"), articles)
+            conn.execute(text(
+                "INSERT INTO analysis (id, article_id, label, confidence, category, reasoning_summary, analysis_text, red_flags, created_at) "
+                "VALUES (:id, :aid, 'uncertain', :conf, 'Manipulation', 'kurz', :atext, :flags, datetime('now'))"
+            ), analyses)
+
+
+def file_size(engine, path: str) -> float:
+    with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+        conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+        conn.execute(text("VACUUM"))
+    return os.path.getsize(path) / 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--articles", type=int, default=20000)
+    parser.add_argument("--limit", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "storage.db")
+        engine = create_engine(f"sqlite:///{path}")
+        Base.metadata.create_all(engine)
+        Session = sessionmaker(bind=engine)
+        populate(engine, args.articles)
+
+        rows = []
+        size = file_size(engine, path)
+        with Session() as db:
+            m = measure(lambda: legacy_dashboard(db, args.limit), args.repeat)
+        rows.append({"format": "TEXT, ganze Entities", "db MB": f"{size:.1f}", "dashboard ms": f"{m['per_call_ms']:.2f}", "peak KiB": f"{m['peak_kib']:.0f}"})
+
+        migrate(engine)
+        size = file_size(engine, path)
+        with Session() as db:
+            m = measure(lambda: legacy_dashboard(db, args.limit), args.repeat)
+        rows.append({"format": "zlib, ganze Entities", "db MB": f"{size:.1f}", "dashboard ms": f"{m['per_call_ms']:.2f}", "peak KiB": f"{m['peak_kib']:.0f}"})
+        with Session() as db:
+            m = measure(lambda: dashboard_page(db, limit=args.limit), args.repeat)
+        rows.append({"format": "zlib + excerpt, load_only", "db MB": f"{size:.1f}", "dashboard ms": f"{m['per_call_ms']:.2f}", "peak KiB": f"{m['peak_kib']:.0f}"})
+        engine.dispose()
+
+    print_table(rows, ["format", "db MB", "dashboard ms", "peak KiB"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+import os
+import time
+import tracemalloc
+from typing import Callable, Dict, List
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+
+def load_corpus() -> Dict[str, str]:
+    pages = {}
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith(".html"):
+            with open(os.path.join(CORPUS_DIR, name), encoding="utf-8") as f:
+                pages[name] = f.read()
+    return pages
+
+
+def measure(fn: Callable[[], object], repeat: int) -> dict:
+    # Laufzeit ohne tracemalloc messen, Speicherspitze in einem eigenen Lauf
+    fn()
+    started = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {"seconds": elapsed, "per_call_ms": elapsed / repeat * 1000, "peak_kib": peak / 1024}
+
+
+def print_table(rows: List[dict], columns: List[str]):
+    widths = {c: max(len(c), *(len(str(r[c])) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in rows:
+        print("  ".join(str(r[c]).ljust(widths[c]) for c in columns))
@@ -0,0 +1,364 @@
+"""Microbenchmarks pro Pipeline-Stufe mit Baseline-Vergleich.
+
+    cd backend && python -m benchmarks.run [--stages extract,features] [--repeat 200]
+    cd backend && python -m benchmarks.run --save-baseline
+    cd backend && python -m benchmarks.run --threshold 0.25     # Exit-Code 1 bei Regression
+
+Läuft komplett offline: HTML aus benchmarks/corpus, LLM-Antworten aus
+corpus/llm_responses.json, HTTP über httpx.MockTransport, DB-Writes in eine
+Temp-Datenbank. Pro Stufe: ops/s, Latenz-Perzentile und Speicherspitze pro
+Aufruf (tracemalloc). Die Baseline (benchmarks/baseline.json) ist
+maschinenabhängig – nach einem Rechnerwechsel mit --save-baseline neu schreiben.
+"""
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Any, Callable, Dict, List, NamedTuple, Optional
+
+import httpx
+
+from benchmarks.common import CORPUS_DIR, load_corpus, print_table
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+BASELINE_PATH = os.path.join(BENCH_DIR, "baseline.json")
+LLM_RESPONSES_PATH = os.path.join(CORPUS_DIR, "llm_responses.json")
+GATEWAY_PATH = os.path.join(BENCH_DIR, "..", "..", "llm_gateway", "main.py")
+
+
+class Stage(NamedTuple):
+    name: str
+    fn: Callable[[Any], Any]       # ein Aufruf pro Eingabe
+    inputs: List[Any]
+    is_async: bool = False
+
+
+# ---------- Messung ----------
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+def _timings(stage: Stage, repeat: int) -> List[float]:
+    inputs = itertools.islice(itertools.cycle(stage.inputs), repeat)
+    timings = []
+    if stage.is_async:
+        async def run():
+            for _ in range(min(3, len(stage.inputs))):   # Warm-up
+                await stage.fn(stage.inputs[0])
+            for item in inputs:
+                started = time.perf_counter()
+                await stage.fn(item)
+                timings.append(time.perf_counter() - started)
+        asyncio.run(run())
+    else:
+        for item in stage.inputs[:3]:
+            stage.fn(item)
+        for item in inputs:
+            started = time.perf_counter()
+            stage.fn(item)
+            timings.append(time.perf_counter() - started)
+    return timings
+
+
+def _alloc_kib(stage: Stage) -> float:
+    """Mittlere Speicherspitze pro Aufruf über alle Eingaben."""
+    peaks = []
+
+    def before() -> int:
+        tracemalloc.reset_peak()
+        return tracemalloc.get_traced_memory()[0]
+
+    def after(start: int):
+        peaks.append(tracemalloc.get_traced_memory()[1] - start)
+
+    async def run_async():
+        for item in stage.inputs:
+            start = before()
+            await stage.fn(item)
+            after(start)
+
+    tracemalloc.start()
+    try:
+        if stage.is_async:
+            asyncio.run(run_async())
+        else:
+            for item in stage.inputs:
+                start = before()
+                stage.fn(item)
+                after(start)
+    finally:
+        tracemalloc.stop()
+    return sum(peaks) / len(peaks) / 1024 if peaks else 0.0
+
+
+def run_stage(stage: Stage, repeat: int, rounds: int) -> Dict[str, float]:
+    # Mehrere Runden: Perzentile über alle Aufrufe, für den Baseline-Vergleich
+    # zählt der beste Runden-Median (robuster gegen Störungen auf der Maschine)
+    timings: List[float] = []
+    round_medians = []
+    for _ in range(rounds):
+        t = _timings(stage, repeat)
+        round_medians.append(percentile(sorted(t), 50))
+        timings.extend(t)
+    ordered = sorted(timings)
+    return {
+        "ops_per_sec": round(len(timings) / sum(timings), 1),
+        "best_p50_us": round(min(round_medians) * 1e6, 1),
+        "p50_us": round(percentile(ordered, 50) * 1e6, 1),
+        "p95_us": round(percentile(ordered, 95) * 1e6, 1),
+        "p99_us": round(percentile(ordered, 99) * 1e6, 1),
+        "alloc_kib": round(_alloc_kib(stage), 1),
+    }
+
+
+# ---------- Stufen ----------
+def _pages() -> List[tuple]:
+    return [(f"https://bench.example/{name}", html) for name, html in load_corpus().items()]
+
+
+def _llm_responses() -> List[str]:
+    with open(LLM_RESPONSES_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _load_gateway():
+    # Das Gateway ist ein eigenes Paket (eigenes main.py) – per Pfad laden
+    path = os.path.abspath(GATEWAY_PATH)
+    if not os.path.exists(path):
+        return None
+    # Sein metrics.py heißt wie das des Backends – beim Laden austauschen,
+    # sonst landen die Gateway-Metriken in der Registry des Backends
+    backend_metrics = sys.modules.pop("metrics", None)
+    sys.path.insert(0, os.path.dirname(path))
+    try:
+        spec = importlib.util.spec_from_file_location("llm_gateway_main", path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(os.path.dirname(path))
+        sys.modules.pop("metrics", None)
+        if backend_metrics is not None:
+            sys.modules["metrics"] = backend_metrics
+    return module
+
+
+def stage_fetch(pages) -> Stage:
+    import scraper
+
+    html_by_path = {httpx.URL(url).path: html for url, html in pages}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        html = html_by_path.get(request.url.path, "")
+        return httpx.Response(200, text=html, headers={"Content-Type": "text/html; charset=utf-8", "ETag": '"bench"'})
+
+    scraper.fetch_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return Stage("fetch_page", scraper.fetch_page, [url for url, _ in pages], is_async=True)
+
+
+def stage_extract(pages) -> Stage:
+    from scraper import extract_article
+
+    return Stage("extract_article", lambda p: extract_article(p[1], p[0]), pages)
+
+
+def stage_extract_main_text(pages) -> Stage:
+    from scraper import extract_main_text
+
+    return Stage("extract_main_text", lambda p: extract_main_text(p[0], p[1]), pages)
+
+
+def _extracted(pages) -> List[tuple]:
+    from heuristics import extract_features
+    from scraper import extract_article
+
+    result = []
+    for url, html in pages:
+        title, text, excerpt = extract_article(html, url)
+        result.append((url, title, text, excerpt, extract_features(text, url)))
+    return result
+
+
+def stage_features(extracted) -> Stage:
+    from heuristics import extract_features
+
+    return Stage("extract_features", lambda e: extract_features(e[2], e[0]), extracted)
+
+
+def stage_simhash(extracted) -> Stage:
+    from near_duplicates import simhash
+
+    return Stage("simhash", lambda e: simhash(e[2]), extracted)
+
+
+def stage_compact(extracted) -> Stage:
+    from prompt_compaction import compact
+
+    return Stage("compact", lambda e: compact(e[2]), extracted)
+
+
+def stage_build_prompt(extracted) -> Stage:
+    from analysis_service import build_prompt
+    from prompt_compaction import compact
+
+    inputs = [(url, title, compact(text).text, features) for url, title, text, _, features in extracted]
+    return Stage("build_prompt", lambda i: build_prompt(i[1], i[0], i[2], i[3]), inputs)
+
+
+def stage_parse_llm(responses) -> Optional[Stage]:
+    gateway = _load_gateway()
+    if gateway is None:
+        return None
+    return Stage("gateway_extract_json", gateway._extract_json_from_text, responses)
+
+
+def stage_call_llm(responses) -> Stage:
+    import analysis_service
+    from analysis_service import call_llm
+
+    gateway = _load_gateway()
+    parse = gateway._extract_json_from_text if gateway else (lambda raw: None)
+    bodies = itertools.cycle([{"raw": raw, "parsed": parse(raw)} for raw in responses])
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        return httpx.Response(200, json=next(bodies))
+
+    analysis_service.llm_client._client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    return Stage("call_llm", call_llm, ["prompt"] * len(responses), is_async=True)
+
+
+def stage_store(extracted, tmp_dir: str) -> Stage:
+    from sqlalchemy import create_engine, event
+    from sqlalchemy.orm import sessionmaker
+
+    import search_index
+    from analysis_service import PreparedArticle, store_result
+    from db import Base, apply_sqlite_pragmas
+
+    engine = create_engine(f"sqlite:///{os.path.join(tmp_dir, 'bench.db')}", connect_args={"check_same_thread": False})
+    event.listen(engine, "connect", lambda conn, _: apply_sqlite_pragmas(conn))
+    Base.metadata.create_all(bind=engine)
+    search_index.ensure_fts(engine)
+    db = sessionmaker(bind=engine, autoflush=False)()
+    counter = itertools.count()
+
+    def store(e):
+        url, title, text, excerpt, features = e
+        prepared = PreparedArticle(
+            url=f"{url}?n={next(counter)}", title=title, text=text, excerpt=excerpt, features=features,
+        )
+        result = {
+            "label": "likely_real", "confidence": 80, "category": "Seriöse Nachricht",
+            "analysis_text": "bench", "red_flags": [], "verdict_source": "llm", "reasoning_summary": "bench",
+            "title": title, "word_count": features["word_count"], "excerpt": excerpt,
+        }
+        return store_result(db, prepared, result)
+
+    return Stage("store_result", store, extracted)
+
+
+def build_stages(tmp_dir: str) -> List[Stage]:
+    pages = _pages()
+    extracted = _extracted(pages)
+    responses = _llm_responses()
+    stages = [
+        stage_fetch(pages),
+        stage_extract(pages),
+        stage_extract_main_text(pages),
+        stage_features(extracted),
+        stage_simhash(extracted),
+        stage_compact(extracted),
+        stage_build_prompt(extracted),
+        stage_parse_llm(responses),
+        stage_call_llm(responses),
+        stage_store(extracted, tmp_dir),
+    ]
+    return [s for s in stages if s is not None]
+
+
+# ---------- Baseline ----------
+def load_baseline(path: str = BASELINE_PATH) -> Dict[str, dict]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f).get("stages", {})
+    except FileNotFoundError:
+        return {}
+
+
+def save_baseline(results: Dict[str, dict], path: str = BASELINE_PATH):
+    data = {
+        "recorded_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "stages": results,
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def compare(results: Dict[str, dict], baseline: Dict[str, dict], threshold: float) -> List[str]:
+    """Stufen, deren bester Runden-Median um mehr als `threshold` (relativ) über der Baseline liegt."""
+    regressions = []
+    for name, r in results.items():
+        base = baseline.get(name)
+        if not base or not base.get("best_p50_us"):
+            continue
+        change = r["best_p50_us"] / base["best_p50_us"] - 1
+        r["vs_baseline"] = f"{change:+.1%}"
+        if change > threshold:
+            regressions.append(f"{name}: p50 {base['best_p50_us']} → {r['best_p50_us']} µs ({change:+.1%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--stages", default="", help="Komma-Liste, leer = alle")
+    parser.add_argument("--repeat", type=int, default=200, help="Aufrufe pro Runde")
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--threshold", type=float, default=0.25, help="erlaubte p50-Verschlechterung (0.25 = 25 %%)")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--json", help="Ergebnisse zusätzlich als JSON schreiben")
+    args = parser.parse_args()
+
+    wanted = {s.strip() for s in args.stages.split(",") if s.strip()}
+    results: Dict[str, dict] = {}
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for stage in build_stages(tmp_dir):
+            if wanted and stage.name not in wanted:
+                continue
+            results[stage.name] = run_stage(stage, args.repeat, args.rounds)
+
+    if args.save_baseline:
+        save_baseline(results, args.baseline)
+        print(f"Baseline gespeichert: {args.baseline}")
+        regressions = []
+    else:
+        regressions = compare(results, load_baseline(args.baseline), args.threshold)
+
+    rows = [{"stage": name, **r, "vs_baseline": r.get("vs_baseline", "-")} for name, r in results.items()]
+    print_table(rows, ["stage", "ops_per_sec", "best_p50_us", "p50_us", "p95_us", "p99_us", "alloc_kib", "vs_baseline"])
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+
+    if regressions:
+        print(f"\n❌ Regression über {args.threshold:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
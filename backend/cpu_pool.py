@@ -0,0 +1,150 @@
+import asyncio
+import logging
+import multiprocessing
+import os
+import time
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Dict, NamedTuple, Optional
+
+from heuristics import extract_features
+from http_pool import env_int
+from near_duplicates import simhash
+from scraper import extract_article
+
+log = logging.getLogger(__name__)
+
+CPU_POOL_MODE = (os.getenv("CPU_POOL_MODE") or "process").lower()   # process | thread
+CPU_POOL_WORKERS = env_int("CPU_POOL_WORKERS", min(4, os.cpu_count() or 1))
+CPU_POOL_START_METHOD = os.getenv("CPU_POOL_START_METHOD") or "spawn"
+
+
+# ---------- Tasks (müssen auf Modulebene liegen, damit sie picklebar sind) ----------
+class ExtractedRecord(NamedTuple):
+    title: str
+    text: str
+    excerpt: str
+    features: Dict[str, Any]
+    simhash: Optional[int]
+    timings: Dict[str, float]   # Sekunden je Schritt, für /metrics im Hauptprozess
+
+
+def extract_and_featurize(html: str, url: str) -> ExtractedRecord:
+    started = time.perf_counter()
+    title, text, excerpt = extract_article(html, url)
+    extracted = time.perf_counter()
+    features, text_simhash = extract_features(text, url), simhash(text)
+    timings = {"extract": extracted - started, "features": time.perf_counter() - extracted}
+    return ExtractedRecord(title, text, excerpt, features, text_simhash, timings)
+
+
+def _timed_call(fn: Callable, args: tuple):
+    started = time.perf_counter()
+    result = fn(*args)
+    return result, time.perf_counter() - started
+
+
+# ---------- Pool ----------
+class _TaskStats:
+    __slots__ = ("count", "errors", "total", "max", "run_total")
+
+    def __init__(self):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0       # Submit → Ergebnis (inkl. Warteschlange)
+        self.max = 0.0
+        self.run_total = 0.0   # reine Rechenzeit im Worker
+
+    def as_dict(self) -> dict:
+        n = self.count or 1
+        return {
+            "count": self.count,
+            "errors": self.errors,
+            "avg_ms": round(self.total / n * 1000, 2),
+            "max_ms": round(self.max * 1000, 2),
+            "avg_run_ms": round(self.run_total / n * 1000, 2),
+            "avg_queue_ms": round((self.total - self.run_total) / n * 1000, 2),
+        }
+
+
+class CpuPool:
+    """Führt CPU-lastige Funktionen außerhalb des Event-Loops aus.
+
+    Standard ist ein ProcessPool; lässt er sich nicht starten (oder bricht
+    er weg), wird auf einen ThreadPool zurückgefallen.
+    """
+
+    def __init__(self, mode: str = CPU_POOL_MODE, workers: int = CPU_POOL_WORKERS):
+        self.requested_mode = mode
+        self.mode: Optional[str] = None
+        self.workers = max(1, workers)
+        self._executor: Optional[Executor] = None
+
+        self.in_flight = 0
+        self._tasks: Dict[str, _TaskStats] = {}
+
+    def start(self) -> Executor:
+        if self._executor is not None:
+            return self._executor
+
+        if self.requested_mode == "process":
+            try:
+                ctx = multiprocessing.get_context(CPU_POOL_START_METHOD)
+                self._executor = ProcessPoolExecutor(max_workers=self.workers, mp_context=ctx)
+                self.mode = "process"
+                return self._executor
+            except Exception as e:
+                log.warning(f"CPU POOL: ProcessPool nicht verfügbar ({e}) – nutze ThreadPool")
+
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="cpu")
+        self.mode = "thread"
+        return self._executor
+
+    def shutdown(self):
+        executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=False, cancel_futures=True)
+
+    def _fall_back_to_threads(self):
+        log.error("CPU POOL: ProcessPool defekt – wechsle auf ThreadPool")
+        self.shutdown()
+        self.requested_mode = "thread"
+        self.start()
+
+    async def run(self, fn: Callable, *args, name: Optional[str] = None):
+        name = name or fn.__name__
+        stats = self._tasks.setdefault(name, _TaskStats())
+        loop = asyncio.get_running_loop()
+
+        started = time.perf_counter()
+        self.in_flight += 1
+        try:
+            try:
+                result, run_time = await loop.run_in_executor(self.start(), _timed_call, fn, args)
+            except BrokenProcessPool:
+                self._fall_back_to_threads()
+                result, run_time = await loop.run_in_executor(self.start(), _timed_call, fn, args)
+        except Exception:
+            stats.errors += 1
+            raise
+        finally:
+            self.in_flight -= 1
+
+        elapsed = time.perf_counter() - started
+        stats.count += 1
+        stats.total += elapsed
+        stats.run_total += run_time
+        stats.max = max(stats.max, elapsed)
+        return result
+
+    def stats(self) -> dict:
+        return {
+            "mode": self.mode or "stopped",
+            "workers": self.workers,
+            "in_flight": self.in_flight,
+            "queue_depth": max(0, self.in_flight - self.workers),
+            "tasks": {name: s.as_dict() for name, s in self._tasks.items()},
+        }
+
+
+cpu_pool = CpuPool()
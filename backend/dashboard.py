@@ -0,0 +1,316 @@
+import base64
+import hashlib
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, AsyncIterator, Dict, List, NamedTuple, Optional, Tuple
+
+from sqlalchemy import String, and_, func, or_, type_coerce
+from sqlalchemy.orm import load_only
+from starlette.responses import JSONResponse
+
+from db import run_db
+from heuristics import source_domain
+from http_pool import env_float, env_int
+import metrics
+from models import Analysis, Article
+from search_index import match_filter
+
+try:
+    import orjson
+except ImportError:  # optional – Fallback auf json
+    orjson = None
+
+DASHBOARD_MAX_LIMIT = env_int("DASHBOARD_MAX_LIMIT", 200)
+DASHBOARD_STREAM_MAX_LIMIT = env_int("DASHBOARD_STREAM_MAX_LIMIT", 10000)   # format=ndjson
+DASHBOARD_CACHE_TTL = env_float("DASHBOARD_CACHE_TTL", 5.0)                 # Sekunden
+DASHBOARD_CACHE_SIZE = env_int("DASHBOARD_CACHE_SIZE", 256)
+
+# Erlaubte Sortierungen → Spalte; Tiebreaker ist immer Analysis.id.
+# created_at wird als gespeicherter String verglichen: SQLite legt CURRENT_TIMESTAMP
+# ohne Mikrosekunden ab, ein gebundenes datetime hätte sie – "=" würde nie greifen.
+SORT_COLUMNS = {
+    "created_at": type_coerce(Analysis.created_at, String),
+    "confidence": Analysis.confidence,
+    "word_count": Article.word_count,
+}
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj, ensure_ascii=False).encode("utf-8")
+
+
+_loads = orjson.loads if orjson is not None else json.loads
+
+
+class FastJSONResponse(JSONResponse):
+    """JSONResponse mit orjson (falls installiert) – Standard-Response-Klasse der App."""
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+class DashboardQuery(NamedTuple):
+    """Normalisierte Query-Parameter – gleichzeitig Cache-Key."""
+    q: Optional[str]
+    categories: Optional[str]
+    min_conf: int
+    only_failed: bool
+    sort: str
+    order: str
+    limit: int
+    cursor: Optional[str]
+    latest: bool
+
+
+def normalize_query(
+    q: Optional[str] = None,
+    categories: Optional[str] = None,
+    min_conf: int = 0,
+    only_failed: bool = False,
+    sort: str = "created_at",
+    order: str = "desc",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    latest: bool = False,
+    max_limit: int = DASHBOARD_MAX_LIMIT,
+) -> DashboardQuery:
+    q = " ".join((q or "").split()) or None
+    cats = sorted({c.strip() for c in (categories or "").split(",") if c.strip()})
+    return DashboardQuery(
+        q=q,
+        categories=",".join(cats) or None,
+        min_conf=max(0, min_conf),
+        only_failed=only_failed,
+        sort=sort if sort in SORT_COLUMNS else "created_at",
+        order="asc" if order == "asc" else "desc",
+        limit=max(1, min(limit, max_limit)),
+        cursor=cursor or None,
+        latest=latest,
+    )
+
+
+# ---------- Cursor ----------
+def encode_cursor(sort: str, order: str, value: Any, last_id: int) -> str:
+    payload = json.dumps([sort, order, value, last_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, sort: str, order: str) -> Tuple[Any, int]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        c_sort, c_order, value, last_id = json.loads(base64.urlsafe_b64decode(padded))
+    except Exception:
+        raise InvalidCursor("Ungültiger Cursor")
+    if c_sort != sort or c_order != order:
+        raise InvalidCursor("Cursor passt nicht zu sort/order")
+    return value, int(last_id)
+
+
+def _after(col, value: Any, last_id: int, desc: bool):
+    """Keyset-Bedingung "liegt hinter (value, last_id)" – NULL sortiert in SQLite zuerst."""
+    id_col = Analysis.id
+    if value is None:
+        if desc:
+            return and_(col.is_(None), id_col < last_id)
+        return or_(col.isnot(None), and_(col.is_(None), id_col > last_id))
+    if desc:
+        return or_(col < value, and_(col == value, id_col < last_id), col.is_(None))
+    return or_(col > value, and_(col == value, id_col > last_id))
+
+
+# ---------- Abfrage ----------
+def dashboard_page(
+    db,
+    q: Optional[str] = None,
+    categories: Optional[str] = None,
+    min_conf: int = 0,
+    only_failed: bool = False,
+    sort: str = "created_at",
+    order: str = "desc",
+    limit: int = 50,
+    cursor: Optional[str] = None,
+    latest: bool = False,
+) -> Tuple[List[dict], Optional[str]]:
+    """Eine Seite Dashboard-Einträge plus Cursor für die nächste Seite (oder None)."""
+    sort = sort if sort in SORT_COLUMNS else "created_at"
+    desc = order != "asc"
+    order = "desc" if desc else "asc"
+    limit = max(1, min(limit, DASHBOARD_MAX_LIMIT))
+    sort_col = SORT_COLUMNS[sort]
+
+    # Nur die Spalten der Liste laden – Volltext und analysis_text bleiben in der DB
+    query = db.query(Analysis, Article, sort_col.label("sort_value")).options(
+        load_only(
+            Analysis.id, Analysis.created_at, Analysis.label, Analysis.confidence,
+            Analysis.category, Analysis.reasoning_summary, Analysis.red_flags,
+        ),
+        load_only(
+            Article.id, Article.url, Article.title, Article.word_count,
+            Article.excerpt, Article.source_domain,
+        ),
+    )
+    if latest:
+        # Nur die jüngste Analyse pro Artikel
+        query = query.join(Article, Article.latest_analysis_id == Analysis.id)
+    else:
+        query = query.join(Article, Analysis.article_id == Article.id)
+
+    #  Suche (FTS5 über Titel, Text und Domain; ohne FTS5 LIKE auf Titel/URL)
+    if q:
+        query = query.filter(match_filter(q))
+
+    #  Min Confidence
+    if min_conf:
+        query = query.filter(Analysis.confidence >= min_conf)
+
+    #  Nur fehlerhafte
+    if only_failed:
+        query = query.filter(Analysis.label != "likely_real")
+
+    # Kategorien
+    if categories:
+        cat_list = [c.strip() for c in categories.split(",") if c.strip()]
+        query = query.filter(Analysis.category.in_(cat_list))
+
+    if cursor:
+        value, last_id = decode_cursor(cursor, sort, order)
+        query = query.filter(_after(sort_col, value, last_id, desc))
+
+    #  Sortierung (Analysis.id macht die Reihenfolge eindeutig)
+    if desc:
+        query = query.order_by(sort_col.desc(), Analysis.id.desc())
+    else:
+        query = query.order_by(sort_col.asc(), Analysis.id.asc())
+
+    # Eine Zeile mehr laden, um zu wissen, ob es weitergeht
+    rows = query.limit(limit + 1).all()
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+
+    next_cursor = None
+    if has_more and rows:
+        analysis, _, value = rows[-1]
+        next_cursor = encode_cursor(sort, order, value, analysis.id)
+
+    return [dashboard_item(analysis, article) for analysis, article, _ in rows], next_cursor
+
+
+def dashboard_item(analysis: Analysis, article: Article) -> dict:
+    return {
+        "url": article.url,
+        "analyzed_at": analysis.created_at.isoformat() if analysis.created_at else None,
+        "source_domain": article.source_domain or source_domain(article.url),
+        "result": {
+            "label": analysis.label,
+            "confidence": int(analysis.confidence or 0),
+            "category": analysis.category,
+            "reasoning_summary": analysis.reasoning_summary,
+            "red_flags": _loads(analysis.red_flags) if analysis.red_flags else [],
+            "title": article.title,
+            "word_count": article.word_count,
+            "excerpt": (article.excerpt or "")[:280],
+        },
+    }
+
+
+# ---------- HTTP-Caching ----------
+@dataclass
+class CachedPage:
+    version: Tuple[Any, ...]       # (max Analysis.id,) – ändert sich bei jedem Insert
+    etag: str
+    last_modified: Optional[str]
+    body: bytes                    # fertig serialisiertes JSON
+    next_cursor: Optional[str]
+    stored_at: float
+
+
+_page_cache: Dict[DashboardQuery, CachedPage] = {}
+
+
+def data_version(db) -> Tuple[Tuple[Any, ...], Optional[datetime]]:
+    # Analysen werden nur angehängt, nie geändert – die höchste id genügt als Version.
+    # max() über den Primärschlüssel kostet praktisch nichts.
+    max_id = db.query(func.max(Analysis.id)).scalar()
+    latest_at = None
+    if max_id is not None:
+        latest_at = db.query(Analysis.created_at).filter(Analysis.id == max_id).scalar()
+    return (max_id,), latest_at
+
+
+def _etag(version: Tuple[Any, ...], query: DashboardQuery) -> str:
+    digest = hashlib.sha1(repr((version, query)).encode("utf-8")).hexdigest()[:16]
+    return f'W/"{version[0] or 0}-{digest}"'
+
+
+def _http_date(dt: Optional[datetime]) -> Optional[str]:
+    if dt is None:
+        return None
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return format_datetime(dt.astimezone(timezone.utc), usegmt=True)
+
+
+async def cached_page(query: DashboardQuery) -> CachedPage:
+    """Seite aus dem TTL-Cache; nach Ablauf wird nur neu gebaut, wenn sich die Daten geändert haben."""
+    now = time.monotonic()
+    entry = _page_cache.get(query)
+    if entry is not None and now - entry.stored_at < DASHBOARD_CACHE_TTL:
+        metrics.dashboard_cache_total.inc("hit")
+        return entry
+
+    version, latest_at = await run_db(data_version)
+    if entry is not None and entry.version == version:
+        metrics.dashboard_cache_total.inc("revalidated")
+        entry.stored_at = now
+        return entry
+
+    metrics.dashboard_cache_total.inc("miss")
+
+    items, next_cursor = await run_db(dashboard_page, *query)
+    entry = CachedPage(
+        version=version,
+        etag=_etag(version, query),
+        last_modified=_http_date(latest_at),
+        body=dumps(items),
+        next_cursor=next_cursor,
+        stored_at=now,
+    )
+    if len(_page_cache) >= DASHBOARD_CACHE_SIZE:
+        _page_cache.clear()
+    _page_cache[query] = entry
+    return entry
+
+
+def not_modified(page: CachedPage, if_none_match: Optional[str], if_modified_since: Optional[str]) -> bool:
+    if if_none_match:
+        tags = {t.strip() for t in if_none_match.split(",")}
+        return "*" in tags or page.etag in tags or page.etag.removeprefix("W/") in tags
+    if if_modified_since and page.last_modified:
+        try:
+            return parsedate_to_datetime(page.last_modified) <= parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+async def stream_ndjson(query: DashboardQuery, page_size: int = DASHBOARD_MAX_LIMIT) -> AsyncIterator[bytes]:
+    """Große limits seitenweise per Keyset-Cursor lesen und zeilenweise ausliefern."""
+    remaining = query.limit
+    cursor = query.cursor
+    while remaining > 0:
+        page = query._replace(limit=min(page_size, remaining), cursor=cursor)
+        items, cursor = await run_db(dashboard_page, *page)
+        for item in items:
+            yield dumps(item) + b"\n"
+        remaining -= len(items)
+        if not cursor or not items:
+            break
@@ -1,19 +1,107 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker, declarative_base
+import asyncio
+import functools
+import logging
 import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, TypeVar
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker, declarative_base
+
+import metrics
+from http_pool import env_int
+
+log = logging.getLogger(__name__)
 
-print("DB FILE:", os.path.abspath("data/fng.db"))
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
-DATA_DIR = os.path.join(BASE_DIR, "data")
+# FNG_DATA_DIR: eigene Datenbank z. B. für Lasttests, ohne die Entwicklungs-DB anzufassen
+DATA_DIR = os.getenv("FNG_DATA_DIR") or os.path.join(BASE_DIR, "data")
 os.makedirs(DATA_DIR, exist_ok=True)
 
 DB_PATH = os.path.join(DATA_DIR, "fng.db")
+log.info(f"DB FILE: {DB_PATH}")
 DATABASE_URL = f"sqlite:///{DB_PATH}"
 
+# SQLite-Tuning
+SQLITE_BUSY_TIMEOUT_MS = env_int("SQLITE_BUSY_TIMEOUT_MS", 5000)
+SQLITE_CACHE_SIZE_KIB = env_int("SQLITE_CACHE_SIZE_KIB", 64 * 1024)    # pro Verbindung
+SQLITE_MMAP_SIZE = env_int("SQLITE_MMAP_SIZE", 256 * 1024 * 1024)      # Bytes, 0 = aus
+
+# DB-Zugriffe aus async-Code laufen in einem eigenen Thread-Pool
+DB_THREADS = env_int("DB_THREADS", 4)
+
 engine = create_engine(
     DATABASE_URL,
-    connect_args={"check_same_thread": False}
+    connect_args={"check_same_thread": False, "timeout": SQLITE_BUSY_TIMEOUT_MS / 1000},
+    pool_size=DB_THREADS,
+    max_overflow=DB_THREADS,
 )
 
+
+def apply_sqlite_pragmas(dbapi_connection):
+    # WAL: Leser blockieren den Schreiber nicht (und umgekehrt);
+    # synchronous=NORMAL reicht unter WAL für Crash-Konsistenz
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute(f"PRAGMA busy_timeout={SQLITE_BUSY_TIMEOUT_MS}")
+        cursor.execute(f"PRAGMA cache_size=-{SQLITE_CACHE_SIZE_KIB}")
+        cursor.execute(f"PRAGMA mmap_size={SQLITE_MMAP_SIZE}")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+    finally:
+        cursor.close()
+
+
+@event.listens_for(engine, "connect")
+def _on_connect(dbapi_connection, connection_record):
+    apply_sqlite_pragmas(dbapi_connection)
+
+
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+
+
+# Commit-Latenz (Flush + COMMIT inkl. Warten auf den Schreib-Lock) für /metrics
+@event.listens_for(SessionLocal, "before_commit")
+def _commit_started(session):
+    session.info["commit_started"] = time.perf_counter()
+
+
+@event.listens_for(SessionLocal, "after_commit")
+def _commit_finished(session):
+    started = session.info.pop("commit_started", None)
+    if started is not None:
+        metrics.db_commit_seconds.observe(time.perf_counter() - started)
+
+
+@event.listens_for(SessionLocal, "after_rollback")
+def _commit_failed(session):
+    session.info.pop("commit_started", None)
+
+Base = declarative_base()
+
+db_executor = ThreadPoolExecutor(max_workers=DB_THREADS, thread_name_prefix="db")
+
+T = TypeVar("T")
+
+
+def _with_session(fn: Callable[..., T], args: tuple, kwargs: dict) -> T:
+    db = SessionLocal()
+    try:
+        return fn(db, *args, **kwargs)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+async def run_db(fn: Callable[..., T], *args, **kwargs) -> T:
+    """Führt fn(db, *args, **kwargs) mit eigener Session im DB-Thread-Pool aus.
+
+    Hält den Event-Loop frei: Commits und Lock-Wartezeiten blockieren
+    keine anderen Requests mehr.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(db_executor, functools.partial(_with_session, fn, args, kwargs))
@@ -0,0 +1,162 @@
+import re
+from dataclasses import dataclass
+from typing import List, Optional
+
+import lxml.html
+from lxml import etree
+
+# Inhalte dieser Tags sind nie Artikeltext
+SKIP_TAGS = {"script", "style", "noscript", "template", "svg"}
+# Seitenrahmen – zählt nicht zum Body-Text
+BOILERPLATE_TAGS = {"header", "footer", "nav", "form", "aside"}
+
+EXCERPT_CHARS = 300
+
+_PARSER = lxml.html.HTMLParser(encoding="utf-8", remove_comments=True)
+_WS_RE = re.compile(r"[ \t]+")
+_BLANK_LINES_RE = re.compile(r"\n\s*\n\s*\n+")
+
+
+@dataclass
+class ExtractedPage:
+    title: str            # og:title, sonst <title>
+    html_title: str       # Inhalt von <title>
+    description: str      # <meta name="description">
+    paragraph_text: str   # alle <p>-Texte, mit Leerzeichen verbunden
+    body_text: str        # Body ohne Seitenrahmen, zeilenweise
+    text: str             # gewählter Haupttext
+    excerpt: str
+
+
+def clean_text(text: str) -> str:
+    if not text:
+        return ""
+    text = text.replace("\r", "\n")
+    text = _WS_RE.sub(" ", text)
+    text = _BLANK_LINES_RE.sub("\n\n", text)
+    return text.strip()
+
+
+def parse_html(html: str) -> Optional[lxml.html.HtmlElement]:
+    if not html or not html.strip():
+        return None
+    try:
+        # Als Bytes parsen: lxml lehnt str mit XML-Encoding-Deklaration ab
+        return lxml.html.document_fromstring(html.encode("utf-8", "replace"), parser=_PARSER)
+    except (etree.ParserError, ValueError):
+        return None
+
+
+def _walk(root: lxml.html.HtmlElement):
+    """Ein einziger Durchlauf über den Baum: Titel, Meta-Tags, <p>-Text und Body-Text."""
+    html_title = og_title = description = ""
+    paragraphs: List[str] = []
+    body_parts: List[str] = []
+
+    skip = boilerplate = head = 0
+    p_parts: Optional[List[str]] = None
+
+    def add(s: Optional[str]):
+        if not s or skip:
+            return
+        s = s.strip()
+        if not s:
+            return
+        if p_parts is not None:
+            p_parts.append(s)
+        if not boilerplate and not head:
+            body_parts.append(s)
+
+    for event, el in etree.iterwalk(root, events=("start", "end")):
+        tag = el.tag if isinstance(el.tag, str) else ""
+
+        if event == "start":
+            if tag in SKIP_TAGS:
+                skip += 1
+            elif tag in BOILERPLATE_TAGS:
+                boilerplate += 1
+            elif tag == "head":
+                head += 1
+            elif tag == "p" and not skip:
+                p_parts = []
+            elif tag == "title" and not html_title:
+                html_title = (el.text or "").strip()
+            elif tag == "meta":
+                prop = el.get("property") or el.get("name") or ""
+                if prop == "og:title" and not og_title:
+                    og_title = (el.get("content") or "").strip()
+                elif prop == "description" and not description:
+                    description = (el.get("content") or "").strip()
+
+            add(el.text)
+            continue
+
+        # event == "end"
+        if tag in SKIP_TAGS:
+            skip -= 1
+        elif tag in BOILERPLATE_TAGS:
+            boilerplate -= 1
+        elif tag == "head":
+            head -= 1
+        elif tag == "p" and p_parts is not None:
+            paragraphs.append(" ".join(p_parts))
+            p_parts = None
+
+        if el is not root:
+            add(el.tail)
+
+    return (
+        html_title,
+        og_title,
+        description,
+        " ".join(p for p in paragraphs if p),
+        clean_text("\n".join(body_parts)),
+    )
+
+
+def _readability_text(root: lxml.html.HtmlElement, url: str) -> tuple:
+    from readability import Document
+    from readability.htmls import shorten_title
+
+    # readability verändert den Baum – daher erst nach dem eigenen Durchlauf
+    title = (shorten_title(root) or "").strip()
+    summary_html = Document(root, url=url).summary(html_partial=True)
+    summary = parse_html(summary_html)
+    if summary is None:
+        return title, ""
+    _, _, _, _, text = _walk(summary)
+    return title, text
+
+
+def extract_page(html: str, url: str = "", use_readability: bool = False) -> ExtractedPage:
+    root = parse_html(html)
+    if root is None:
+        return ExtractedPage("", "", "", "", "", "", "")
+
+    html_title, og_title, description, paragraph_text, body_text = _walk(root)
+    title = og_title or html_title
+
+    text = paragraph_text
+    if use_readability:
+        try:
+            short_title, main_text = _readability_text(root, url)
+        except Exception:
+            short_title, main_text = "", ""
+        title = short_title or html_title
+        text = main_text
+        # Fallback: Body-Text, wenn Readability zu wenig findet
+        if len(text.split()) < 50 and len(body_text.split()) > len(text.split()):
+            text = body_text
+    elif len(text.split()) < 20 and description:
+        # Fallback: Meta-Description
+        text = description
+
+    return ExtractedPage(
+        title=title,
+        html_title=html_title,
+        description=description,
+        paragraph_text=paragraph_text,
+        body_text=body_text,
+        text=text,
+        excerpt=text[:EXCERPT_CHARS],
+    )
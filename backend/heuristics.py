@@ -1,4 +1,6 @@
+import os
 import re
+from typing import Dict, Iterable, List
 from urllib.parse import urlparse
 
 CATEGORIES = [
@@ -11,36 +13,118 @@ CATEGORIES = [
     "Seriöse Nachricht",
 ]
 
-SATIRE_DOMAINS = [
+# Lexika liegen als Textdateien (ein Begriff pro Zeile) in LEXICON_DIR;
+# fehlt eine Datei, gelten die eingebauten Listen.
+LEXICON_DIR = os.getenv(
+    "LEXICON_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), "lexicons"),
+)
+
+
+def load_lexicon(name: str, default: Iterable[str]) -> List[str]:
+    path = os.path.join(LEXICON_DIR, f"{name}.txt")
+    try:
+        with open(path, encoding="utf-8") as f:
+            terms = [line.strip().lower() for line in f]
+    except FileNotFoundError:
+        return [t.lower() for t in default]
+    return [t for t in terms if t and not t.startswith("#")]
+
+
+SATIRE_DOMAINS = frozenset(load_lexicon("satire_domains", [
     "der-postillon.com",
     "theonion.com",
     "titanic-magazin.de",
-]
+]))
 
-FAKE_TRIGGERS = [
+FAKE_TRIGGERS = load_lexicon("fake_triggers", [
     "die wahrheit", "keiner sagt", "sie verschweigen",
     "100% wahr", "niemand berichtet", "geheim"
-]
+])
 
-UNCERTAINTY_WORDS = [
+UNCERTAINTY_WORDS = load_lexicon("uncertainty_words", [
     "angeblich", "vermutlich", "soll", "möglicherweise"
-]
+])
 
-EMOTION_WORDS = [
+EMOTION_WORDS = load_lexicon("emotion_words", [
     "schockierend", "skandal", "unfassbar", "krass"
-]
+])
+
+
+# ---------- Lexikon-Matcher ----------
+def _trie_pattern(node: dict) -> str:
+    # Trie → Regex: gemeinsame Präfixe werden nur einmal geprüft, längere
+    # Treffer haben Vorrang (das optionale Ende ist gierig)
+    is_end = "" in node
+    branches = [re.escape(ch) + _trie_pattern(child) for ch, child in sorted(node.items()) if ch]
+    if not branches:
+        return ""
+    body = branches[0] if len(branches) == 1 else "(?:" + "|".join(branches) + ")"
+    if is_end:
+        return "(?:" + body + ")?"
+    return body
+
+
+class LexiconMatcher:
+    """Zählt Treffer mehrerer Lexika, ein Scan pro Lexikon.
+
+    Die Begriffe eines Lexikons werden zu einem Trie-Regex kompiliert; die
+    Laufzeit hängt damit kaum von der Zahl der Begriffe ab. Gezählt werden
+    nicht überlappende Treffer, bei gemeinsamem Präfix gewinnt der längste
+    Begriff: "skandalös" zählt einmal, auch wenn "skandal" und "skandalös"
+    im selben Lexikon stehen (str.count pro Begriff hätte zweimal gezählt).
+    Lexika werden unabhängig voneinander gescannt – ein Begriff, der in einem
+    anderen Lexikon länger vorkommt, verdeckt hier nichts. Wortgrenzen werden
+    nicht geprüft ("soll" trifft auch in "sollte"), siehe lexicons/README.md.
+    """
+
+    def __init__(self, lexicons: Dict[str, Iterable[str]]):
+        self.categories = list(lexicons)
+        self._regexes: Dict[str, re.Pattern] = {}
+        for category, terms in lexicons.items():
+            trie: dict = {}
+            for term in {t.lower() for t in terms if t}:
+                node = trie
+                for ch in term:
+                    node = node.setdefault(ch, {})
+                node[""] = True
+            pattern = _trie_pattern(trie)
+            if pattern:
+                self._regexes[category] = re.compile(pattern)
+
+    def count(self, text_l: str) -> Dict[str, int]:
+        counts = dict.fromkeys(self.categories, 0)
+        for category, regex in self._regexes.items():
+            counts[category] = sum(1 for _ in regex.finditer(text_l))
+        return counts
+
+
+MATCHER = LexiconMatcher({
+    "fake_trigger_hits": FAKE_TRIGGERS,
+    "uncertainty_hits": UNCERTAINTY_WORDS,
+    "emotion_hits": EMOTION_WORDS,
+})
+
+
+def source_domain(url: str) -> str:
+    return urlparse(url).netloc.replace("www.", "")
 
 
 def extract_features(text: str, url: str) -> dict:
-    text_l = text.lower()
-    domain = urlparse(url).netloc.replace("www.", "")
+    word_count = len(text.split())
+    domain = source_domain(url)
+    hits = MATCHER.count(text.lower())
 
     return {
-        "word_count": len(text.split()),
+        "word_count": word_count,
         "source_domain": domain,
         "is_satire_domain": domain in SATIRE_DOMAINS,
-        "fake_trigger_hits": sum(text_l.count(w) for w in FAKE_TRIGGERS),
-        "uncertainty_hits": sum(text_l.count(w) for w in UNCERTAINTY_WORDS),
-        "emotion_hits": sum(text_l.count(w) for w in EMOTION_WORDS),
-        "has_enough_text": len(text.split()) >= 150,
+        "fake_trigger_hits": hits["fake_trigger_hits"],
+        "uncertainty_hits": hits["uncertainty_hits"],
+        "emotion_hits": hits["emotion_hits"],
+        "has_enough_text": word_count >= 150,
     }
+
+
+def extract_features_batch(texts: Iterable[str], urls: Iterable[str]) -> List[dict]:
+    return [extract_features(text, url) for text, url in zip(texts, urls)]
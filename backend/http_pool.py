@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+from contextlib import asynccontextmanager
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import httpx
+
+log = logging.getLogger(__name__)
+
+
+def env_int(name: str, default: int) -> int:
+    try:
+        return int(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, default))
+    except ValueError:
+        return default
+
+
+def env_bool(name: str, default: bool = False) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PooledClient:
+    """Prozessweiter httpx.AsyncClient mit Keep-Alive und Limits pro Host.
+
+    Der Client wird beim FastAPI-Startup über start() angelegt und beim
+    Shutdown über aclose() geschlossen. Skripte ohne Lifecycle bekommen
+    beim ersten Zugriff automatisch einen Client.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        *,
+        timeout: httpx.Timeout,
+        limits: httpx.Limits,
+        headers: Optional[Dict[str, str]] = None,
+        http2: bool = False,
+        follow_redirects: bool = False,
+        max_per_host: int = 0,
+    ):
+        self.name = name
+        self.timeout = timeout
+        self.limits = limits
+        self.headers = headers or {}
+        self.http2 = http2
+        self.follow_redirects = follow_redirects
+        self.max_per_host = max_per_host
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._host_slots: Dict[str, asyncio.Semaphore] = {}
+
+        # Zähler für /stats – ohne Locks, da alles im Event-Loop läuft
+        self.requests_total = 0
+        self.in_flight = 0
+        self.waits = 0
+        self.errors = 0
+
+    def start(self) -> httpx.AsyncClient:
+        if self._client is not None and not self._client.is_closed:
+            return self._client
+
+        http2 = self.http2
+        if http2 and not _http2_available():
+            log.warning(f"{self.name}: HTTP/2 angefordert, aber 'h2' fehlt – nutze HTTP/1.1")
+            http2 = False
+
+        self._client = httpx.AsyncClient(
+            headers=self.headers,
+            timeout=self.timeout,
+            limits=self.limits,
+            http2=http2,
+            follow_redirects=self.follow_redirects,
+        )
+        return self._client
+
+    async def aclose(self):
+        client, self._client = self._client, None
+        self._host_slots.clear()
+        if client is not None:
+            await client.aclose()
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        return self.start()
+
+    def _slot(self, url: str) -> Optional[asyncio.Semaphore]:
+        if self.max_per_host <= 0:
+            return None
+        host = urlparse(url).netloc.lower()
+        slot = self._host_slots.get(host)
+        if slot is None:
+            slot = self._host_slots[host] = asyncio.Semaphore(self.max_per_host)
+        return slot
+
+    @asynccontextmanager
+    async def host_slot(self, url: str):
+        slot = self._slot(url)
+        if slot is None:
+            yield
+            return
+        if slot.locked():
+            self.waits += 1
+        async with slot:
+            yield
+
+    async def request(self, method: str, url: str, **kwargs) -> httpx.Response:
+        async with self.host_slot(url):
+            max_conn = self.limits.max_connections
+            if max_conn is not None and self.in_flight >= max_conn:
+                self.waits += 1
+
+            self.requests_total += 1
+            self.in_flight += 1
+            try:
+                return await self.client.request(method, url, **kwargs)
+            except httpx.HTTPError:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    @asynccontextmanager
+    async def stream(self, method: str, url: str, **kwargs):
+        async with self.host_slot(url):
+            self.requests_total += 1
+            self.in_flight += 1
+            try:
+                async with self.client.stream(method, url, **kwargs) as response:
+                    yield response
+            except httpx.HTTPError:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+
+    def stats(self) -> dict:
+        # httpx legt den httpcore-Pool nicht offiziell offen
+        pool = getattr(getattr(self._client, "_transport", None), "_pool", None)
+        connections = list(getattr(pool, "connections", []) or [])
+        idle = sum(1 for c in connections if c.is_idle())
+
+        return {
+            "open": self._client is not None and not self._client.is_closed,
+            "http2": self.http2,
+            "max_connections": self.limits.max_connections,
+            "max_keepalive_connections": self.limits.max_keepalive_connections,
+            "max_per_host": self.max_per_host,
+            "connections": len(connections),
+            "in_use": len(connections) - idle,
+            "idle": idle,
+            "in_flight": self.in_flight,
+            "requests_total": self.requests_total,
+            "waits": self.waits,
+            "errors": self.errors,
+        }
+
+    async def get(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("GET", url, **kwargs)
+
+    async def post(self, url: str, **kwargs) -> httpx.Response:
+        return await self.request("POST", url, **kwargs)
@@ -1,8 +1,121 @@
-from db import engine, Base
-from models import Article, Analysis
+from sqlalchemy import inspect, text, update
+
+from db import engine, Base, SessionLocal
+from models import EXCERPT_CHARS, Article, Analysis, AnalysisJob, FeedState, TopicRollup, VerdictCache
+from heuristics import source_domain
+import search_index
+import trending
+
+def _add_missing_columns():
+    # create_all legt nur fehlende Tabellen an – neue Spalten in bestehenden
+    # Tabellen werden hier per ALTER TABLE nachgezogen
+    inspector = inspect(engine)
+    with engine.begin() as conn:
+        for table in Base.metadata.sorted_tables:
+            if not inspector.has_table(table.name):
+                continue
+            existing = {c["name"] for c in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                col_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {col_type}"))
+                print(f"DB MIGRATION: {table.name}.{column.name} hinzugefügt")
+
+def _dedupe_active_jobs():
+    # Vor dem partiellen Unique-Index: doppelte aktive Jobs pro URL auf den ältesten reduzieren
+    if not inspect(engine).has_table(AnalysisJob.__tablename__):
+        return
+    with engine.begin() as conn:
+        updated = conn.execute(text(
+            "UPDATE analysis_jobs SET status = 'failed', error = 'Duplikat eines aktiven Jobs' "
+            "WHERE status IN ('pending', 'running') AND EXISTS ("
+            " SELECT 1 FROM analysis_jobs older WHERE older.url = analysis_jobs.url"
+            " AND older.status IN ('pending', 'running')"
+            " AND (older.created_at < analysis_jobs.created_at"
+            "  OR (older.created_at = analysis_jobs.created_at AND older.id < analysis_jobs.id)))"
+        )).rowcount
+    if updated:
+        print(f"DB MIGRATION: {updated} doppelte aktive Jobs als failed markiert")
+
+def _add_missing_indexes():
+    # Auch Indizes legt create_all nur zusammen mit neuen Tabellen an
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(bind=engine, checkfirst=True)
+
+def _backfill_latest_analysis():
+    with engine.begin() as conn:
+        updated = conn.execute(text(
+            "UPDATE articles SET latest_analysis_id = ("
+            " SELECT a.id FROM analysis a WHERE a.article_id = articles.id"
+            " ORDER BY a.created_at DESC, a.id DESC LIMIT 1"
+            ") WHERE latest_analysis_id IS NULL"
+            " AND EXISTS (SELECT 1 FROM analysis a WHERE a.article_id = articles.id)"
+        )).rowcount
+    if updated:
+        print(f"DB MIGRATION: latest_analysis_id für {updated} Artikel gesetzt")
+
+def _backfill_excerpts():
+    # Nur unkomprimierter Altbestand – komprimierte Texte bringen ihren Auszug mit
+    with engine.begin() as conn:
+        updated = conn.execute(text(
+            f"UPDATE articles SET excerpt = substr(text, 1, {EXCERPT_CHARS}) "
+            "WHERE excerpt IS NULL AND typeof(text) = 'text'"
+        )).rowcount
+    if updated:
+        print(f"DB MIGRATION: excerpt für {updated} Artikel gesetzt")
+
+def _backfill_source_domains():
+    db = SessionLocal()
+    try:
+        rows = db.query(Article.id, Article.url).filter(Article.source_domain.is_(None)).all()
+        if not rows:
+            return
+        db.execute(update(Article), [
+            {"id": article_id, "source_domain": source_domain(url)} for article_id, url in rows
+        ])
+        db.commit()
+    finally:
+        db.close()
+    print(f"DB MIGRATION: source_domain für {len(rows)} Artikel gesetzt")
+
+def _init_search_index():
+    existed = inspect(engine).has_table(search_index.FTS_TABLE)
+    if not search_index.ensure_fts(engine) or existed:
+        return
+    # Index neu angelegt → Bestandsartikel einmalig übernehmen
+    db = SessionLocal()
+    try:
+        count = search_index.rebuild(db)
+    finally:
+        db.close()
+    if count:
+        print(f"DB MIGRATION: Suchindex mit {count} Artikeln aufgebaut")
+
+def _init_trending_rollups(existed: bool):
+    if existed:
+        return
+    # Rollup-Tabelle neu → aus der Analyse-Historie füllen
+    db = SessionLocal()
+    try:
+        rows = trending.backfill(db)
+    finally:
+        db.close()
+    if rows:
+        print(f"DB MIGRATION: {rows} Trending-Rollups aus Bestandsdaten erzeugt")
 
 def init_db():
+    rollups_existed = inspect(engine).has_table(TopicRollup.__tablename__)
     Base.metadata.create_all(bind=engine)
+    _add_missing_columns()
+    _dedupe_active_jobs()
+    _add_missing_indexes()
+    _backfill_latest_analysis()
+    _backfill_excerpts()
+    _backfill_source_domains()
+    _init_search_index()
+    _init_trending_rollups(rollups_existed)
 
 if __name__ == "__main__":
     init_db()
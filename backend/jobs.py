@@ -0,0 +1,270 @@
+import asyncio
+import json
+import logging
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Optional, Set
+
+from sqlalchemy import func, or_, update
+from sqlalchemy.dialects.sqlite import insert
+
+from analysis_service import PreparedArticle, analyze_url, store_result
+from db import run_db
+from http_pool import env_float, env_int
+from models import AnalysisJob
+
+log = logging.getLogger(__name__)
+
+JOB_WORKERS = env_int("JOB_WORKERS", 2)
+JOB_POLL_INTERVAL = env_float("JOB_POLL_INTERVAL", 5.0)   # Sekunden, falls ein Notify verloren geht
+JOB_MAX_ATTEMPTS = env_int("JOB_MAX_ATTEMPTS", 3)
+JOB_RETRY_BACKOFF = env_float("JOB_RETRY_BACKOFF", 10.0)           # Sekunden vor dem 1. Retry, danach verdoppelt
+JOB_RETRY_BACKOFF_MAX = env_float("JOB_RETRY_BACKOFF_MAX", 300.0)
+
+ACTIVE_STATUSES = ("pending", "running")
+FINAL_STATUSES = ("done", "failed")
+
+
+def retry_delay(attempts: int) -> float:
+    # Exponentieller Backoff nach dem n-ten Fehlversuch
+    return min(JOB_RETRY_BACKOFF * 2 ** max(0, attempts - 1), JOB_RETRY_BACKOFF_MAX)
+
+
+def job_to_dict(job: AnalysisJob) -> dict:
+    return {
+        "id": job.id,
+        "url": job.url,
+        "status": job.status,
+        "stage": job.stage,
+        "result": json.loads(job.result) if job.result else None,
+        "error": job.error,
+        "attempts": job.attempts,
+        "not_before": job.not_before.isoformat() if job.not_before else None,
+        "created_at": job.created_at.isoformat() if job.created_at else None,
+        "updated_at": job.updated_at.isoformat() if job.updated_at else None,
+    }
+
+
+class JobQueue:
+    """SQLite-gestützte Job-Queue für /analyze mit In-Process-Workern.
+
+    Jobs liegen in analysis_jobs und überleben damit Neustarts; Jobs, die
+    beim Beenden noch liefen, werden beim Start wieder auf pending gesetzt.
+    """
+
+    def __init__(self, workers: int = JOB_WORKERS):
+        self.workers = max(1, workers)
+        self._tasks = []
+        self._wakeup: Optional[asyncio.Event] = None
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+
+    # ---------- Lifecycle ----------
+    async def start(self):
+        if self._tasks:
+            return
+        self._wakeup = asyncio.Event()
+
+        requeued = await run_db(self._requeue_running)
+        if requeued:
+            log.info(f"JOBS: {requeued} unterbrochene Jobs wieder eingereiht")
+
+        self._tasks = [asyncio.create_task(self._worker(i)) for i in range(self.workers)]
+
+    async def stop(self):
+        tasks, self._tasks = self._tasks, []
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    @staticmethod
+    def _requeue_running(db) -> int:
+        requeued = (
+            db.query(AnalysisJob)
+            .filter(AnalysisJob.status == "running")
+            .update({"status": "pending", "stage": None}, synchronize_session=False)
+        )
+        db.commit()
+        return requeued
+
+    # ---------- API ----------
+    async def submit(self, url: str) -> dict:
+        data = await run_db(self._insert, url)
+        if self._wakeup is not None:
+            self._wakeup.set()
+        return data
+
+    @staticmethod
+    def _insert(db, url: str) -> dict:
+        # Höchstens ein aktiver Job pro URL sichert der partielle Unique-Index;
+        # bei Konflikt den bestehenden Job zurückgeben
+        while True:
+            job_id = uuid.uuid4().hex
+            inserted = db.execute(
+                insert(AnalysisJob)
+                .values(id=job_id, url=url, status="pending", attempts=0)
+                .on_conflict_do_nothing(
+                    index_elements=["url"],
+                    index_where=AnalysisJob.status.in_(ACTIVE_STATUSES),
+                )
+            ).rowcount
+            db.commit()
+            if inserted:
+                return job_to_dict(db.get(AnalysisJob, job_id))
+
+            existing = (
+                db.query(AnalysisJob)
+                .filter(AnalysisJob.url == url, AnalysisJob.status.in_(ACTIVE_STATUSES))
+                .first()
+            )
+            # Sonst ist der bestehende Job gerade fertig geworden → erneut einfügen
+            if existing is not None:
+                return job_to_dict(existing)
+
+    async def get(self, job_id: str) -> Optional[dict]:
+        return await run_db(self._get, job_id)
+
+    @staticmethod
+    def _get(db, job_id: str) -> Optional[dict]:
+        job = db.get(AnalysisJob, job_id)
+        return job_to_dict(job) if job else None
+
+    def subscribe(self, job_id: str) -> asyncio.Queue:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.setdefault(job_id, set()).add(queue)
+        return queue
+
+    def unsubscribe(self, job_id: str, queue: asyncio.Queue):
+        subscribers = self._subscribers.get(job_id)
+        if subscribers is not None:
+            subscribers.discard(queue)
+            if not subscribers:
+                self._subscribers.pop(job_id, None)
+
+    async def stats(self) -> dict:
+        counts = await run_db(self._counts)
+        return {"workers": len(self._tasks), "by_status": counts}
+
+    @staticmethod
+    def _counts(db) -> dict:
+        return dict(
+            db.query(AnalysisJob.status, func.count(AnalysisJob.id))
+            .group_by(AnalysisJob.status)
+            .all()
+        )
+
+    # ---------- Worker ----------
+    def _publish(self, job_id: str, event: dict):
+        for queue in self._subscribers.get(job_id, ()):
+            queue.put_nowait(event)
+
+    @staticmethod
+    def _claim(db) -> Optional[AnalysisJob]:
+        while True:
+            now = datetime.now(timezone.utc)
+            job = (
+                db.query(AnalysisJob)
+                .filter(
+                    AnalysisJob.status == "pending",
+                    or_(AnalysisJob.not_before.is_(None), AnalysisJob.not_before <= now),
+                )
+                .order_by(AnalysisJob.created_at, AnalysisJob.id)
+                .first()
+            )
+            if job is None:
+                return None
+
+            # Atomar übernehmen – ein anderer Worker könnte schneller sein
+            claimed = db.execute(
+                update(AnalysisJob)
+                .where(AnalysisJob.id == job.id, AnalysisJob.status == "pending")
+                .values(status="running", stage="fetch", not_before=None, attempts=AnalysisJob.attempts + 1)
+            ).rowcount
+            db.commit()
+            if claimed:
+                db.refresh(job)
+                db.expunge(job)
+                return job
+
+    @staticmethod
+    def _set(db, job_id: str, values: dict):
+        db.query(AnalysisJob).filter(AnalysisJob.id == job_id).update(values, synchronize_session=False)
+        db.commit()
+
+    async def _update(self, job_id: str, **values):
+        await run_db(self._set, job_id, values)
+
+    async def _worker(self, n: int):
+        # Ein DB-Fehler (z. B. "database is locked") darf den Worker nicht beenden
+        errors = 0
+        orphan: Optional[AnalysisJob] = None    # übernommener Job, dessen Abschluss fehlschlug
+        while True:
+            job = None
+            try:
+                if orphan is not None:
+                    await self._fail(orphan, "Worker-Fehler beim Abschließen des Jobs")
+                    orphan = None
+
+                job = await run_db(self._claim)
+                if job is None:
+                    errors = 0
+                    self._wakeup.clear()
+                    try:
+                        await asyncio.wait_for(self._wakeup.wait(), timeout=JOB_POLL_INTERVAL)
+                    except asyncio.TimeoutError:
+                        pass
+                    continue
+
+                await self._run(job)
+                errors = 0
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                errors += 1
+                delay = min(0.5 * 2 ** errors, JOB_POLL_INTERVAL)
+                log.exception(f"JOB-WORKER {n}: Fehler, weiter in {delay:.1f}s")
+                orphan = orphan or job
+                await asyncio.sleep(delay)
+
+    async def _run(self, job: AnalysisJob):
+        job_id = job.id
+        self._publish(job_id, {"type": "status", "status": "running", "stage": "fetch"})
+
+        async def on_event(event: dict):
+            if event.get("type") == "stage":
+                await self._update(job_id, stage=event["stage"])
+            self._publish(job_id, event)
+
+        try:
+            result = await analyze_url(job.url, on_event=on_event)
+            prepared = result.pop("_meta", None) or PreparedArticle(url=job.url)
+            await on_event({"type": "stage", "stage": "store"})
+            result = await run_db(store_result, prepared, result)
+        except asyncio.CancelledError:
+            # Shutdown: Job bleibt "running" und wird beim nächsten Start neu eingereiht
+            raise
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+            log.error(f"JOB {job_id} FEHLGESCHLAGEN ({job.url}, Versuch {job.attempts}): {error}")
+            await self._fail(job, error)
+            return
+
+        await self._update(job_id, status="done", stage=None, error=None, result=json.dumps(result, ensure_ascii=False))
+        self._publish(job_id, {"type": "status", "status": "done", "result": result})
+
+    async def _fail(self, job: AnalysisJob, error: str):
+        """Fehlversuch verbuchen: mit Backoff zurück nach pending oder endgültig failed."""
+        if job.attempts >= JOB_MAX_ATTEMPTS:
+            await self._update(job.id, status="failed", stage=None, error=error)
+            self._publish(job.id, {"type": "status", "status": "failed", "error": error, "attempts": job.attempts})
+            return
+
+        # Nicht sofort wieder claimen – sonst rennt ein hängender Upstream direkt in den nächsten Fehlschlag
+        retry_at = datetime.now(timezone.utc) + timedelta(seconds=retry_delay(job.attempts))
+        await self._update(job.id, status="pending", stage=None, error=error, not_before=retry_at)
+        self._publish(job.id, {
+            "type": "status", "status": "pending", "error": error,
+            "attempts": job.attempts, "retry_at": retry_at.isoformat(),
+        })
+
+
+job_queue = JobQueue()
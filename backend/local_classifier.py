@@ -0,0 +1,388 @@
+import json
+import math
+import os
+import random
+import re
+import sys
+import time
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+from http_pool import env_bool, env_float, env_int
+
+try:
+    import numpy as np
+except ImportError:  # optional – Fallback auf reines Python
+    np = None
+
+LOCAL_CLASSIFIER_ENABLED = env_bool("LOCAL_CLASSIFIER_ENABLED", True)
+# Die NB-Posteriors sind keine echte Konfidenz – die Schwelle, ab der das lokale
+# Modell allein entscheidet, wird beim Training auf dem Holdout so gewählt, dass
+# die Präzision darüber mindestens diesen Wert erreicht
+LOCAL_CLASSIFIER_TARGET_PRECISION = env_float("LOCAL_CLASSIFIER_TARGET_PRECISION", 0.95)
+# Mindestzahl Holdout-Fälle über der Schwelle, sonst ist die Präzision zu wackelig
+LOCAL_CLASSIFIER_MIN_CONFIDENT = env_int("LOCAL_CLASSIFIER_MIN_CONFIDENT", 30)
+# Anteil sicherer Fälle, die trotzdem ans LLM gehen, um die Übereinstimmung zu messen
+LOCAL_CLASSIFIER_SHADOW_RATE = env_float("LOCAL_CLASSIFIER_SHADOW_RATE", 0.02)
+LOCAL_CLASSIFIER_MIN_SAMPLES = env_int("LOCAL_CLASSIFIER_MIN_SAMPLES", 200)
+LOCAL_CLASSIFIER_DIM = env_int("LOCAL_CLASSIFIER_DIM", 1 << 18)    # Hash-Buckets
+LOCAL_CLASSIFIER_PATH = os.getenv(
+    "LOCAL_CLASSIFIER_PATH",
+    os.path.join(
+        os.getenv("FNG_DATA_DIR") or os.path.join(os.path.dirname(os.path.abspath(__file__)), "data"),
+        "local_classifier.json",
+    ),
+)
+
+LABELS = ("likely_fake", "uncertain", "likely_real")
+# Nur Urteile, die tatsächlich vom LLM stammen, taugen als Trainingslabel
+TRAINING_SOURCES = ("llm", "cache")
+ALPHA = 1.0   # Laplace-Glättung
+
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# ---------- Merkmale ----------
+def _bucket(token: str, dim: int) -> int:
+    # crc32 statt hash(): muss über Prozesse und Neustarts stabil sein
+    return zlib.crc32(token.encode("utf-8")) % dim
+
+
+def tokens(text: str, features: dict) -> List[str]:
+    """Wort-Uni-/Bigramme plus die Heuristik-Features als eigene Tokens."""
+    words = _WORD_RE.findall((text or "").lower())
+    result = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+    for name in ("fake_trigger_hits", "uncertainty_hits", "emotion_hits"):
+        result.append(f"__{name}={min(int(features.get(name, 0)), 5)}")
+    if not features.get("has_enough_text", True):
+        result.append("__short")
+    if features.get("source_domain"):
+        result.append(f"__domain={features['source_domain']}")
+    return result
+
+
+def vectorize(text: str, features: dict, dim: int = LOCAL_CLASSIFIER_DIM) -> Set[int]:
+    # Bernoulli-artig: jedes Token zählt pro Dokument einmal
+    return {_bucket(t, dim) for t in tokens(text, features)}
+
+
+# ---------- Modell ----------
+class Prediction(NamedTuple):
+    label: str
+    probability: float
+    confident: bool = False    # über der kalibrierten Schwelle des Modells
+
+
+class NaiveBayesModel:
+    """Naive Bayes über binäre, gehashte Token-Merkmale.
+
+    vectorize liefert pro Dokument die Menge vorhandener Buckets; gezählt wird
+    also, in wie vielen Dokumenten einer Klasse ein Bucket vorkommt, und bei
+    der Vorhersage zählen nur vorhandene Buckets (multinomiales NB auf
+    binarisierten Merkmalen – kein volles Bernoulli-NB, abwesende Tokens
+    gehen nicht ein). Die Posteriors sind entsprechend überkonfident; die
+    Entscheidungsschwelle kommt deshalb aus der Kalibrierung (meta["threshold"]).
+
+    Gespeichert werden nur die (dünn besetzten) Zählungen; die Log-Wahr-
+    scheinlichkeiten werden beim Laden berechnet – mit NumPy als dichte
+    Matrix (eine Spalten-Summe pro Vorhersage), sonst als Dicts.
+    """
+
+    def __init__(self, dim: int, class_docs: Dict[str, int], counts: Dict[str, Dict[int, int]], meta: Optional[dict] = None):
+        self.dim = dim
+        self.labels = [label for label in LABELS if class_docs.get(label)]
+        self.class_docs = class_docs
+        self.counts = counts
+        self.meta = meta or {}
+
+        n_docs = sum(class_docs[label] for label in self.labels)
+        self._log_prior = [math.log(class_docs[label] / n_docs) for label in self.labels]
+        self._default: List[float] = []
+        self._log_prob: List[Dict[int, float]] = []
+        for label in self.labels:
+            c = counts.get(label, {})
+            denom = math.log(sum(c.values()) + ALPHA * dim)
+            self._default.append(math.log(ALPHA) - denom)
+            self._log_prob.append({j: math.log(n + ALPHA) - denom for j, n in c.items()})
+
+        self._matrix = None
+        if np is not None:
+            self._matrix = np.empty((len(self.labels), dim), dtype=np.float32)
+            for i, log_prob in enumerate(self._log_prob):
+                self._matrix[i].fill(self._default[i])
+                if log_prob:
+                    self._matrix[i, np.fromiter(log_prob.keys(), dtype=np.int64)] = np.fromiter(log_prob.values(), dtype=np.float32)
+            self._log_prior_np = np.asarray(self._log_prior, dtype=np.float64)
+
+    @property
+    def samples(self) -> int:
+        return sum(self.class_docs.values())
+
+    @property
+    def threshold(self) -> Optional[float]:
+        # None: nicht kalibriert → nie allein entscheiden
+        return self.meta.get("threshold")
+
+    def _prediction(self, label: str, probability: float) -> Prediction:
+        threshold = self.threshold
+        return Prediction(label, probability, threshold is not None and probability >= threshold)
+
+    def predict_indices(self, indices: Set[int]) -> Prediction:
+        if self._matrix is not None:
+            idx = np.fromiter(indices, dtype=np.int64, count=len(indices))
+            scores = self._log_prior_np + self._matrix[:, idx].sum(axis=1, dtype=np.float64)
+            scores = np.exp(scores - scores.max())
+            probs = scores / scores.sum()
+            best = int(probs.argmax())
+            return self._prediction(self.labels[best], float(probs[best]))
+
+        scores = [
+            prior + sum(log_prob.get(j, default) for j in indices)
+            for prior, log_prob, default in zip(self._log_prior, self._log_prob, self._default)
+        ]
+        top = max(scores)
+        exp = [math.exp(s - top) for s in scores]
+        best = max(range(len(exp)), key=exp.__getitem__)
+        return self._prediction(self.labels[best], exp[best] / sum(exp))
+
+    def predict(self, text: str, features: dict) -> Prediction:
+        return self.predict_indices(vectorize(text, features, self.dim))
+
+    # ---------- Persistenz ----------
+    def to_dict(self) -> dict:
+        return {
+            "version": 1,
+            "dim": self.dim,
+            "class_docs": self.class_docs,
+            "counts": {label: {str(j): n for j, n in c.items()} for label, c in self.counts.items()},
+            "meta": self.meta,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "NaiveBayesModel":
+        counts = {label: {int(j): n for j, n in c.items()} for label, c in data["counts"].items()}
+        return cls(data["dim"], data["class_docs"], counts, data.get("meta"))
+
+
+def fit(samples: Iterable[Tuple[Set[int], str]], dim: int = LOCAL_CLASSIFIER_DIM, meta: Optional[dict] = None) -> NaiveBayesModel:
+    class_docs: Counter = Counter()
+    counts: Dict[str, Counter] = {label: Counter() for label in LABELS}
+    for indices, label in samples:
+        if label not in counts:
+            continue
+        class_docs[label] += 1
+        counts[label].update(indices)
+    return NaiveBayesModel(dim, dict(class_docs), {label: dict(c) for label, c in counts.items() if c}, meta)
+
+
+# ---------- Laden (lazy, auch in Worker-Prozessen) ----------
+_model: Optional[NaiveBayesModel] = None
+_model_mtime: Optional[float] = None
+
+
+def load_model(path: str = LOCAL_CLASSIFIER_PATH) -> Optional[NaiveBayesModel]:
+    """Aktuelles Modell; wird neu eingelesen, sobald --train die Datei ersetzt hat."""
+    global _model, _model_mtime
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        _model, _model_mtime = None, None
+        return None
+    if mtime != _model_mtime:
+        with open(path, encoding="utf-8") as f:
+            _model = NaiveBayesModel.from_dict(json.load(f))
+        _model_mtime = mtime
+    return _model
+
+
+def available(path: str = LOCAL_CLASSIFIER_PATH) -> bool:
+    return LOCAL_CLASSIFIER_ENABLED and os.path.exists(path)
+
+
+def predict(text: str, features: dict) -> Optional[Prediction]:
+    """Läuft im CPU-Pool; None, wenn (noch) kein Modell trainiert ist."""
+    model = load_model()
+    if model is None:
+        return None
+    return model.predict(text, features)
+
+
+# ---------- Metriken (Hauptprozess) ----------
+class CascadeStats:
+    def __init__(self):
+        self.consulted = 0        # Vorhersagen des lokalen Modells
+        self.local = 0            # davon ohne LLM entschieden
+        self.escalated = 0        # unter der Schwelle → LLM
+        self.shadowed = 0         # sicher, aber zur Kontrolle trotzdem ans LLM
+        self.compared = 0         # LLM-Urteile mit lokaler Vorhersage
+        self.agreed = 0
+        self.compared_confident = 0
+        self.agreed_confident = 0
+
+    def record_comparison(self, prediction: Prediction, llm_label: str):
+        agreed = prediction.label == llm_label
+        self.compared += 1
+        self.agreed += agreed
+        if prediction.confident:
+            self.compared_confident += 1
+            self.agreed_confident += agreed
+
+    def stats(self) -> dict:
+        model = load_model() if LOCAL_CLASSIFIER_ENABLED else None
+        return {
+            "enabled": LOCAL_CLASSIFIER_ENABLED,
+            "numpy": np is not None,
+            "model_loaded": model is not None,
+            "model_samples": model.samples if model else 0,
+            "model_trained_at": model.meta.get("trained_at") if model else None,
+            "threshold": model.threshold if model else None,
+            "target_precision": LOCAL_CLASSIFIER_TARGET_PRECISION,
+            "calibration": model.meta.get("holdout") if model else None,
+            "shadow_rate": LOCAL_CLASSIFIER_SHADOW_RATE,
+            "consulted": self.consulted,
+            "local_verdicts": self.local,
+            "escalated": self.escalated,
+            "shadowed": self.shadowed,
+            "escalation_rate": round(self.escalated / self.consulted, 4) if self.consulted else 0.0,
+            "agreement": round(self.agreed / self.compared, 4) if self.compared else None,
+            # Übereinstimmung nur auf Fällen über der Schwelle (Shadow-Stichprobe)
+            "agreement_confident": (
+                round(self.agreed_confident / self.compared_confident, 4) if self.compared_confident else None
+            ),
+        }
+
+
+cascade_stats = CascadeStats()
+
+
+def should_shadow() -> bool:
+    return random.random() < LOCAL_CLASSIFIER_SHADOW_RATE
+
+
+# ---------- Training ----------
+def training_rows(db, batch_size: int = 500):
+    """(text, url, label) der jüngsten LLM-Urteile je Artikel, seitenweise per id."""
+    from models import Analysis, Article
+
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Article.id, Article.url, Article.text, Analysis.label)
+            .join(Analysis, Analysis.id == Article.latest_analysis_id)
+            .filter(Article.id > last_id, Analysis.verdict_source.in_(TRAINING_SOURCES))
+            .order_by(Article.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            return
+        for _, url, text, label in batch:
+            if text and label in LABELS:
+                yield text, url, label
+        last_id = batch[-1].id
+
+
+def holdout_predictions(model: NaiveBayesModel, samples: List[Tuple[Set[int], str]]) -> List[Tuple[float, bool]]:
+    """(Posterior, richtig?) je Holdout-Fall."""
+    result = []
+    for indices, label in samples:
+        p = model.predict_indices(indices)
+        result.append((p.probability, p.label == label))
+    return result
+
+
+def calibrate(
+    predictions: List[Tuple[float, bool]],
+    target_precision: float = LOCAL_CLASSIFIER_TARGET_PRECISION,
+    min_confident: int = LOCAL_CLASSIFIER_MIN_CONFIDENT,
+) -> Optional[float]:
+    """Niedrigste Schwelle, ab der die Präzision noch ≥ target_precision ist (maximale Abdeckung).
+
+    None, wenn keine Schwelle mit mindestens min_confident Fällen darüber das Ziel erreicht.
+    """
+    ranked = sorted(predictions, key=lambda p: -p[0])
+    threshold = None
+    correct = 0
+    for n, (probability, ok) in enumerate(ranked, 1):
+        correct += ok
+        if n < len(ranked) and ranked[n][0] == probability:
+            continue    # gleiche Posteriors liegen immer gemeinsam über oder unter der Schwelle
+        if n >= min_confident and correct / n >= target_precision:
+            threshold = probability
+    return threshold
+
+
+def evaluate(predictions: List[Tuple[float, bool]], threshold: Optional[float]) -> dict:
+    """Genauigkeit gesamt sowie Abdeckung und Präzision der lokal entschiedenen Fälle."""
+    n = len(predictions) or 1
+    local = [ok for probability, ok in predictions if threshold is not None and probability >= threshold]
+    return {
+        "samples": len(predictions),
+        "accuracy": round(sum(ok for _, ok in predictions) / n, 4),
+        "threshold": threshold,
+        "coverage": round(len(local) / n, 4),
+        "precision": round(sum(local) / len(local), 4) if local else None,
+    }
+
+
+def train(db, path: str = LOCAL_CLASSIFIER_PATH, holdout: float = 0.2, dim: int = LOCAL_CLASSIFIER_DIM) -> dict:
+    """Trainiert aus der DB, kalibriert die Schwelle auf einem Holdout und schreibt das Modell atomar."""
+    from heuristics import extract_features
+
+    samples = [
+        (vectorize(text, extract_features(text, url), dim), label)
+        for text, url, label in training_rows(db)
+    ]
+    labels = Counter(label for _, label in samples)
+    report = {"samples": len(samples), "labels": dict(labels)}
+    if len(samples) < LOCAL_CLASSIFIER_MIN_SAMPLES or len(labels) < 2:
+        report["saved"] = False
+        return report
+
+    random.Random(42).shuffle(samples)
+    split = int(len(samples) * (1 - holdout))
+    if not 0 < split < len(samples):
+        report["saved"] = False
+        return report
+
+    # Gespeichert wird genau das auf dem Trainingsteil gefittete Modell – ein
+    # Refit auf allen Daten würde die Posteriors und damit die Schwelle verschieben
+    model = fit(samples[:split], dim)
+    predictions = holdout_predictions(model, samples[split:])
+    threshold = calibrate(predictions, LOCAL_CLASSIFIER_TARGET_PRECISION, LOCAL_CLASSIFIER_MIN_CONFIDENT)
+    report["holdout"] = evaluate(predictions, threshold)
+    model.meta = {
+        "trained_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "threshold": threshold,
+        "target_precision": LOCAL_CLASSIFIER_TARGET_PRECISION,
+        **report,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(model.to_dict(), f, separators=(",", ":"))
+    os.replace(tmp, path)
+    report["saved"] = True
+    return report
+
+
+if __name__ == "__main__":
+    # python local_classifier.py --train
+    from db import SessionLocal
+
+    if "--train" not in sys.argv:
+        print("Aufruf: python local_classifier.py --train")
+        sys.exit(1)
+    db = SessionLocal()
+    try:
+        report = train(db)
+    finally:
+        db.close()
+    if report["saved"]:
+        print(f"✅ Lokaler Klassifikator trainiert: {report}")
+        if report["holdout"]["threshold"] is None:
+            print(f"⚠️ Präzision {LOCAL_CLASSIFIER_TARGET_PRECISION} auf dem Holdout nicht erreichbar – alle Fälle gehen ans LLM")
+    else:
+        print(f"⚠️ Zu wenig Trainingsdaten (min. {LOCAL_CLASSIFIER_MIN_SAMPLES}, ≥ 2 Labels): {report}")
+        sys.exit(1)
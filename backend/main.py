@@ -1,18 +1,39 @@
-from fastapi import FastAPI, Query
-
-from rss_scheduler import start_scheduler
-from analysis_service import analyze_url
-from db import SessionLocal
-from models import Article, Analysis
+import asyncio
+from fastapi import FastAPI, HTTPException, Query, Request, Response
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+
+from rss_scheduler import RSS_MANUAL_TRIGGER_ENABLED, start_scheduler
+from rss_analyzer import cycle_running as rss_cycle_running, last_cycle as rss_last_cycle, run_rss_auto_analysis
+from analysis_service import analyze_and_store, analyze_and_store_stream, llm_client, verdict_cache
+from init_db import init_db
+from scraper import fetch_client
+from cpu_pool import cpu_pool
+from dashboard import (
+    DASHBOARD_MAX_LIMIT,
+    DASHBOARD_STREAM_MAX_LIMIT,
+    FastJSONResponse,
+    InvalidCursor,
+    cached_page,
+    decode_cursor,
+    normalize_query,
+    not_modified,
+    stream_ndjson,
+)
+import metrics
+import search_index
+import trending
+import near_duplicates
+import local_classifier
+from jobs import FINAL_STATUSES, job_queue
+from pipeline import BATCH_MAX_URLS, analyze_batch_stream
+from db import run_db
 import logging
 log = logging.getLogger(__name__)
 import json
 from fastapi.middleware.cors import CORSMiddleware
-from urllib.parse import urlparse
-from sqlalchemy import func
 
 
-app = FastAPI(title="FakeNewsGuard Backend")
+app = FastAPI(title="FakeNewsGuard Backend", default_response_class=FastJSONResponse)
 
 app.add_middleware(
     CORSMiddleware,
@@ -23,65 +44,148 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "ETag", "Last-Modified"],
 )
 
 
 
 @app.post("/analyze")
 async def analyze(req: dict):
-    db = SessionLocal()
-
-    try:
-        return await analyze_and_store(req["url"], db)
-    finally:
-        db.close()
-    
-async def analyze_and_store(url: str, db):
-    
-        result = await analyze_url(url)
-
-       # --- Article (robust) ---
-        article = (
-            db.query(Article)
-            .filter(Article.url == url)
-            .first()
-        )
-
-        if not article:
-            article = Article(
-                url=url,
-                title=result.get("title"),
-                text=result.get("analysis_text", ""),
-                word_count=result.get("word_count", 0),
-            )
-            db.add(article)
-            db.commit()
-            db.refresh(article)
-
-        # --- Analysis ---
-        analysis = Analysis(
-            article_id=article.id,
-            label=result["label"],
-            confidence=result["confidence"],
-            category=result.get("category"),
-            red_flags=json.dumps(result.get("red_flags", [])),
-            reasoning_summary=result.get("reasoning_summary"),
-        )
-        db.add(analysis)
-        db.commit()
-
-        return result
-
-
+    # Job-Modus: sofort Job-ID zurückgeben, Analyse läuft im Hintergrund
+    if req.get("mode") == "job":
+        return JSONResponse(await job_queue.submit(req["url"]), status_code=202)
+
+    return await analyze_and_store(req["url"])
+
+@app.post("/analyze/stream")
+async def analyze_stream(req: dict):
+    # NDJSON: stage/article/fields-Events, zum Schluss result (oder error)
+    url = req["url"]
+
+    async def events():
+        async for event in analyze_and_store_stream(url):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.post("/analyze/batch")
+async def analyze_batch(req: dict):
+    # NDJSON: ein result-Event pro URL in Fertigstellungsreihenfolge, dann summary
+    urls = [u.strip() for u in req.get("urls") or [] if isinstance(u, str) and u.strip()]
+    if not urls:
+        raise HTTPException(status_code=400, detail="Keine URLs angegeben")
+    if len(urls) > BATCH_MAX_URLS:
+        raise HTTPException(status_code=413, detail=f"Maximal {BATCH_MAX_URLS} URLs pro Batch")
+
+    async def events():
+        async for event in analyze_batch_stream(urls):
+            yield json.dumps(event, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+@app.get("/search")
+async def search_articles(q: str = Query(..., min_length=1), limit: int = Query(20), offset: int = Query(0)):
+    # Volltextsuche, nach bm25 gerankt, mit <mark>-Hervorhebung in Titel und Ausschnitt
+    if not search_index.fts_available:
+        raise HTTPException(status_code=503, detail="Volltextsuche nicht verfügbar")
+    return await run_db(search_index.search, q, max(1, min(limit, 100)), max(0, offset))
+
+@app.post("/jobs", status_code=202)
+async def create_job(req: dict):
+    return await job_queue.submit(req["url"])
+
+@app.get("/jobs/{job_id}")
+async def get_job(job_id: str):
+    job = await job_queue.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+    return job
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(job_id: str):
+    # Server-Sent Events: aktueller Stand, dann stage/fields/status bis done/failed
+    if await job_queue.get(job_id) is None:
+        raise HTTPException(status_code=404, detail="Job nicht gefunden")
+
+    def sse(event: str, data: dict) -> str:
+        return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+    async def events():
+        queue = job_queue.subscribe(job_id)
+        try:
+            job = await job_queue.get(job_id)
+            yield sse("status", job)
+            if job["status"] in FINAL_STATUSES:
+                return
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    yield ": keepalive\n\n"
+                    continue
+                yield sse(event["type"], event)
+                if event["type"] == "status" and event.get("status") in FINAL_STATUSES:
+                    return
+        finally:
+            job_queue.unsubscribe(job_id, queue)
+
+    return StreamingResponse(events(), media_type="text/event-stream")
 
 @app.get("/health")
 def health():
     return {"status": "ok"}
 
 
+@app.get("/stats")
+async def stats():
+    return {
+        "http": {
+            "fetch": fetch_client.stats(),
+            "llm": llm_client.stats(),
+        },
+        "cpu_pool": cpu_pool.stats(),
+        "jobs": await job_queue.stats(),
+        "verdict_cache": verdict_cache.stats(),
+        "near_duplicates": near_duplicates.index.stats(),
+        "local_classifier": local_classifier.cascade_stats.stats(),
+        "rss_last_cycle": rss_last_cycle,
+    }
+
+
+
+# ---------- Prometheus ----------
+# Vorhandene Zähler werden erst beim Scrape gelesen (keine doppelte Buchführung)
+_http_clients = (fetch_client, llm_client)
+metrics.CallbackMetric("fng_http_in_flight", "Laufende ausgehende HTTP-Requests", "gauge",
+                       lambda: {(c.name,): c.in_flight for c in _http_clients}, ("client",))
+metrics.CallbackMetric("fng_http_requests_total", "Ausgehende HTTP-Requests", "counter",
+                       lambda: {(c.name,): c.requests_total for c in _http_clients}, ("client",))
+metrics.CallbackMetric("fng_http_errors_total", "Ausgehende HTTP-Requests mit Transportfehler", "counter",
+                       lambda: {(c.name,): c.errors for c in _http_clients}, ("client",))
+metrics.CallbackMetric("fng_http_pool_waits_total", "Requests, die auf eine freie Verbindung warten mussten", "counter",
+                       lambda: {(c.name,): c.waits for c in _http_clients}, ("client",))
+metrics.CallbackMetric("fng_cpu_pool_in_flight", "Aufgaben im CPU-Pool (laufend + wartend)", "gauge",
+                       lambda: cpu_pool.in_flight)
+metrics.CallbackMetric("fng_verdict_cache_lookups_total", "Verdict-Cache-Abfragen nach Ergebnis", "counter",
+                       lambda: {("memory_hit",): verdict_cache.memory_hits, ("db_hit",): verdict_cache.db_hits,
+                                ("miss",): verdict_cache.misses}, ("result",))
+metrics.CallbackMetric("fng_near_duplicate_lookups_total", "Near-Duplicate-Abfragen nach Ergebnis", "counter",
+                       lambda: {("hit",): near_duplicates.index.hits,
+                                ("miss",): near_duplicates.index.lookups - near_duplicates.index.hits}, ("result",))
+metrics.CallbackMetric("fng_local_classifier_decisions_total", "Entscheidungen des lokalen Klassifikators", "counter",
+                       lambda: {("local",): local_classifier.cascade_stats.local,
+                                ("escalated",): local_classifier.cascade_stats.escalated,
+                                ("shadowed",): local_classifier.cascade_stats.shadowed}, ("decision",))
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
+
 
 @app.get("/dashboard")
-def dashboard(
+async def dashboard(
+    request: Request,
     q: str | None = Query(None),
     categories: str | None = Query(None),
     min_conf: int = Query(0),
@@ -89,113 +193,68 @@ def dashboard(
     sort: str = Query("created_at"),
     order: str = Query("desc"),
     limit: int = Query(50),
+    cursor: str | None = Query(None),
+    latest: bool = Query(False),
+    format: str = Query("json"),
 ):
+    # Keyset-Paging: Body bleibt eine Liste, der Cursor der nächsten Seite steht in X-Next-Cursor
+    stream = format == "ndjson"
+    query = normalize_query(
+        q, categories, min_conf, only_failed, sort, order, limit, cursor, latest,
+        max_limit=DASHBOARD_STREAM_MAX_LIMIT if stream else DASHBOARD_MAX_LIMIT,
+    )
 
-    db = SessionLocal()
     try:
-        articles = (
-            db.query(Article)
-            .order_by(Article.created_at.desc().nulls_last())
-            .limit(limit)
-            .all()
-        )
-        return articles
-    except Exception as e:
-        log.error(f"DASHBOARD ERROR: {e}")
-       
-
-
-        query = (
-            db.query(Analysis, Article)
-            .join(Article, Analysis.article_id == Article.id)
-        )
-
-        #  Suche
-        if q:
-            query = query.filter(
-            Article.title.ilike(f"%{q}%") |
-            Article.url.ilike(f"%{q}%")
-        )
-
-        #  Min Confidence
-        if min_conf:
-            query = query.filter(Analysis.confidence >= min_conf)
-
-        #  Nur fehlerhafte
-        if only_failed:
-            query = query.filter(Analysis.label != "likely_real")
-
-        # Kategorien
-        if categories:
-            cat_list = [c.strip() for c in categories.split(",")]
-            query = query.filter(Analysis.category.in_(cat_list))
-
-        #  Sortierung
-        sort_col = Analysis.created_at
-        if sort == "confidence":
-            sort_col = Analysis.confidence
-        elif sort == "word_count":
-            sort_col = Article.word_count
-        else:
-            sort_col = Analysis.created_at
-
-       
-
-        if order == "desc":
-            sort_col = sort_col.desc()
-        else:
-            sort_col = sort_col.asc()
-
-        rows = query.order_by(sort_col).limit(limit).all()
-
-
-        
-
-        result = []
-        for analysis, article in rows:
-            result.append({
-                "url": article.url,
-                "analyzed_at": analysis.created_at.isoformat(),
-                "source_domain": urlparse(article.url).netloc,
-                "result": {
-                    "label": analysis.label,
-                    "confidence": int(analysis.confidence),
-                    "category": analysis.category,
-                    "reasoning_summary": analysis.reasoning_summary,
-                    "red_flags": json.loads(analysis.red_flags) if analysis.red_flags else [],
-                    "title": article.title,
-                    "word_count": article.word_count,
-                    "excerpt": article.text[:280] if article.text else "",
-                 }
-            })
-
-        return result
-
-    finally:
-        db.close()
+        if stream:
+            # Große Listen zeilenweise statt als ein JSON-Dokument
+            if query.cursor:
+                decode_cursor(query.cursor, query.sort, query.order)
+            return StreamingResponse(stream_ndjson(query), media_type="application/x-ndjson")
+        page = await cached_page(query)
+    except InvalidCursor as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    headers = {"ETag": page.etag, "Cache-Control": "no-cache"}
+    if page.last_modified:
+        headers["Last-Modified"] = page.last_modified
+    if page.next_cursor:
+        headers["X-Next-Cursor"] = page.next_cursor
+
+    if not_modified(page, request.headers.get("if-none-match"), request.headers.get("if-modified-since")):
+        return Response(status_code=304, headers=headers)
+    return Response(content=page.body, media_type="application/json", headers=headers)
 
 @app.on_event("startup")
 async def startup():
+    init_db()
+    verdict_cache.invalidate()
+    cpu_pool.start()
+    fetch_client.start()
+    llm_client.start()
+    await job_queue.start()
     start_scheduler()
 
-@app.get("/topics/trending")
-def trending_topics(days: int = 3, min_conf: int = 70, limit: int = 10):
-    db = SessionLocal()
-    try:
-        rows = (
-            db.query(Analysis.category, func.count(Analysis.id).label("count"))
-            .filter(Analysis.confidence >= min_conf)
-            .group_by(Analysis.category)
-            .order_by(func.count(Analysis.id).desc())
-            .limit(limit)
-            .all()
-        )
-
-        return [
-            {"topic": category or "Unbekannt", "count": count}
-            for category, count in rows
-        ]
-    finally:
-        db.close()
-
+@app.on_event("shutdown")
+async def shutdown():
+    await job_queue.stop()
+    await fetch_client.aclose()
+    await llm_client.aclose()
+    cpu_pool.shutdown()
+
+@app.post("/rss/run")
+async def rss_run():
+    # Einen RSS-Zyklus sofort ausführen (für Lasttests), Antwort = Zyklus-Statistik;
+    # ohne RSS_MANUAL_TRIGGER_ENABLED gibt es den Endpunkt nicht
+    if not RSS_MANUAL_TRIGGER_ENABLED:
+        raise HTTPException(status_code=404, detail="Not Found")
+    if rss_cycle_running():
+        raise HTTPException(status_code=409, detail="RSS-Zyklus läuft bereits")
+    result = await run_rss_auto_analysis()
+    if result is None:
+        raise HTTPException(status_code=409, detail="RSS-Zyklus läuft bereits")
+    return result
 
+@app.get("/topics/trending")
+async def trending_topics(days: int = 3, min_conf: int = 70, limit: int = 10):
+    # Aus den Tages-Rollups (trending.py), kurz im Prozess gecacht
+    return await run_db(trending.trending, days, min_conf, limit)
@@ -0,0 +1,60 @@
+"""Komprimiert Bestands-Artikeltexte und setzt fehlende Auszüge.
+
+    cd backend && python migrate_storage.py [--vacuum]
+
+Idempotent: bereits komprimierte Zeilen (BLOB) werden übersprungen.
+--vacuum gibt den frei gewordenen Platz danach an das Dateisystem zurück.
+"""
+import os
+import sys
+
+from sqlalchemy import text
+
+from db import DB_PATH, engine
+from extractor import EXCERPT_CHARS
+from init_db import init_db
+from models import CompressedText
+
+BATCH = 500
+
+
+def migrate(bind=engine) -> int:
+    compress = CompressedText().process_bind_param
+    migrated = 0
+    last_id = 0
+    while True:
+        with bind.begin() as conn:
+            rows = conn.execute(
+                text(
+                    "SELECT id, text, excerpt FROM articles "
+                    "WHERE id > :last AND typeof(text) = 'text' ORDER BY id LIMIT :n"
+                ),
+                {"last": last_id, "n": BATCH},
+            ).all()
+            if not rows:
+                return migrated
+            conn.execute(
+                text("UPDATE articles SET text = :text, excerpt = :excerpt WHERE id = :id"),
+                [
+                    {
+                        "id": r.id,
+                        "text": compress(r.text, None),
+                        "excerpt": r.excerpt if r.excerpt is not None else r.text[:EXCERPT_CHARS],
+                    }
+                    for r in rows
+                ],
+            )
+        migrated += len(rows)
+        last_id = rows[-1].id
+
+
+if __name__ == "__main__":
+    init_db()
+    before = os.path.getsize(DB_PATH)
+    count = migrate()
+    if "--vacuum" in sys.argv:
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            conn.execute(text("PRAGMA wal_checkpoint(TRUNCATE)"))
+            conn.execute(text("VACUUM"))
+    after = os.path.getsize(DB_PATH)
+    print(f"✅ {count} Artikel komprimiert – DB {before / 1e6:.1f} MB → {after / 1e6:.1f} MB")
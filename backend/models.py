@@ -1,6 +1,44 @@
-from sqlalchemy import Column, Integer, String, Text, Float, DateTime, ForeignKey
+import zlib
+
+from sqlalchemy import BigInteger, Column, Integer, String, Text, Float, DateTime, ForeignKey, Index, LargeBinary, UniqueConstraint, text
+from sqlalchemy.orm import deferred
 from sqlalchemy.sql import func
+from sqlalchemy.types import TypeDecorator
 from db import Base
+from extractor import EXCERPT_CHARS
+from http_pool import env_int
+
+TEXT_COMPRESSION_LEVEL = env_int("TEXT_COMPRESSION_LEVEL", 6)
+
+
+def normalize_confidence(value, default: int = 0) -> int:
+    """Konfidenz als ganze Zahl 0–100; LLM-Ausgaben sind nicht immer Zahlen ("85%", "hoch")."""
+    try:
+        confidence = int(float(str(value).strip().rstrip("%"))) if value is not None else default
+    except (TypeError, ValueError, OverflowError):
+        return default
+    return max(0, min(100, confidence))
+
+
+class CompressedText(TypeDecorator):
+    """str im Modell, zlib-komprimiertes BLOB in der Datenbank.
+
+    Altbestand (unkomprimierter TEXT) wird unverändert gelesen; migrate_storage.py
+    komprimiert ihn nachträglich.
+    """
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        if value is None:
+            return None
+        return zlib.compress(value.encode("utf-8"), TEXT_COMPRESSION_LEVEL)
+
+    def process_result_value(self, value, dialect):
+        if value is None or isinstance(value, str):
+            return value
+        return zlib.decompress(value).decode("utf-8")
+
 
 
 class Article(Base):
@@ -9,10 +47,26 @@ class Article(Base):
     id = Column(Integer, primary_key=True)
     url = Column(String, unique=True, index=True, nullable=False)
     title = Column(String)
-    text = Column(Text)
+    # Volltext nur bei Bedarf laden – Listen nutzen excerpt
+    text = deferred(Column(CompressedText))
+    excerpt = Column(String)
+    source_domain = Column(String, index=True)   # beim Schreiben berechnet (ohne www.)
     word_count = Column(Integer)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
 
+    # Validatoren für Conditional GET
+    etag = Column(String)
+    last_modified = Column(String)
+    content_hash = Column(String)         # sha256 über den normalisierten Text
+    simhash = Column(BigInteger)          # 64-Bit-SimHash (vorzeichenbehaftet) für Near-Duplicates
+
+    # Jüngste Analyse – Dashboard "latest" joint hierüber statt die Historie zu scannen
+    latest_analysis_id = Column(Integer, index=True)
+
+    __table_args__ = (
+        Index("ix_articles_word_count_id", "word_count", "id"),
+    )
+
 
 class Analysis(Base):
     __tablename__ = "analysis"
@@ -24,7 +78,99 @@ class Analysis(Base):
     confidence = Column(Float)
     category = Column(String)
     reasoning_summary = Column(Text)
-    analysis_text = Column(Text)          # Das ist wichtig fürs Frontend
+    analysis_text = deferred(Column(Text))  # Das ist wichtig fürs Frontend
     red_flags = Column(Text)              # JSON als String
+    verdict_source = Column(String)       # llm | cache | satire_rule | llm_fallback | near_duplicate | local
+    prompt_budget = Column(Integer)       # Token-Budget des Artikeltexts (nur bei LLM-Aufruf)
+    prompt_compression = Column(Float)    # gesendete / extrahierte Tokens, geschätzt (1.0 = unverdichtet)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Passend zu den Sortierungen/Filtern von /dashboard (id als Tiebreaker für Keyset-Paging)
+    __table_args__ = (
+        Index("ix_analysis_article_created", "article_id", "created_at"),
+        Index("ix_analysis_created_id", "created_at", "id"),
+        Index("ix_analysis_confidence_id", "confidence", "id"),
+        Index("ix_analysis_category_created_id", "category", "created_at", "id"),
+        Index("ix_analysis_label_created_id", "label", "created_at", "id"),
+    )
+
+
+class TopicRollup(Base):
+    """Analysen pro Tag/Kategorie/Konfidenz – wird bei jedem Analysis-Insert hochgezählt."""
+    __tablename__ = "topic_rollups"
+
+    id = Column(Integer, primary_key=True)
+    day = Column(String, nullable=False)          # YYYY-MM-DD (UTC, wie Analysis.created_at)
+    category = Column(String, nullable=False)     # "" für ohne Kategorie
+    confidence = Column(Integer, nullable=False)  # ganzzahlig, damit min_conf exakt filtert
+    count = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        UniqueConstraint("day", "category", "confidence", name="uq_topic_rollups_day_cat_conf"),
+    )
+
+
+class FeedState(Base):
+    __tablename__ = "feed_state"
+
+    id = Column(Integer, primary_key=True)
+    feed_url = Column(String, unique=True, index=True, nullable=False)
+    name = Column(String)
+
+    etag = Column(String)
+    last_modified = Column(String)
+    last_seen_id = Column(String)         # GUID/Link des neuesten bereits gesehenen Eintrags
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class FailedFeedLink(Base):
+    # Feed-Links, deren Analyse fehlschlug – liegen hinter der Wassermarke und
+    # werden deshalb hier gemerkt und in den nächsten Zyklen erneut versucht
+    __tablename__ = "feed_failed_links"
+
+    id = Column(Integer, primary_key=True)
+    url = Column(String, unique=True, index=True, nullable=False)
+    feed_url = Column(String)
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(Text)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+
+class VerdictCache(Base):
+    __tablename__ = "verdict_cache"
+
+    key = Column(String, primary_key=True)    # sha256 über Text, Features, Prompt-Version, Modell
+    prompt_version = Column(String, nullable=False, index=True)
+    model = Column(String, nullable=False, index=True)
+    verdict = Column(Text, nullable=False)   # geparstes LLM-JSON als String
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
+
+
+class AnalysisJob(Base):
+    __tablename__ = "analysis_jobs"
+
+    id = Column(String, primary_key=True)   # uuid4 hex
+    url = Column(String, nullable=False, index=True)
+
+    status = Column(String, nullable=False, default="pending")   # pending | running | done | failed
+    stage = Column(String)                                         # fetch | classify | store
+    result = Column(Text)                                          # JSON als String
+    error = Column(Text)
+    attempts = Column(Integer, nullable=False, default=0)
+    not_before = Column(DateTime(timezone=True))                   # Retry-Backoff: vorher nicht claimen
 
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
+
+    __table_args__ = (
+        Index("ix_analysis_jobs_status_created", "status", "created_at"),
+        # Höchstens ein aktiver Job pro URL – erzwingt die DB, nicht ein Check-then-Insert
+        Index(
+            "uq_analysis_jobs_active_url", "url", unique=True,
+            sqlite_where=text("status IN ('pending', 'running')"),
+        ),
+    )
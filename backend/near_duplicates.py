@@ -0,0 +1,198 @@
+import hashlib
+import re
+import sys
+import threading
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from http_pool import env_bool, env_float, env_int
+
+try:
+    import numpy as np
+except ImportError:  # optional – Fallback auf reines Python
+    np = None
+
+NEAR_DUP_ENABLED = env_bool("NEAR_DUP_ENABLED", True)
+NEAR_DUP_SIMILARITY = env_float("NEAR_DUP_SIMILARITY", 0.95)   # Anteil gleicher SimHash-Bits
+NEAR_DUP_MIN_WORDS = env_int("NEAR_DUP_MIN_WORDS", 80)         # kurze Texte matchen zu leicht
+SHINGLE_SIZE = 3
+
+BITS = 64
+_MASK = (1 << BITS) - 1
+_WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+# ---------- SimHash ----------
+def _hash64(s: str) -> int:
+    return int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def _shingle_digests(words: List[str]) -> bytes:
+    return b"".join(
+        hashlib.blake2b(" ".join(words[i:i + SHINGLE_SIZE]).encode("utf-8"), digest_size=8).digest()
+        for i in range(len(words) - SHINGLE_SIZE + 1)
+    )
+
+
+def _simhash_numpy(digests: bytes) -> int:
+    # Eine Zeile pro Shingle, Spalte 0 = höchstes Bit; Mehrheit je Spalte entscheidet
+    bits = np.unpackbits(np.frombuffer(digests, dtype=np.uint8).reshape(-1, 8), axis=1)
+    ones = bits.sum(axis=0, dtype=np.int64)
+    return int.from_bytes(np.packbits(2 * ones > bits.shape[0]).tobytes(), "big")
+
+
+def simhash(text: str) -> Optional[int]:
+    """64-Bit-SimHash über Wort-3-Gramme; None bei zu wenig Text."""
+    words = _WORD_RE.findall((text or "").lower())
+    if len(words) < max(NEAR_DUP_MIN_WORDS, SHINGLE_SIZE):
+        return None
+
+    if np is not None:
+        return _simhash_numpy(_shingle_digests(words))
+
+    counts = [0] * BITS
+    for i in range(len(words) - SHINGLE_SIZE + 1):
+        h = _hash64(" ".join(words[i:i + SHINGLE_SIZE]))
+        for bit in range(BITS):
+            if h >> bit & 1:
+                counts[bit] += 1
+            else:
+                counts[bit] -= 1
+
+    value = 0
+    for bit, c in enumerate(counts):
+        if c > 0:
+            value |= 1 << bit
+    return value
+
+
+def hamming(a: int, b: int) -> int:
+    return bin((a ^ b) & _MASK).count("1")
+
+
+def similarity(a: int, b: int) -> float:
+    return 1 - hamming(a, b) / BITS
+
+
+def to_signed(value: int) -> int:
+    # SQLite-INTEGER ist vorzeichenbehaftet
+    return value - (1 << BITS) if value >= 1 << (BITS - 1) else value
+
+
+def to_unsigned(value: int) -> int:
+    return value & _MASK
+
+
+# ---------- LSH-Index ----------
+class SimHashIndex:
+    """LSH über SimHash-Bänder.
+
+    Bei höchstens k abweichenden Bits stimmt nach dem Schubfachprinzip
+    mindestens eines von k+1 Bändern exakt überein – Kandidaten kommen also
+    nur aus gleichen Bändern und werden danach per Hamming-Distanz geprüft.
+    """
+
+    def __init__(self, min_similarity: float = NEAR_DUP_SIMILARITY):
+        self.max_distance = max(0, int((1 - min_similarity) * BITS))
+        n_bands = self.max_distance + 1
+        width = BITS // n_bands
+        self._bands: List[Tuple[int, int]] = [
+            (i * width, width if i < n_bands - 1 else BITS - i * width) for i in range(n_bands)
+        ]
+        self._buckets: List[Dict[int, Set[int]]] = [defaultdict(set) for _ in self._bands]
+        self._hashes: Dict[int, int] = {}
+        self._lock = threading.Lock()
+        self.loaded = False
+
+        self.lookups = 0
+        self.hits = 0
+
+    def _band_values(self, value: int) -> List[int]:
+        return [(value >> shift) & ((1 << width) - 1) for shift, width in self._bands]
+
+    def add(self, article_id: int, value: Optional[int]):
+        if value is None:
+            return
+        with self._lock:
+            old = self._hashes.get(article_id)
+            if old is not None:
+                for bucket, band in zip(self._buckets, self._band_values(old)):
+                    bucket[band].discard(article_id)
+            self._hashes[article_id] = value
+            for bucket, band in zip(self._buckets, self._band_values(value)):
+                bucket[band].add(article_id)
+
+    def load(self, rows: Iterable[Tuple[int, int]]):
+        for article_id, value in rows:
+            self.add(article_id, to_unsigned(value))
+        self.loaded = True
+
+    def candidates(self, value: int, exclude_id: Optional[int] = None) -> List[Tuple[int, int]]:
+        """(article_id, Distanz) aller Einträge innerhalb max_distance, nächste zuerst."""
+        with self._lock:
+            ids: Set[int] = set()
+            for bucket, band in zip(self._buckets, self._band_values(value)):
+                ids |= bucket.get(band, set())
+            found = [
+                (article_id, hamming(value, self._hashes[article_id]))
+                for article_id in ids
+                if article_id != exclude_id
+            ]
+        return sorted((c for c in found if c[1] <= self.max_distance), key=lambda c: (c[1], -c[0]))
+
+    def stats(self) -> dict:
+        return {
+            "enabled": NEAR_DUP_ENABLED,
+            "min_similarity": NEAR_DUP_SIMILARITY,
+            "max_distance": self.max_distance,
+            "bands": len(self._bands),
+            "entries": len(self._hashes),
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+
+index = SimHashIndex()
+
+
+def backfill(db, batch_size: int = 500) -> int:
+    """SimHash für Bestandsartikel ohne Wert nachrechnen."""
+    from models import Article
+
+    count = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Article.id, Article.text)
+            .filter(Article.id > last_id, Article.simhash.is_(None))
+            .order_by(Article.id)
+            .limit(batch_size)
+            .all()
+        )
+        if not batch:
+            break
+        for article_id, text in batch:
+            value = simhash(text)
+            if value is not None:
+                db.query(Article).filter(Article.id == article_id).update(
+                    {Article.simhash: to_signed(value)}, synchronize_session=False
+                )
+                count += 1
+        db.commit()
+        last_id = batch[-1].id
+    index.loaded = False   # beim nächsten Lookup neu laden
+    return count
+
+
+if __name__ == "__main__":
+    # python near_duplicates.py --backfill
+    from db import SessionLocal
+
+    if "--backfill" not in sys.argv:
+        print("Aufruf: python near_duplicates.py --backfill")
+        sys.exit(1)
+    db = SessionLocal()
+    try:
+        print(f"✅ SimHash für {backfill(db)} Artikel berechnet")
+    finally:
+        db.close()
@@ -0,0 +1,285 @@
+import asyncio
+import logging
+import time
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from analysis_service import PreparedArticle, classify_article, known_validators, prepare_article, store_results
+from db import run_db
+from http_pool import env_float, env_int
+
+log = logging.getLogger(__name__)
+
+PIPELINE_FETCH_WORKERS = env_int("PIPELINE_FETCH_WORKERS", 8)
+PIPELINE_LLM_WORKERS = env_int("PIPELINE_LLM_WORKERS", 2)
+PIPELINE_QUEUE_SIZE = env_int("PIPELINE_QUEUE_SIZE", 50)
+PIPELINE_DOMAIN_CONCURRENCY = env_int("PIPELINE_DOMAIN_CONCURRENCY", 2)
+PIPELINE_DOMAIN_DELAY = env_float("PIPELINE_DOMAIN_DELAY", 0.5)  # Sekunden zwischen Requests pro Domain
+PIPELINE_WRITE_BATCH = env_int("PIPELINE_WRITE_BATCH", 25)       # Ergebnisse pro DB-Transaktion
+BATCH_MAX_URLS = env_int("BATCH_MAX_URLS", 1000)
+
+_DONE = object()
+
+# Wird pro URL mit {"url", "status": "ok"|"error", ...} aufgerufen
+ResultCallback = Callable[[Dict[str, Any]], Awaitable[None]]
+
+
+async def _no_result(item: Dict[str, Any]):
+    pass
+
+
+class DomainLimiter:
+    """Höflichkeitslimit pro Domain: max. parallele Requests + Mindestabstand."""
+
+    def __init__(self, concurrency: int, min_interval: float):
+        self.concurrency = max(1, concurrency)
+        self.min_interval = max(0.0, min_interval)
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+        self._next_start: Dict[str, float] = {}
+
+    @asynccontextmanager
+    async def limit(self, url: str):
+        domain = urlparse(url).netloc.lower()
+        slot = self._slots.setdefault(domain, asyncio.Semaphore(self.concurrency))
+
+        async with slot:
+            if self.min_interval:
+                # Startzeitpunkt reservieren, bevor geschlafen wird
+                now = time.monotonic()
+                start = max(now, self._next_start.get(domain, 0.0))
+                self._next_start[domain] = start + self.min_interval
+                if start > now:
+                    await asyncio.sleep(start - now)
+            yield
+
+
+@dataclass
+class PipelineStats:
+    queued: int = 0
+    duplicates: int = 0
+    fetched: int = 0
+    not_modified: int = 0
+    classified: int = 0
+    stored: int = 0
+    errors: int = 0
+    near_duplicate_hits: int = 0    # Urteil von Near-Duplicate übernommen = eingesparter LLM-Aufruf
+    verdict_sources: Dict[str, int] = field(default_factory=dict)
+    stage_seconds: Dict[str, float] = field(default_factory=lambda: {"fetch": 0.0, "llm": 0.0, "store": 0.0})
+    started_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def as_dict(self) -> Dict[str, Any]:
+        d = dict(self.__dict__)
+        d["stage_seconds"] = {k: round(v, 3) for k, v in self.stage_seconds.items()}
+        if self.finished_at:
+            d["duration_seconds"] = round(self.finished_at - self.started_at, 3)
+        return d
+
+
+class AnalysisPipeline:
+    """Nebenläufige Analyse-Pipeline mit begrenzten Stufen.
+
+    URLs → (dedupliziert) → Fetch/Extract-Worker → LLM-Worker → DB-Writer.
+    Jede Stufe hat ihr eigenes Worker-Limit; die Queues zwischen den Stufen
+    sind begrenzt, damit eine langsame Stufe die vorherigen ausbremst
+    (Backpressure) statt Speicher zu fressen. Der Writer schreibt bis zu
+    write_batch Ergebnisse pro Transaktion.
+    """
+
+    def __init__(
+        self,
+        fetch_workers: int = PIPELINE_FETCH_WORKERS,
+        llm_workers: int = PIPELINE_LLM_WORKERS,
+        queue_size: int = PIPELINE_QUEUE_SIZE,
+        domain_concurrency: int = PIPELINE_DOMAIN_CONCURRENCY,
+        domain_delay: float = PIPELINE_DOMAIN_DELAY,
+        write_batch: int = PIPELINE_WRITE_BATCH,
+    ):
+        self.fetch_workers = max(1, fetch_workers)
+        self.llm_workers = max(1, llm_workers)
+        self.queue_size = max(1, queue_size)
+        self.domains = DomainLimiter(domain_concurrency, domain_delay)
+        self.write_batch = max(1, write_batch)
+        self.stats = PipelineStats()
+        self._on_result: ResultCallback = _no_result
+
+    async def run(self, urls: AsyncIterator[str], on_result: Optional[ResultCallback] = None) -> PipelineStats:
+        self.stats = PipelineStats()
+        self._on_result = on_result or _no_result
+        url_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        llm_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+        write_q: asyncio.Queue = asyncio.Queue(self.queue_size)
+
+        fetchers = [asyncio.create_task(self._fetch_worker(url_q, llm_q, write_q)) for _ in range(self.fetch_workers)]
+        llms = [asyncio.create_task(self._llm_worker(llm_q, write_q)) for _ in range(self.llm_workers)]
+        writer = asyncio.create_task(self._writer(write_q))
+
+        try:
+            await self._produce(urls, url_q)
+
+            # Stufen nacheinander herunterfahren
+            for _ in fetchers:
+                await url_q.put(_DONE)
+            await asyncio.gather(*fetchers)
+            for _ in llms:
+                await llm_q.put(_DONE)
+            await asyncio.gather(*llms)
+            await write_q.put(_DONE)
+            await writer
+        except BaseException:
+            for task in (*fetchers, *llms, writer):
+                task.cancel()
+            raise
+        finally:
+            self.stats.finished_at = time.time()
+
+        return self.stats
+
+    # ---------- Stufen ----------
+    async def _produce(self, urls: AsyncIterator[str], url_q: asyncio.Queue):
+        seen = set()
+        async for url in urls:
+            if url in seen:
+                self.stats.duplicates += 1
+                continue
+            seen.add(url)
+            self.stats.queued += 1
+            await url_q.put(url)
+
+    async def _fetch_worker(self, url_q: asyncio.Queue, llm_q: asyncio.Queue, write_q: asyncio.Queue):
+        while True:
+            url = await url_q.get()
+            if url is _DONE:
+                return
+
+            started = time.perf_counter()
+            try:
+                etag, last_modified = await run_db(known_validators, url)
+                async with self.domains.limit(url):
+                    prepared = await prepare_article(url, etag, last_modified)
+            except Exception as e:
+                self.stats.errors += 1
+                log.error(f"FETCH FEHLGESCHLAGEN FÜR {url}: {e}")
+                await self._report_error(url, "fetch", e)
+                continue
+            finally:
+                self.stats.stage_seconds["fetch"] += time.perf_counter() - started
+
+            self.stats.fetched += 1
+            if prepared.not_modified:
+                # Unverändert: kein LLM nötig, nur Validatoren auffrischen
+                self.stats.not_modified += 1
+                await write_q.put((prepared, None))
+            else:
+                await llm_q.put(prepared)
+
+    async def _llm_worker(self, llm_q: asyncio.Queue, write_q: asyncio.Queue):
+        while True:
+            prepared = await llm_q.get()
+            if prepared is _DONE:
+                return
+
+            started = time.perf_counter()
+            try:
+                result = await classify_article(prepared)
+            except Exception as e:
+                self.stats.errors += 1
+                log.error(f"ANALYSE FEHLGESCHLAGEN FÜR {prepared.url}: {e}")
+                await self._report_error(prepared.url, "llm", e)
+                continue
+            finally:
+                self.stats.stage_seconds["llm"] += time.perf_counter() - started
+
+            self.stats.classified += 1
+            source = result.get("verdict_source") or "unknown"
+            self.stats.verdict_sources[source] = self.stats.verdict_sources.get(source, 0) + 1
+            if source == "near_duplicate":
+                self.stats.near_duplicate_hits += 1
+            await write_q.put((prepared, result))
+
+    async def _writer(self, write_q: asyncio.Queue):
+        done = False
+        while not done:
+            item = await write_q.get()
+            if item is _DONE:
+                return
+
+            # Was bereits wartet, in dieselbe Transaktion packen
+            batch = [item]
+            while len(batch) < self.write_batch and not write_q.empty():
+                item = write_q.get_nowait()
+                if item is _DONE:
+                    done = True
+                    break
+                batch.append(item)
+
+            await self._write_batch(batch)
+
+    async def _write_batch(self, batch: List[tuple]):
+        started = time.perf_counter()
+        try:
+            results = await run_db(store_results, batch)
+        except Exception as e:
+            self.stats.errors += len(batch)
+            log.error(f"SPEICHERN FEHLGESCHLAGEN ({len(batch)} Artikel): {e}")
+            for prepared, _ in batch:
+                await self._report_error(prepared.url, "store", e)
+            return
+        finally:
+            self.stats.stage_seconds["store"] += time.perf_counter() - started
+
+        for (prepared, _), result in zip(batch, results):
+            if isinstance(result, Exception):
+                # Nur diese Zeile ist gescheitert, der Rest des Batches ist gespeichert
+                self.stats.errors += 1
+                log.error(f"SPEICHERN FEHLGESCHLAGEN ({prepared.url}): {result}")
+                await self._report_error(prepared.url, "store", result)
+                continue
+            self.stats.stored += 1
+            await self._on_result({"url": prepared.url, "status": "ok", "result": result})
+
+    async def _report_error(self, url: str, stage: str, error: Exception):
+        await self._on_result({
+            "url": url,
+            "status": "error",
+            "stage": stage,
+            "error": f"{type(error).__name__}: {error}",
+        })
+
+
+async def _iterate(urls: Iterable[str]) -> AsyncIterator[str]:
+    for url in urls:
+        yield url
+
+
+async def analyze_batch_stream(urls: Iterable[str]) -> AsyncIterator[dict]:
+    """Analysiert viele URLs über die Pipeline und liefert Ergebnisse, sobald sie fertig sind.
+
+    Events: {"type": "result", "url", "status", ...} pro URL, zum Schluss
+    {"type": "summary", "stats": ...}.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+
+    async def on_result(item: Dict[str, Any]):
+        await events.put({"type": "result", **item})
+
+    async def run():
+        pipeline = AnalysisPipeline()
+        try:
+            stats = await pipeline.run(_iterate(urls), on_result=on_result)
+            await events.put({"type": "summary", "stats": stats.as_dict()})
+        except Exception as e:
+            await events.put({"type": "error", "detail": f"{type(e).__name__}: {e}"})
+        finally:
+            await events.put(None)
+
+    task = asyncio.create_task(run())
+    try:
+        while (event := await events.get()) is not None:
+            yield event
+    finally:
+        # Client weg → Batch abbrechen
+        if not task.done():
+            task.cancel()
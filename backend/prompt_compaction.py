@@ -0,0 +1,135 @@
+import math
+import re
+from typing import List, NamedTuple, Tuple
+
+from heuristics import MATCHER
+from http_pool import env_float, env_int
+
+# Token-Budget für den Artikeltext im Prompt (0 = aus, dann wie früher die ersten 8000 Zeichen)
+PROMPT_TOKEN_BUDGET = env_int("PROMPT_TOKEN_BUDGET", 1200)
+# Grobe Schätzung ohne Tokenizer – Llama-Tokenizer liegen bei deutschem Text um ~4 Zeichen/Token
+PROMPT_CHARS_PER_TOKEN = env_float("PROMPT_CHARS_PER_TOKEN", 4.0)
+PROMPT_MAX_CHARS = 8000
+LEAD_SENTENCES = 3
+
+_SENTENCE_RE = re.compile(r"[^.!?…\n]+(?:[.!?…]+[\"'“”»«]?|\n|$)")
+_NORM_RE = re.compile(r"\W+", re.UNICODE)
+_QUOTE_RE = re.compile(r"[„“”\"«»‚‘]")
+_NUMBER_RE = re.compile(r"\d")
+_CLAIM_RE = re.compile(
+    r"\b(laut|zufolge|sagte|sagt|erklärte|erklärt|behauptet|behauptete|berichtet|bestätigt|"
+    r"studie|umfrage|statistik|beweis|belegt|prozent|millionen|milliarden)\b",
+    re.IGNORECASE,
+)
+# Seitenrahmen, der trotz Extraktion im Text landet – nur ganze Zeilen, damit
+# "Strafanzeige", "Werbungskosten" oder ein Satz über Datenschutz erhalten bleiben
+_BOILERPLATE_RE = re.compile(
+    r"^[\s\-–—•|>]*(?:"
+    r"anzeige|werbung|advertorial|"
+    r"(?:cookie|datenschutz)(?:-?einstellungen|erklärung|hinweise?)?|"
+    r"newsletter(?: abonnieren| bestellen)?|jetzt (?:abonnieren|registrieren)|"
+    r"bitte aktivieren sie javascript.*|javascript (?:ist )?deaktiviert.*|"
+    r"lesen sie auch\b.*|mehr zum thema\b.*|weiterlesen|zum artikel|"
+    r"teilen auf\b.*|folgen sie uns\b.*|"
+    r"(?:©|\(c\)|copyright\b).*|alle rechte vorbehalten.*"
+    r")[\s.:!…»›>|\-–—]*$",
+    re.IGNORECASE,
+)
+_BOILERPLATE_MAX_WORDS = 25
+
+
+class CompactedText(NamedTuple):
+    text: str
+    budget: int              # Token-Budget (0 = keine Verdichtung)
+    original_tokens: int     # geschätzt
+    tokens: int              # geschätzt, nach Verdichtung
+    compression: float       # tokens / original_tokens (1.0 = unverändert)
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / PROMPT_CHARS_PER_TOKEN) if text else 0
+
+
+def split_sentences(text: str) -> List[str]:
+    return [s.strip() for s in _SENTENCE_RE.findall(text or "") if s.strip()]
+
+
+def _is_boilerplate(line: str) -> bool:
+    return len(line.split()) <= _BOILERPLATE_MAX_WORDS and _BOILERPLATE_RE.match(line) is not None
+
+
+def score_sentence(sentence: str, position: int) -> float:
+    """Wie informativ ist ein Satz für das Urteil? Lead, Lexikon-Treffer, Zitate, Behauptungen."""
+    score = 0.0
+    if position < LEAD_SENTENCES:
+        score += 4.0 if position == 0 else 3.0
+    score += 2.0 * sum(MATCHER.count(sentence.lower()).values())
+    if _QUOTE_RE.search(sentence):
+        score += 1.5
+    if _CLAIM_RE.search(sentence):
+        score += 1.0
+    if _NUMBER_RE.search(sentence):
+        score += 0.5
+    if len(sentence.split()) < 4:
+        score -= 1.0
+    return score
+
+
+def _candidates(text: str) -> List[Tuple[int, str]]:
+    """Sätze ohne Boilerplate-Zeilen und ohne Wiederholungen, mit Position."""
+    seen = set()
+    result = []
+    for line in text.splitlines():
+        if _is_boilerplate(line):
+            continue
+        for sentence in split_sentences(line):
+            key = _NORM_RE.sub(" ", sentence.lower()).strip()
+            if not key or key in seen:
+                continue
+            seen.add(key)
+            result.append((len(result), sentence))
+    return result
+
+
+def compact(text: str, budget: int = PROMPT_TOKEN_BUDGET) -> CompactedText:
+    """Verdichtet den Artikeltext auf höchstens `budget` (geschätzte) Tokens.
+
+    Passt der Text ins Budget, bleibt er unverändert. Sonst werden
+    Boilerplate-Zeilen und Wiederholungen entfernt und – falls das nicht
+    reicht – Sätze nach score_sentence gewählt und in Originalreihenfolge
+    ausgegeben.
+    """
+    text = text or ""
+    original_tokens = estimate_tokens(text)
+    if budget <= 0:
+        return _result(text[:PROMPT_MAX_CHARS], 0, original_tokens)
+    if original_tokens <= budget:
+        return _result(text, budget, original_tokens)
+
+    sentences = _candidates(text)
+    cleaned = " ".join(s for _, s in sentences)
+    if estimate_tokens(cleaned) <= budget:
+        return _result(cleaned, budget, original_tokens)
+
+    ranked = sorted(sentences, key=lambda s: (-score_sentence(s[1], s[0]), s[0]))
+    chosen = []
+    used = 0
+    for position, sentence in ranked:
+        cost = estimate_tokens(sentence) + 1   # +1 für das Leerzeichen
+        if used + cost > budget:
+            continue
+        chosen.append((position, sentence))
+        used += cost
+
+    if not chosen and ranked:
+        # Ein einzelner Satz sprengt das Budget – dann eben abgeschnitten
+        chosen = [(ranked[0][0], ranked[0][1][: int(budget * PROMPT_CHARS_PER_TOKEN)])]
+
+    out = " ".join(s for _, s in sorted(chosen))
+    return _result(out, budget, original_tokens)
+
+
+def _result(out: str, budget: int, original_tokens: int) -> CompactedText:
+    tokens = estimate_tokens(out)
+    compression = round(tokens / original_tokens, 3) if original_tokens else 1.0
+    return CompactedText(out, budget, original_tokens, tokens, compression)
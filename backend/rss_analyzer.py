@@ -4,9 +4,20 @@ import feedparser
 from urllib.parse import urlparse
 import logging
 log = logging.getLogger(__name__)
-from db import SessionLocal
-from analysis_service import analyze_and_store
+from sqlalchemy import exists
+from db import run_db
+from http_pool import env_int
+from models import Article, FailedFeedLink, FeedState
+from pipeline import AnalysisPipeline
 from rss_sources import RSS_SOURCES
+from scraper import fetch_client
+
+RSS_FEED_CONCURRENCY = env_int("RSS_FEED_CONCURRENCY", len(RSS_SOURCES))
+RSS_LINK_MAX_ATTEMPTS = env_int("RSS_LINK_MAX_ATTEMPTS", 3)   # danach wird ein Link aufgegeben
+
+# Verhindert, dass sich zwei Zyklen überlappen, wenn einer länger dauert als das Intervall
+_cycle_lock = asyncio.Lock()
+last_cycle: dict = {}
 
 
 def is_valid_url(url: str) -> bool:
@@ -16,34 +27,222 @@ def is_valid_url(url: str) -> bool:
     return p.scheme in ("http", "https") and bool(p.netloc)
 
 
-async def run_rss_auto_analysis():
-    print("RSS AUTO ANALYSIS START")
+def entry_id(entry) -> str | None:
+    return getattr(entry, "id", None) or getattr(entry, "link", None)
+
+
+# ---------- Feed-Zustand ----------
+def load_feed_states(db) -> dict:
+    return {
+        s.feed_url: {
+            "etag": s.etag,
+            "last_modified": s.last_modified,
+            "last_seen_id": s.last_seen_id,
+        }
+        for s in db.query(FeedState).all()
+    }
+
+
+def save_feed_states(db, states: dict, names: dict):
+    existing = {
+        s.feed_url: s
+        for s in db.query(FeedState).filter(FeedState.feed_url.in_(list(states))).all()
+    }
+    for feed_url, state in states.items():
+        row = existing.get(feed_url)
+        if row is None:
+            row = FeedState(feed_url=feed_url)
+            db.add(row)
+        row.name = names.get(feed_url)
+        row.etag = state.get("etag")
+        row.last_modified = state.get("last_modified")
+        row.last_seen_id = state.get("last_seen_id")
+    db.commit()
+
+
+def retry_links(db) -> list[str]:
+    return [
+        url
+        for (url,) in db.query(FailedFeedLink.url)
+        .filter(FailedFeedLink.attempts < RSS_LINK_MAX_ATTEMPTS)
+        .order_by(FailedFeedLink.id)
+        .all()
+    ]
+
+
+def record_link_results(db, failed: dict, succeeded: set, link_feeds: dict) -> int:
+    """Fehlgeschlagene Links mit Versuchszähler merken, erledigte austragen.
 
-    db = SessionLocal()
+    Ausgetragen werden erfolgreiche Links, inzwischen (z. B. über einen
+    anderen Feed) gespeicherte und solche, die RSS_LINK_MAX_ATTEMPTS erreicht
+    haben – sonst wächst die Tabelle unbegrenzt. Liefert die Zahl der
+    aufgegebenen Links.
+    """
+    if succeeded:
+        db.query(FailedFeedLink).filter(FailedFeedLink.url.in_(list(succeeded))).delete(synchronize_session=False)
+    existing = {
+        row.url: row
+        for row in db.query(FailedFeedLink).filter(FailedFeedLink.url.in_(list(failed))).all()
+    }
+    for url, error in failed.items():
+        row = existing.get(url)
+        if row is None:
+            row = FailedFeedLink(url=url, attempts=0)
+            db.add(row)
+        row.feed_url = link_feeds.get(url) or row.feed_url
+        row.attempts += 1
+        row.last_error = error[:500]
+    db.flush()
 
-    for name, feed_url in RSS_SOURCES.items():
-        print(f"RSS FEED: {name}")
+    given_up = db.query(FailedFeedLink).filter(FailedFeedLink.attempts >= RSS_LINK_MAX_ATTEMPTS)
+    for row in given_up:
+        log.warning(f"RSS-Link nach {row.attempts} Versuchen aufgegeben: {row.url} ({row.last_error})")
+    dropped = given_up.delete(synchronize_session=False)
+    db.query(FailedFeedLink).filter(
+        exists().where(Article.url == FailedFeedLink.url)
+    ).delete(synchronize_session=False)
+    db.commit()
+    return dropped
 
-        try:
-            feed = feedparser.parse(feed_url)
-        except Exception as e:
-            log.error(f"RSS FEED PARSE FEHLER ({name}): {e}")
+
+def filter_new_links(db, links: list[str]) -> list[str]:
+    # Ein IN-Query pro Feed statt einer Abfrage pro Eintrag
+    if not links:
+        return []
+    known = {
+        url
+        for (url,) in db.query(Article.url).filter(Article.url.in_(links)).all()
+    }
+    return [link for link in links if link not in known]
+
+
+# ---------- Feeds laden ----------
+async def fetch_feed(name: str, feed_url: str, state: dict):
+    headers = {}
+    if state.get("etag"):
+        headers["If-None-Match"] = state["etag"]
+    if state.get("last_modified"):
+        headers["If-Modified-Since"] = state["last_modified"]
+
+    r = await fetch_client.get(feed_url, headers=headers)
+    if r.status_code == 304:
+        return None, r
+
+    r.raise_for_status()
+    # feedparser ist synchron → nicht auf dem Event-Loop parsen
+    return await asyncio.to_thread(feedparser.parse, r.content), r
+
+
+def new_entry_links(feed, last_seen_id: str | None) -> list[str]:
+    links = []
+    for entry in feed.entries:
+        # Feeds liefern die neuesten Einträge zuerst – ab der Wassermarke ist alles bekannt
+        if last_seen_id and entry_id(entry) == last_seen_id:
+            break
+
+        link = getattr(entry, "link", None)
+        if not is_valid_url(link):
+            log.warning(f"Ungültige URL übersprungen: {link}")
             continue
+        links.append(link)
+    return links
 
-        for entry in feed.entries:
-            link = getattr(entry, "link", None)
 
-            if not is_valid_url(link):
-                log.warning(f"Ungültige URL übersprungen: {link}")
-                continue
+async def feed_links(states: dict, new_states: dict, counters: dict, link_feeds: dict):
+    """Liefert zuerst früher fehlgeschlagene Links, dann die neuen Links jedes Feeds, sobald er geladen ist."""
+    limit = asyncio.Semaphore(max(1, RSS_FEED_CONCURRENCY))
 
-            try:
-               analyze_and_store(link)
+    retries = await run_db(retry_links)
+    retries = await run_db(filter_new_links, retries)
+    counters["retried_links"] += len(retries)
+    for link in retries:
+        yield link
 
+    async def load(name: str, feed_url: str):
+        async with limit:
+            log.info(f"RSS FEED: {name}")
+            try:
+                feed, response = await fetch_feed(name, feed_url, states.get(feed_url, {}))
+                return feed_url, feed, response
             except Exception as e:
-                log.error(f"ANALYSE FEHLGESCHLAGEN FÜR {link}: {e}")
+                log.error(f"RSS FEED PARSE FEHLER ({name}): {e}")
+                return feed_url, None, None
+
+    tasks = [asyncio.create_task(load(name, url)) for name, url in RSS_SOURCES.items()]
+    try:
+        for next_feed in asyncio.as_completed(tasks):
+            feed_url, feed, response = await next_feed
+            if response is None:
                 continue
 
-    db.close()
-    print("RSS AUTO ANALYSIS END")
+            state = dict(states.get(feed_url, {}))
+            state["etag"] = response.headers.get("ETag") or state.get("etag")
+            state["last_modified"] = response.headers.get("Last-Modified") or state.get("last_modified")
+
+            if feed is None:
+                counters["feeds_not_modified"] += 1
+                new_states[feed_url] = state
+                continue
+
+            counters["feeds_changed"] += 1
+            counters["entries"] += len(feed.entries)
+
+            links = new_entry_links(feed, state.get("last_seen_id"))
+            links = await run_db(filter_new_links, links)
+            counters["new_links"] += len(links)
+
+            if feed.entries:
+                state["last_seen_id"] = entry_id(feed.entries[0]) or state.get("last_seen_id")
+            new_states[feed_url] = state
+
+            for link in links:
+                link_feeds[link] = feed_url
+                yield link
+    finally:
+        for task in tasks:
+            task.cancel()
+
+
+def cycle_running() -> bool:
+    return _cycle_lock.locked()
+
+
+async def run_rss_auto_analysis() -> dict | None:
+    """Ein RSS-Zyklus; liefert dessen Statistik oder None, wenn noch einer läuft."""
+    if _cycle_lock.locked():
+        log.warning("RSS AUTO ANALYSIS läuft noch – Zyklus übersprungen")
+        return None
+
+    async with _cycle_lock:
+        log.info("RSS AUTO ANALYSIS START")
+
+        states = await run_db(load_feed_states)
+        new_states: dict = {}
+        link_feeds: dict = {}
+        counters = {"feeds_not_modified": 0, "feeds_changed": 0, "entries": 0, "new_links": 0, "retried_links": 0}
+        failed: dict = {}
+        succeeded: set = set()
+
+        async def on_result(item: dict):
+            if item["status"] == "ok":
+                succeeded.add(item["url"])
+            else:
+                failed[item["url"]] = f"{item['stage']}: {item['error']}"
+
+        pipeline = AnalysisPipeline()
+        stats = await pipeline.run(feed_links(states, new_states, counters, link_feeds), on_result=on_result)
+
+        # Feed-Zustand immer fortschreiben – fehlgeschlagene Links stehen in
+        # feed_failed_links und werden dort wiederholt, statt die Wassermarke
+        # (und damit Conditional GET) aller Feeds zu blockieren
+        if new_states:
+            names = {url: name for name, url in RSS_SOURCES.items()}
+            await run_db(save_feed_states, new_states, names)
+        counters["dropped_links"] = await run_db(record_link_results, failed, succeeded, link_feeds)
+        counters["failed_links"] = len(failed)
 
+        last_cycle.clear()
+        last_cycle.update(stats.as_dict())
+        last_cycle.update(counters)
+        log.info(f"RSS AUTO ANALYSIS END: {last_cycle}")
+        return dict(last_cycle)
@@ -1,10 +1,23 @@
 from apscheduler.schedulers.background import BackgroundScheduler
 import asyncio
+import logging
+from http_pool import env_bool, env_int
 from rss_analyzer import run_rss_auto_analysis
 
+log = logging.getLogger(__name__)
+
+RSS_SCHEDULER_ENABLED = env_bool("RSS_SCHEDULER_ENABLED", True)
+RSS_INTERVAL_MINUTES = env_int("RSS_INTERVAL_MINUTES", 2)
+# POST /rss/run startet einen Zyklus von außen, ohne Authentifizierung – nur für Lasttests einschalten
+RSS_MANUAL_TRIGGER_ENABLED = env_bool("RSS_MANUAL_TRIGGER_ENABLED", False)
+
 scheduler = BackgroundScheduler()
 
 def start_scheduler():
+    if not RSS_SCHEDULER_ENABLED:
+        log.info("RSS-Scheduler deaktiviert")
+        return
+
     loop = asyncio.get_event_loop()
 
     scheduler.add_job(
@@ -12,10 +25,10 @@ def start_scheduler():
             run_rss_auto_analysis(), loop
         ),
         trigger="interval",
-        minutes=2,  # zum Testen
+        minutes=RSS_INTERVAL_MINUTES,
         id="rss_job",
         replace_existing=True,
     )
 
     scheduler.start()
-    print("RSS SCHEDULER STARTED")
+    log.info("RSS-Scheduler gestartet (alle %d min)", RSS_INTERVAL_MINUTES)
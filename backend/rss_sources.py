@@ -1,7 +1,14 @@
+import json
+import os
+
 RSS_SOURCES = {
     "tagesschau": "https://www.tagesschau.de/xml/rss2",
     "zeit": "https://newsfeed.zeit.de/index",
     "spiegel": "https://www.spiegel.de/schlagzeilen/index.rss",
     "sueddeutsche": "https://rss.sueddeutsche.de/rss/Topthemen",
     "faz": "https://www.faz.net/rss/aktuell/"
-}
\ No newline at end of file
+}
+
+# Überschreiben per JSON-Objekt {"name": "feed_url"}, z. B. für Lasttests gegen lokale Feeds
+if os.getenv("RSS_SOURCES_JSON"):
+    RSS_SOURCES = json.loads(os.environ["RSS_SOURCES_JSON"])
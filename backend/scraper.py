@@ -1,10 +1,11 @@
 import asyncio
-import re
 from dataclasses import dataclass
+from typing import Optional
 
 import httpx
-from bs4 import BeautifulSoup
-from readability import Document
+
+from extractor import extract_page
+from http_pool import PooledClient, env_bool, env_float, env_int
 
 
 @dataclass
@@ -15,6 +16,19 @@ class ScrapedPage:
     html: str
 
 
+@dataclass
+class FetchResult:
+    url: str
+    status: int
+    html: str
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+    @property
+    def not_modified(self) -> bool:
+        return self.status == 304
+
+
 DEFAULT_HEADERS = {
     "User-Agent": (
         "Mozilla/5.0 (X11; Linux x86_64) "
@@ -23,109 +37,76 @@ DEFAULT_HEADERS = {
     ),
     "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
     "Accept-Language": "de-DE,de;q=0.9,en;q=0.8",
-    "Connection": "close",
 }
 
+# ---------- Fetch-Client (ein Pool pro Prozess) ----------
+FETCH_TIMEOUT = httpx.Timeout(
+    env_float("FETCH_TIMEOUT", 20.0),
+    connect=env_float("FETCH_CONNECT_TIMEOUT", 5.0),
+)
+FETCH_LIMITS = httpx.Limits(
+    max_connections=env_int("FETCH_MAX_CONNECTIONS", 100),
+    max_keepalive_connections=env_int("FETCH_MAX_KEEPALIVE", 20),
+    keepalive_expiry=env_float("FETCH_KEEPALIVE_EXPIRY", 30.0),
+)
+
+fetch_client = PooledClient(
+    "fetch",
+    timeout=FETCH_TIMEOUT,
+    limits=FETCH_LIMITS,
+    headers=DEFAULT_HEADERS,
+    http2=env_bool("FETCH_HTTP2"),
+    follow_redirects=True,
+    max_per_host=env_int("FETCH_MAX_PER_HOST", 4),
+)
+
+
+async def fetch_page(
+    url: str,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> FetchResult:
+    """Lädt eine Seite; mit Validatoren als Conditional GET (304 → html leer)."""
+    if not url.startswith(("http://", "https://")):
+        raise ValueError(f"Ungültige URL: {url}")
 
-def _clean_text(text: str) -> str:
-    if not text:
-        return ""
-    text = text.replace("\r", "\n")
-    text = re.sub(r"[ \t]+", " ", text)
-    text = re.sub(r"\n\s*\n\s*\n+", "\n\n", text)
-    return text.strip()
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+
+    r = await fetch_client.get(url, headers=headers)
+    if r.status_code == 304:
+        return FetchResult(
+            url=url,
+            status=304,
+            html="",
+            etag=r.headers.get("ETag") or etag,
+            last_modified=r.headers.get("Last-Modified") or last_modified,
+        )
+
+    r.raise_for_status()
+    return FetchResult(
+        url=url,
+        status=r.status_code,
+        html=r.text,
+        etag=r.headers.get("ETag"),
+        last_modified=r.headers.get("Last-Modified"),
+    )
 
 
 async def fetch_html(url: str) -> str:
-    if not url.startswith(("http://", "https://")):
-        raise ValueError(f"Ungültige URL: {url}")
-    headers = {
-        "User-Agent": (
-            "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-            "AppleWebKit/537.36 (KHTML, like Gecko) "
-            "Chrome/120.0 Safari/537.36"
-        ),
-        "Accept-Language": "de-DE,de;q=0.9",
-    }
-
-    async with httpx.AsyncClient(
-        headers=headers,
-        follow_redirects=True,
-        timeout=20
-    ) as client:
-        r = await client.get(url)
-        r.raise_for_status()
-        return r.text
+    return (await fetch_page(url)).html
 
 
 
 def extract_main_text(url: str, html: str) -> ScrapedPage:
-    title = ""
-    main_text = ""
-
-    # 1) Readability
-    try:
-        doc = Document(html)
-        title = (doc.short_title() or "").strip()
-        summary_html = doc.summary()
-
-        soup = BeautifulSoup(summary_html, "lxml")
-        for tag in soup(["script", "style", "noscript"]):
-            tag.decompose()
-
-        main_text = soup.get_text("\n", strip=True)
-        main_text = _clean_text(main_text)
-    except Exception:
-        main_text = ""
-
-    # 2) Fallback: body text
-    if len(main_text.split()) < 50:
-        soup_full = BeautifulSoup(html, "lxml")
-        for tag in soup_full(["script", "style", "noscript", "header", 
-                              "footer", "nav", "form", "aside"]):
-            tag.decompose()
-
-        body_text = soup_full.get_text("\n", strip=True)
-        body_text = _clean_text(body_text)
-
-        if len(body_text.split()) > len(main_text.split()):
-            main_text = body_text
-
-    # Title fallback
-    if not title:
-        try:
-            soup_head = BeautifulSoup(html, "lxml")
-            if soup_head.title and soup_head.title.string:
-                title = soup_head.title.string.strip()
-        except Exception:
-            title = ""
-
-    if not title:
-        title = "Unbekannter Titel"
-
-    return ScrapedPage(url=url, title=title, text=main_text, html=html)
+    # Readability-Heuristik mit Body-Fallback, ein einziger lxml-Parse
+    page = extract_page(html, url, use_readability=True)
+    return ScrapedPage(url=url, title=page.title or "Unbekannter Titel", text=page.text, html=html)
 
 def extract_article(html: str, url: str):
-    soup = BeautifulSoup(html, "html.parser")
-
-    # Titel
-    title = ""
-    og_title = soup.find("meta", property="og:title")
-    if og_title and og_title.get("content"):
-        title = og_title["content"]
-    elif soup.title:
-        title = soup.title.text.strip()
-
-    # Text aus <p>-Tags
-    paragraphs = [p.get_text(" ", strip=True) for p in soup.find_all("p")]
-    text = " ".join(paragraphs)
-
-    # 🔁 FALLBACK: Meta-Description
-    if len(text.split()) < 20:
-        meta_desc = soup.find("meta", attrs={"name": "description"})
-        if meta_desc and meta_desc.get("content"):
-            text = meta_desc["content"]
-
-    excerpt = text[:300]
-    return title or "(unbekannt)", text or "", excerpt or ""
-
+    # Titel (og:title > <title>), Text aus <p>-Tags, Fallback Meta-Description
+    page = extract_page(html, url)
+    return page.title or "(unbekannt)", page.text or "", page.excerpt or ""
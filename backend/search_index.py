@@ -0,0 +1,186 @@
+import html
+import logging
+import re
+import sys
+from typing import List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+
+from heuristics import source_domain
+from http_pool import env_bool
+
+log = logging.getLogger(__name__)
+
+SEARCH_FTS_ENABLED = env_bool("SEARCH_FTS_ENABLED", True)
+
+FTS_TABLE = "articles_fts"
+
+# unicode61 + remove_diacritics: "Übergriff" findet auch "ubergriff", Bindestrich-
+# Komposita ("Corona-Impfung") werden in Einzelwörter zerlegt. Einen deutschen
+# Stemmer hat FTS5 nicht – Präfixsuche ("impf" → impfung, impfstoff) gleicht das aus.
+FTS_SCHEMA = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5("
+    "title, body, domain, "
+    "tokenize = 'unicode61 remove_diacritics 2', "
+    "prefix = '2 3'"
+    ")"
+)
+
+# Gewichte für bm25(): Titel und Domain zählen mehr als Fließtext
+BM25_WEIGHTS = (10.0, 1.0, 5.0)
+
+REBUILD_BATCH = 1000
+
+_TOKEN_RE = re.compile(r"\w+", re.UNICODE)
+
+# highlight()/snippet() markieren mit Steuerzeichen statt <mark>: Titel und Text
+# stammen von fremden Seiten und werden erst escaped, dann die Marker ersetzt
+_MARK_OPEN, _MARK_CLOSE = "\x02", "\x03"
+
+# Wird von ensure_fts gesetzt; ohne FTS5 fällt die Suche auf LIKE zurück
+fts_available = False
+
+
+def ensure_fts(engine) -> bool:
+    global fts_available
+    if not SEARCH_FTS_ENABLED:
+        fts_available = False
+        return False
+    try:
+        with engine.begin() as conn:
+            conn.execute(text(FTS_SCHEMA))
+        fts_available = True
+    except OperationalError as e:
+        log.warning(f"SUCHE: FTS5 nicht verfügbar ({e}) – nutze LIKE")
+        fts_available = False
+    return fts_available
+
+
+def fts_query(q: str) -> Optional[str]:
+    """Freitext → FTS5-Ausdruck: jedes Wort als Präfix-Phrase, implizit UND-verknüpft.
+
+    Anführungszeichen/Operatoren des Nutzers werden nicht durchgereicht,
+    damit keine Syntaxfehler entstehen.
+    """
+    tokens = _TOKEN_RE.findall((q or "").lower())
+    if not tokens:
+        return None
+    return " ".join(f'"{t}"*' for t in tokens)
+
+
+# ---------- Schreibpfad ----------
+def index_article(db, article_id: int, title: Optional[str], body: Optional[str], url: str):
+    if not fts_available:
+        return
+    db.execute(text(f"DELETE FROM {FTS_TABLE} WHERE rowid = :id"), {"id": article_id})
+    db.execute(
+        text(f"INSERT INTO {FTS_TABLE} (rowid, title, body, domain) VALUES (:id, :title, :body, :domain)"),
+        {"id": article_id, "title": title or "", "body": body or "", "domain": source_domain(url)},
+    )
+
+
+def rebuild(db) -> int:
+    """Baut den Index aus der articles-Tabelle neu auf (z. B. für Bestandsdaten)."""
+    from models import Article
+
+    db.execute(text(f"DELETE FROM {FTS_TABLE}"))
+    count = 0
+    last_id = 0
+    while True:
+        batch = (
+            db.query(Article.id, Article.title, Article.text, Article.url)
+            .filter(Article.id > last_id)
+            .order_by(Article.id)
+            .limit(REBUILD_BATCH)
+            .all()
+        )
+        if not batch:
+            break
+        db.execute(
+            text(f"INSERT INTO {FTS_TABLE} (rowid, title, body, domain) VALUES (:id, :title, :body, :domain)"),
+            [
+                {"id": a.id, "title": a.title or "", "body": a.text or "", "domain": source_domain(a.url)}
+                for a in batch
+            ],
+        )
+        count += len(batch)
+        last_id = batch[-1].id
+    db.execute(text(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('optimize')"))
+    db.commit()
+    return count
+
+
+# ---------- Lesen ----------
+def match_filter(q: str):
+    """WHERE-Bedingung für Article-Abfragen: FTS5 wenn möglich, sonst LIKE auf Titel/URL."""
+    from models import Article
+
+    expr = fts_query(q) if fts_available else None
+    if expr is None:
+        return Article.title.ilike(f"%{q}%") | Article.url.ilike(f"%{q}%")
+    return text(
+        f"articles.id IN (SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH :fts_q)"
+    ).bindparams(fts_q=expr)
+
+
+def _highlighted_html(value: Optional[str]) -> Optional[str]:
+    if value is None:
+        return None
+    return html.escape(value).replace(_MARK_OPEN, "<mark>").replace(_MARK_CLOSE, "</mark>")
+
+
+def search(db, q: str, limit: int = 20, offset: int = 0) -> List[dict]:
+    """Nach bm25 gerankte Treffer; Titel und Textausschnitt als escaptes HTML mit <mark> um Treffer."""
+    expr = fts_query(q)
+    if expr is None or not fts_available:
+        return []
+
+    w_title, w_body, w_domain = BM25_WEIGHTS
+    rows = db.execute(
+        text(
+            f"SELECT f.rowid AS id, a.url, "
+            f"bm25({FTS_TABLE}, {w_title}, {w_body}, {w_domain}) AS rank, "
+            f"highlight({FTS_TABLE}, 0, :mark_open, :mark_close) AS title, "
+            f"snippet({FTS_TABLE}, 1, :mark_open, :mark_close, '…', 24) AS snippet, "
+            f"f.domain, an.label, an.confidence, an.category, an.created_at "
+            f"FROM {FTS_TABLE} f "
+            f"JOIN articles a ON a.id = f.rowid "
+            f"LEFT JOIN analysis an ON an.id = a.latest_analysis_id "
+            f"WHERE {FTS_TABLE} MATCH :q "
+            f"ORDER BY rank LIMIT :limit OFFSET :offset"
+        ),
+        {"q": expr, "limit": limit, "offset": offset, "mark_open": _MARK_OPEN, "mark_close": _MARK_CLOSE},
+    ).mappings().all()
+
+    return [
+        {
+            "url": r["url"],
+            "source_domain": r["domain"],
+            "title": _highlighted_html(r["title"]),
+            "snippet": _highlighted_html(r["snippet"]),
+            "rank": round(r["rank"], 4),
+            "label": r["label"],
+            "confidence": int(r["confidence"]) if r["confidence"] is not None else None,
+            "category": r["category"],
+            "analyzed_at": str(r["created_at"]) if r["created_at"] else None,
+        }
+        for r in rows
+    ]
+
+
+if __name__ == "__main__":
+    # python search_index.py --rebuild
+    from db import SessionLocal, engine
+
+    if "--rebuild" not in sys.argv:
+        print("Aufruf: python search_index.py --rebuild")
+        sys.exit(1)
+    if not ensure_fts(engine):
+        print("FTS5 nicht verfügbar")
+        sys.exit(1)
+    db = SessionLocal()
+    try:
+        print(f"✅ Suchindex neu aufgebaut: {rebuild(db)} Artikel")
+    finally:
+        db.close()
@@ -0,0 +1,55 @@
+import importlib.util
+import os
+import sys
+import tempfile
+
+import pytest
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+GATEWAY_MAIN = os.path.join(os.path.dirname(BACKEND_DIR), "llm_gateway", "main.py")
+
+# Vor dem ersten Import von db: eigene Wegwerf-Datenbank, kein Scheduler, kein ProcessPool
+os.environ["FNG_DATA_DIR"] = tempfile.mkdtemp(prefix="fng-tests-")
+os.environ.setdefault("CPU_POOL_MODE", "thread")
+os.environ.setdefault("RSS_SCHEDULER_ENABLED", "0")
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+from db import Base, SessionLocal, engine  # noqa: E402
+from init_db import init_db  # noqa: E402
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    init_db()
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.rollback()
+        session.close()
+        # Jeder Test startet mit leeren Tabellen
+        with engine.begin() as conn:
+            for table in reversed(Base.metadata.sorted_tables):
+                conn.execute(table.delete())
+
+
+@pytest.fixture(scope="session")
+def gateway():
+    # Das Gateway bringt sein eigenes metrics.py mit – nicht das des Backends verwenden
+    backend_metrics = sys.modules.pop("metrics", None)
+    sys.path.insert(0, os.path.dirname(GATEWAY_MAIN))
+    try:
+        spec = importlib.util.spec_from_file_location("llm_gateway_main", GATEWAY_MAIN)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+    finally:
+        sys.path.remove(os.path.dirname(GATEWAY_MAIN))
+        sys.modules.pop("metrics", None)
+        if backend_metrics is not None:
+            sys.modules["metrics"] = backend_metrics
+    return module
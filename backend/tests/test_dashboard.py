@@ -0,0 +1,120 @@
+import pytest
+
+from dashboard import (
+    CachedPage,
+    InvalidCursor,
+    dashboard_page,
+    decode_cursor,
+    encode_cursor,
+    not_modified,
+)
+from models import Analysis, Article
+
+# (word_count, confidence) – mit NULLs und vielen gleichen Sortwerten
+ROWS = [
+    (300, 80.0), (None, 55.0), (120, 80.0), (300, None), (None, 80.0),
+    (120, 91.5), (300, 80.0), (50, None), (None, 55.0), (120, 12.0), (300, 91.5),
+]
+
+
+@pytest.fixture
+def analyses(db):
+    ids = []
+    for i, (word_count, confidence) in enumerate(ROWS):
+        article = Article(url=f"https://example.test/{i}", title=f"Artikel {i}", word_count=word_count)
+        db.add(article)
+        db.flush()
+        analysis = Analysis(article_id=article.id, label="uncertain", confidence=confidence, category="Falschmeldung")
+        db.add(analysis)
+        db.flush()
+        article.latest_analysis_id = analysis.id
+        ids.append((analysis.id, word_count, confidence))
+    db.commit()
+    return ids
+
+
+def expected_order(rows, key, desc):
+    # SQLite: NULL ist kleiner als jeder Wert; Analysis.id entscheidet bei Gleichstand
+    def sort_key(row):
+        value = row[key]
+        return (value is not None, value if value is not None else 0, row[0])
+    return [row[0] for row in sorted(rows, key=sort_key, reverse=desc)]
+
+
+def page_through(db, sort, order, limit, **filters):
+    urls, cursor, pages = [], None, 0
+    while True:
+        items, cursor = dashboard_page(db, sort=sort, order=order, limit=limit, cursor=cursor, **filters)
+        urls.extend(item["url"] for item in items)
+        pages += 1
+        if cursor is None:
+            return urls, pages
+        assert pages < 50, "Cursor kommt nicht voran"
+
+
+@pytest.mark.parametrize("sort,key", [("word_count", 1), ("confidence", 2), ("created_at", 0)])
+@pytest.mark.parametrize("order", ["asc", "desc"])
+@pytest.mark.parametrize("limit", [1, 2, 3, 20])
+def test_keyset_paging_matches_full_sort(db, analyses, sort, key, order, limit):
+    urls, pages = page_through(db, sort, order, limit)
+    by_id = {analysis_id: f"https://example.test/{i}" for i, (analysis_id, _, _) in enumerate(analyses)}
+
+    if sort == "created_at":
+        # created_at hat Sekundenauflösung – alle gleich, also nur id-Reihenfolge
+        expected = sorted(by_id, reverse=order == "desc")
+    else:
+        expected = expected_order(analyses, key, order == "desc")
+    assert urls == [by_id[i] for i in expected]
+    assert len(set(urls)) == len(ROWS)
+    assert pages == max(1, -(-len(ROWS) // limit))
+
+
+def test_paging_with_filter_and_latest(db, analyses):
+    urls, _ = page_through(db, "confidence", "desc", 2, min_conf=80, latest=True)
+    expected = [f"https://example.test/{i}" for i in (10, 5, 6, 4, 2, 0)]
+    assert urls == expected
+
+
+def test_last_page_has_no_cursor(db, analyses):
+    items, cursor = dashboard_page(db, limit=len(ROWS))
+    assert len(items) == len(ROWS)
+    assert cursor is None
+
+
+def test_cursor_roundtrip_and_validation():
+    cursor = encode_cursor("confidence", "asc", None, 17)
+    assert "=" not in cursor
+    assert decode_cursor(cursor, "confidence", "asc") == (None, 17)
+    assert decode_cursor(encode_cursor("word_count", "desc", 300, 5), "word_count", "desc") == (300, 5)
+
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "confidence", "desc")
+    with pytest.raises(InvalidCursor):
+        decode_cursor(cursor, "word_count", "asc")
+    with pytest.raises(InvalidCursor):
+        decode_cursor("kein-cursor!", "confidence", "asc")
+
+
+def make_page(etag='W/"v1"', last_modified="Tue, 15 Oct 2024 10:00:00 GMT") -> CachedPage:
+    return CachedPage(version=(1,), etag=etag, last_modified=last_modified, body=b"[]", next_cursor=None, stored_at=0.0)
+
+
+def test_not_modified_etag():
+    page = make_page()
+    assert not_modified(page, 'W/"v1"', None)
+    assert not_modified(page, '"v1"', None)                 # schwacher Vergleich
+    assert not_modified(page, '"other", W/"v1"', None)
+    assert not_modified(page, "*", None)
+    assert not not_modified(page, '"v2"', None)
+    # If-None-Match hat Vorrang vor If-Modified-Since
+    assert not not_modified(page, '"v2"', "Wed, 16 Oct 2024 10:00:00 GMT")
+
+
+def test_not_modified_since():
+    page = make_page()
+    assert not_modified(page, None, "Tue, 15 Oct 2024 10:00:00 GMT")
+    assert not_modified(page, None, "Wed, 16 Oct 2024 10:00:00 GMT")
+    assert not not_modified(page, None, "Mon, 14 Oct 2024 10:00:00 GMT")
+    assert not not_modified(page, None, "kein Datum")
+    assert not not_modified(make_page(last_modified=None), None, "Tue, 15 Oct 2024 10:00:00 GMT")
+    assert not not_modified(page, None, None)
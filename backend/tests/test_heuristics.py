@@ -0,0 +1,38 @@
+from heuristics import MATCHER, LexiconMatcher, extract_features
+
+
+def test_longest_term_wins_within_a_lexicon():
+    matcher = LexiconMatcher({"emotion": ["skandal", "skandalös"]})
+    assert matcher.count("ein skandalöser skandal") == {"emotion": 2}
+
+
+def test_lexicons_are_matched_independently():
+    matcher = LexiconMatcher({"fake": ["geheim"], "plan": ["geheimplan"], "both": ["geheim", "geheimplan"]})
+    assert matcher.count("der geheimplan ist geheim") == {"fake": 2, "plan": 1, "both": 2}
+
+
+def test_same_term_in_two_lexicons_counts_in_both():
+    matcher = LexiconMatcher({"a": ["krass"], "b": ["Krass"]})
+    assert matcher.count("krass, echt krass") == {"a": 2, "b": 2}
+
+
+def test_no_word_boundaries_and_no_overlaps():
+    matcher = LexiconMatcher({"u": ["soll", "ll"]})
+    # "soll" in "sollte" verbraucht das "ll"
+    assert matcher.count("sollte") == {"u": 1}
+    assert matcher.count("alle") == {"u": 1}
+
+
+def test_empty_lexicon_counts_zero():
+    assert LexiconMatcher({"leer": [], "nur_leer": [""]}).count("irgendein text") == {"leer": 0, "nur_leer": 0}
+
+
+def test_extract_features_uses_shipped_lexicons():
+    text = "Schockierend! Angeblich soll es einen Skandal geben, den sie verschweigen."
+    features = extract_features(text, "https://www.der-postillon.com/2024/artikel")
+    assert features["source_domain"] == "der-postillon.com"
+    assert features["is_satire_domain"] is True
+    assert features["emotion_hits"] == MATCHER.count(text.lower())["emotion_hits"] >= 2
+    assert features["uncertainty_hits"] >= 2
+    assert features["fake_trigger_hits"] >= 1
+    assert features["has_enough_text"] is False
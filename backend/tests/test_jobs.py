@@ -0,0 +1,197 @@
+import asyncio
+import threading
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+import jobs
+from db import SessionLocal
+from jobs import JobQueue
+from models import AnalysisJob
+
+URL = "https://example.test/artikel"
+
+
+def insert_concurrently(url, threads=8):
+    barrier = threading.Barrier(threads)
+    results = []
+
+    def submit():
+        db = SessionLocal()
+        try:
+            barrier.wait()
+            results.append(JobQueue._insert(db, url))
+        finally:
+            db.close()
+
+    workers = [threading.Thread(target=submit) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return results
+
+
+def test_concurrent_submits_create_one_active_job(db):
+    results = insert_concurrently(URL)
+    assert len({job["id"] for job in results}) == 1
+    assert db.query(AnalysisJob).count() == 1
+
+
+def test_finished_url_can_be_submitted_again(db):
+    first = JobQueue._insert(db, URL)
+    JobQueue._set(db, first["id"], {"status": "done"})
+    second = JobQueue._insert(db, URL)
+    assert second["id"] != first["id"]
+    assert second["status"] == "pending"
+
+
+def test_claim_takes_oldest_pending_once(db):
+    first = JobQueue._insert(db, URL)
+    second = JobQueue._insert(db, URL + "/2")
+    # created_at hat Sekundenauflösung – Reihenfolge explizit machen
+    JobQueue._set(db, second["id"], {"created_at": datetime.now(timezone.utc) + timedelta(seconds=5)})
+
+    job = JobQueue._claim(db)
+    assert job.id == first["id"]
+    assert (job.status, job.stage, job.attempts) == ("running", "fetch", 1)
+    assert JobQueue._claim(db).url == URL + "/2"
+    assert JobQueue._claim(db) is None
+
+
+def test_claim_respects_backoff(db):
+    job = JobQueue._insert(db, URL)
+    JobQueue._set(db, job["id"], {"not_before": datetime.now(timezone.utc) + timedelta(seconds=60)})
+    assert JobQueue._claim(db) is None
+
+    JobQueue._set(db, job["id"], {"not_before": datetime.now(timezone.utc) - timedelta(seconds=1)})
+    claimed = JobQueue._claim(db)
+    assert claimed.id == job["id"]
+    assert claimed.not_before is None
+
+
+def test_requeue_running(db):
+    job = JobQueue._insert(db, URL)
+    JobQueue._claim(db)
+    assert JobQueue._requeue_running(db) == 1
+    db.expire_all()
+    stored = db.get(AnalysisJob, job["id"])
+    assert (stored.status, stored.stage) == ("pending", None)
+
+
+@pytest.fixture
+def failing_analysis(monkeypatch):
+    async def analyze_url(url, on_event=None):
+        raise RuntimeError("Upstream weg")
+
+    monkeypatch.setattr(jobs, "analyze_url", analyze_url)
+    monkeypatch.setattr(jobs, "JOB_MAX_ATTEMPTS", 2)
+    monkeypatch.setattr(jobs, "JOB_RETRY_BACKOFF", 30.0)
+
+
+def run_attempt(queue, db, job_id, events):
+    # Backoff überspringen, dann einen Versuch durchlaufen lassen
+    JobQueue._set(db, job_id, {"not_before": None})
+    job = JobQueue._claim(db)
+    assert job.id == job_id
+    asyncio.run(queue._run(job))
+    db.expire_all()
+    return db.get(AnalysisJob, job_id), events.get_nowait(), events.get_nowait()
+
+
+def test_failed_attempt_backs_off_then_fails(db, failing_analysis):
+    queue = JobQueue()
+    job_id = JobQueue._insert(db, URL)["id"]
+    events = queue.subscribe(job_id)
+
+    before = datetime.now(timezone.utc)
+    stored, running, retry = run_attempt(queue, db, job_id, events)
+    assert running["status"] == "running"
+    assert stored.status == "pending"
+    assert stored.error == "RuntimeError: Upstream weg"
+    assert retry["status"] == "pending"
+    assert retry["attempts"] == 1
+    retry_at = datetime.fromisoformat(retry["retry_at"])
+    assert before + timedelta(seconds=29) < retry_at < before + timedelta(seconds=31)
+    # Während des Backoffs wird der Job nicht übernommen
+    assert JobQueue._claim(db) is None
+
+    stored, _, failed = run_attempt(queue, db, job_id, events)
+    assert stored.status == "failed"
+    assert (failed["status"], failed["attempts"]) == ("failed", 2)
+
+
+def test_retry_delay_doubles_up_to_cap(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_RETRY_BACKOFF", 10.0)
+    monkeypatch.setattr(jobs, "JOB_RETRY_BACKOFF_MAX", 35.0)
+    assert [jobs.retry_delay(n) for n in (1, 2, 3, 4)] == [10.0, 20.0, 35.0, 35.0]
+
+
+def locked():
+    return OperationalError("UPDATE analysis_jobs", {}, Exception("database is locked"))
+
+
+def run_worker(queue, until, timeout=2.0):
+    async def run():
+        queue._wakeup = asyncio.Event()
+        task = asyncio.create_task(queue._worker(0))
+        try:
+            for _ in range(int(timeout / 0.01)):
+                if until():
+                    break
+                await asyncio.sleep(0.01)
+            assert not task.done(), "Worker beendet"
+        finally:
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+
+    asyncio.run(run())
+
+
+def test_worker_survives_failing_claim(monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_POLL_INTERVAL", 0.01)
+    calls = []
+
+    def claim(db):
+        calls.append(1)
+        if len(calls) == 1:
+            raise locked()
+        return None
+
+    monkeypatch.setattr(JobQueue, "_claim", staticmethod(claim))
+    run_worker(JobQueue(), lambda: len(calls) >= 3)
+    assert len(calls) >= 3
+
+
+def test_job_is_requeued_when_finishing_fails(db, monkeypatch):
+    monkeypatch.setattr(jobs, "JOB_POLL_INTERVAL", 0.01)
+    monkeypatch.setattr(jobs, "JOB_RETRY_BACKOFF", 30.0)
+
+    async def analyze_url(url, on_event=None):
+        return {"label": "uncertain"}
+
+    monkeypatch.setattr(jobs, "analyze_url", analyze_url)
+    monkeypatch.setattr(jobs, "store_result", lambda db, prepared, result: result)
+
+    original_set = JobQueue._set
+    failed = []
+
+    def flaky_set(db, job_id, values):
+        if values.get("status") == "done" and not failed:
+            failed.append(job_id)
+            raise locked()
+        original_set(db, job_id, values)
+
+    monkeypatch.setattr(JobQueue, "_set", staticmethod(flaky_set))
+    job_id = JobQueue._insert(db, URL)["id"]
+
+    def requeued():
+        db.expire_all()
+        return db.get(AnalysisJob, job_id).status == "pending" and bool(failed)
+
+    run_worker(JobQueue(), requeued)
+    stored = db.get(AnalysisJob, job_id)
+    assert stored.status == "pending"
+    assert stored.not_before is not None
+    assert stored.error.startswith("Worker-Fehler")
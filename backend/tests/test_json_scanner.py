@@ -0,0 +1,92 @@
+import json
+
+import pytest
+
+VERDICT = {
+    "label": "likely_fake",
+    "confidence": 87,
+    "red_flags": ["keine Quelle", "Zitat: \"geheim\", {angeblich}"],
+    "claims": [{"text": "a, b", "nested": [1, {"x": "}"}]}],
+    "reasoning_summary": "Backslash \\ und Komma, sowie } und ] im String.",
+    "suggested_counter_sources": [],
+}
+
+
+def feed_all(scanner, chunks):
+    events = []
+    for chunk in chunks:
+        new = scanner.feed(chunk)
+        if new:
+            events.append(new)
+    return events
+
+
+def split_every(text, n):
+    return [text[i:i + n] for i in range(0, len(text), n)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 1000])
+def test_chunked_stream_yields_every_field_once(gateway, size):
+    raw = json.dumps(VERDICT, ensure_ascii=False)
+    scanner = gateway._JsonObjectScanner()
+    events = feed_all(scanner, split_every(raw, size))
+
+    assert scanner.closed
+    assert scanner.fields == VERDICT
+    assert json.loads(scanner.raw) == VERDICT
+    emitted = [key for event in events for key in event]
+    assert sorted(emitted) == sorted(VERDICT)
+
+
+def test_fields_arrive_as_soon_as_their_value_is_complete(gateway):
+    scanner = gateway._JsonObjectScanner()
+    assert scanner.feed('{"label": "likely_') == {}
+    assert scanner.feed('real", "confidence"') == {"label": "likely_real"}
+    assert scanner.feed(": 9") == {}
+    assert scanner.feed("5, ") == {"confidence": 95}
+    assert scanner.feed('"red_flags": []}') == {"red_flags": []}
+    assert scanner.closed
+
+
+@pytest.mark.parametrize("split", ['{"a": "x\\', '{"a": "x\\\\', '{"a": "x\\\\"', '{"a": "x\\\\", "b": "q\\'])
+def test_escape_split_across_chunks(gateway, split):
+    raw = '{"a": "x\\\\", "b": "q\\"}, {", "c": 1}'
+    assert raw.startswith(split)
+    scanner = gateway._JsonObjectScanner()
+    feed_all(scanner, [split, raw[len(split):]])
+    assert scanner.closed
+    assert scanner.fields == {"a": "x\\", "b": 'q"}, {', "c": 1}
+
+
+def test_text_around_object_is_ignored(gateway):
+    scanner = gateway._JsonObjectScanner()
+    feed_all(scanner, ["Hier die Einschätzung: ", '{"label": "uncertain"', ', "confidence": 40}', " Noch Fragen? {"])
+    assert scanner.closed
+    assert scanner.raw == '{"label": "uncertain", "confidence": 40}'
+    # Nach dem Schließen wird nichts mehr ausgewertet
+    assert scanner.feed('"x": 1}') == {}
+
+
+def test_unterminated_object(gateway):
+    scanner = gateway._JsonObjectScanner()
+    feed_all(scanner, ['  {"label": "likely_real", "confid'])
+    assert not scanner.closed
+    assert scanner.fields == {"label": "likely_real"}
+    assert scanner.raw == '{"label": "likely_real", "confid'
+
+
+def test_unchanged_fields_are_not_emitted_twice(gateway):
+    scanner = gateway._JsonObjectScanner()
+    events = feed_all(scanner, ['{"a": 1,', ' "b": 2,', ' "c": 3}'])
+    assert events == [{"a": 1}, {"b": 2}, {"c": 3}]
+
+
+@pytest.mark.parametrize("text,expected", [
+    ('{"label": "uncertain"}', {"label": "uncertain"}),
+    ('```json\n{"label": "likely_real"}\n```', {"label": "likely_real"}),
+    ('Antwort: {"label": "likely_fake"} Ende', {"label": "likely_fake"}),
+    ("kein JSON", None),
+    ("", None),
+])
+def test_extract_json_from_text(gateway, text, expected):
+    assert gateway._extract_json_from_text(text) == expected
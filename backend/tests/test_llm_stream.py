@@ -0,0 +1,123 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+
+import analysis_service
+from analysis_service import call_llm_stream, llm_client
+
+VERDICT = {"label": "likely_real", "confidence": 80}
+
+
+# ---------- Gateway: Single-Flight für /classify/stream ----------
+def stream_lines(response):
+    async def collect():
+        return [json.loads(chunk) async for chunk in response.body_iterator]
+    return collect()
+
+
+def test_identical_streams_share_one_upstream_call(gateway, monkeypatch):
+    calls = []
+
+    async def stream_ollama(text):
+        calls.append(text)
+        yield "fields", {"label": "likely_real"}
+        await asyncio.sleep(0.01)
+        yield "fields", {"confidence": 80}
+        yield "raw", json.dumps(VERDICT)
+
+    monkeypatch.setattr(gateway, "_stream_ollama", stream_ollama)
+
+    async def run():
+        first = await gateway.classify_stream(gateway.LLMRequest(text="Prompt"))
+        # Zweiter Leser steigt ein, nachdem der erste Stream schon läuft
+        first_lines = asyncio.ensure_future(stream_lines(first))
+        await asyncio.sleep(0.005)
+        second = await gateway.classify_stream(gateway.LLMRequest(text="Prompt"))
+        return await first_lines, await stream_lines(second)
+
+    coalesced = gateway._admission_stats["coalesced"]
+    first, second = asyncio.run(run())
+    assert calls == ["Prompt"]
+    assert first == second
+    assert [line["type"] for line in first] == ["fields", "fields", "result"]
+    assert first[-1]["parsed"] == VERDICT
+    assert gateway._admission_stats["coalesced"] == coalesced + 1
+    assert gateway._inflight_streams == {}
+
+
+def test_stream_error_carries_retry_after(gateway, monkeypatch):
+    async def stream_ollama(text):
+        raise gateway._saturated(503, "LLM ausgelastet, Wartezeit überschritten")
+        yield  # pragma: no cover
+
+    monkeypatch.setattr(gateway, "_stream_ollama", stream_ollama)
+
+    async def run():
+        return await stream_lines(await gateway.classify_stream(gateway.LLMRequest(text="Anderer Prompt")))
+
+    (error,) = asyncio.run(run())
+    assert error["type"] == "error"
+    assert error["status"] == 503
+    assert error["retry_after"] == str(gateway.RETRY_AFTER_SECONDS)
+
+
+# ---------- Backend: Ablehnung vor dem ersten Token ----------
+@pytest.fixture
+def gateway_responses(monkeypatch):
+    requests = []
+    responses = {}
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        requests.append(request.url.path)
+        return responses[request.url.path]
+
+    waits = []
+
+    async def sleep(seconds):
+        waits.append(seconds)
+
+    monkeypatch.setattr(analysis_service.asyncio, "sleep", sleep)
+    monkeypatch.setattr(llm_client, "_client", httpx.AsyncClient(transport=httpx.MockTransport(handler)))
+    yield responses, requests, waits
+
+
+def ndjson(*events):
+    return httpx.Response(200, text="".join(json.dumps(e) + "\n" for e in events))
+
+
+def collect_stream(prompt="Prompt"):
+    events = []
+
+    async def on_event(event):
+        events.append(event)
+
+    result = asyncio.run(call_llm_stream(prompt, on_event))
+    return result, events
+
+
+def test_rejected_stream_retries_after_backoff(gateway_responses):
+    responses, requests, waits = gateway_responses
+    responses["/classify/stream"] = ndjson({"type": "error", "status": 429, "detail": "voll", "retry_after": "7"})
+    responses["/classify"] = httpx.Response(200, json={"raw": "", "parsed": VERDICT})
+
+    (parsed, status), events = collect_stream()
+    assert (parsed, status) == (VERDICT, "parsed-ok")
+    assert requests == ["/classify/stream", "/classify"]
+    assert waits == [7.0]
+    assert events == []
+
+
+def test_error_after_first_token_is_not_retried(gateway_responses):
+    responses, requests, _ = gateway_responses
+    responses["/classify/stream"] = ndjson(
+        {"type": "fields", "fields": {"label": "uncertain"}},
+        {"type": "error", "status": 503, "detail": "weg"},
+    )
+
+    (parsed, status), events = collect_stream()
+    assert parsed is None
+    assert status == "LLM error: weg"
+    assert requests == ["/classify/stream"]
+    assert events == [{"type": "fields", "fields": {"label": "uncertain"}}]
@@ -0,0 +1,119 @@
+import json
+import random
+
+import pytest
+
+import local_classifier
+from local_classifier import NaiveBayesModel, calibrate, evaluate, fit, load_model, train, vectorize
+from models import Analysis, Article
+
+FAKE = ["geheim", "vertuscht", "schock", "wahrheit", "eliten", "verschwiegen"]
+REAL = ["ministerium", "studie", "bundestag", "statistik", "behörde", "bericht"]
+NEUTRAL = ["heute", "stadt", "menschen", "woche", "jahr", "gestern", "neu", "viele"]
+
+
+def article(rng, words, n=40):
+    return " ".join(rng.choice(words + NEUTRAL) for _ in range(n))
+
+
+def samples(n=200, seed=1):
+    rng = random.Random(seed)
+    result = []
+    for i in range(n):
+        label = "likely_fake" if i % 2 else "likely_real"
+        text = article(rng, FAKE if label == "likely_fake" else REAL)
+        result.append((vectorize(text, {}, 1 << 12), label))
+    return result
+
+
+def test_features_are_binary():
+    assert vectorize("schock studie schock studie schock", {}, 1 << 12) == vectorize("schock studie schock", {}, 1 << 12)
+
+
+def test_fit_and_predict():
+    model = fit(samples(), 1 << 12)
+    assert model.labels == ["likely_fake", "likely_real"]
+    assert model.samples == 200
+    assert model.predict("geheim vertuscht schock", {}).label == "likely_fake"
+    assert model.predict("ministerium studie bundestag", {}).label == "likely_real"
+
+
+def test_numpy_and_pure_python_agree(monkeypatch):
+    data = samples()
+    fast = [fit(data, 1 << 12).predict_indices(indices) for indices, _ in data[:20]]
+    monkeypatch.setattr(local_classifier, "np", None)
+    slow = [fit(data, 1 << 12).predict_indices(indices) for indices, _ in data[:20]]
+    for a, b in zip(fast, slow):
+        assert a.label == b.label
+        assert a.probability == pytest.approx(b.probability, rel=1e-5)
+
+
+def test_uncalibrated_model_is_never_confident():
+    model = fit(samples(), 1 << 12)
+    assert model.threshold is None
+    assert not model.predict("geheim vertuscht schock", {}).confident
+
+    model.meta["threshold"] = 0.9
+    assert model.predict("geheim vertuscht schock geheim", {}).confident
+
+
+def test_calibrate_picks_lowest_threshold_meeting_target_precision():
+    # 10 sichere richtige, dann Fehler dazwischen
+    predictions = [(0.99, True)] * 10 + [(0.9, False), (0.8, True), (0.8, True), (0.7, False), (0.6, False)]
+    assert calibrate(predictions, target_precision=1.0, min_confident=5) == 0.99
+    # 12 von 13 richtig über 0.8 → 0.923
+    assert calibrate(predictions, target_precision=0.9, min_confident=5) == 0.8
+    assert calibrate(predictions, target_precision=0.9, min_confident=14) is None
+    assert calibrate([], target_precision=0.9, min_confident=0) is None
+
+
+def test_calibrate_never_splits_ties():
+    predictions = [(0.99, True)] * 5 + [(0.9, True), (0.9, False)]
+    # Bei 0.9 wären es 6/7 – die Schwelle darf nicht "zwischen" den beiden 0.9 liegen
+    assert calibrate(predictions, target_precision=0.9, min_confident=1) == 0.99
+
+
+def test_evaluate_reports_coverage_and_precision():
+    predictions = [(0.99, True), (0.95, True), (0.95, False), (0.5, True)]
+    report = evaluate(predictions, 0.95)
+    assert report == {"samples": 4, "accuracy": 0.75, "threshold": 0.95, "coverage": 0.75, "precision": 0.6667}
+    assert evaluate(predictions, None)["coverage"] == 0.0
+
+
+def test_train_calibrates_and_saves(db, tmp_path, monkeypatch):
+    monkeypatch.setattr(local_classifier, "LOCAL_CLASSIFIER_MIN_SAMPLES", 50)
+    monkeypatch.setattr(local_classifier, "LOCAL_CLASSIFIER_MIN_CONFIDENT", 5)
+    rng = random.Random(3)
+    for i in range(100):
+        label = "likely_fake" if i % 2 else "likely_real"
+        row = Article(url=f"https://example.test/{i}", title=str(i), text=article(rng, FAKE if i % 2 else REAL, 80))
+        db.add(row)
+        db.flush()
+        analysis = Analysis(article_id=row.id, label=label, confidence=80, verdict_source="llm")
+        db.add(analysis)
+        db.flush()
+        row.latest_analysis_id = analysis.id
+    db.commit()
+
+    path = str(tmp_path / "model.json")
+    report = train(db, path, dim=1 << 12)
+    assert report["saved"]
+    holdout = report["holdout"]
+    assert holdout["samples"] == 20
+    assert holdout["threshold"] is not None
+    assert holdout["precision"] >= local_classifier.LOCAL_CLASSIFIER_TARGET_PRECISION
+    assert holdout["coverage"] > 0
+
+    with open(path, encoding="utf-8") as f:
+        meta = json.load(f)["meta"]
+    assert meta["threshold"] == holdout["threshold"]
+
+    model = load_model(path)
+    assert isinstance(model, NaiveBayesModel)
+    assert model.samples == 80    # nur der Trainingsteil, auf dem kalibriert wurde
+    assert model.threshold == holdout["threshold"]
+
+
+def test_train_needs_enough_samples(db, tmp_path):
+    report = train(db, str(tmp_path / "model.json"))
+    assert report == {"samples": 0, "labels": {}, "saved": False}
@@ -0,0 +1,77 @@
+import random
+
+import pytest
+
+import near_duplicates
+from near_duplicates import BITS, SimHashIndex, hamming, simhash, similarity, to_signed, to_unsigned
+
+VOCAB = [f"wort{i}" for i in range(400)]
+
+
+def random_text(seed, words=300):
+    rng = random.Random(seed)
+    return " ".join(rng.choice(VOCAB) for _ in range(words))
+
+
+def flip_bits(value, bits):
+    for bit in bits:
+        value ^= 1 << bit
+    return value
+
+
+@pytest.mark.parametrize("seed", range(5))
+@pytest.mark.parametrize("words", [80, 81, 300, 2000])
+def test_numpy_and_pure_python_agree(monkeypatch, seed, words):
+    text = random_text(seed, words)
+    fast = simhash(text)
+    monkeypatch.setattr(near_duplicates, "np", None)
+    assert simhash(text) == fast
+
+
+def test_short_or_empty_text_has_no_hash():
+    assert simhash(random_text(0, 79)) is None
+    assert simhash("") is None
+    assert simhash(None) is None
+
+
+def test_similar_texts_have_close_hashes():
+    text = random_text(1, 400)
+    edited = text.replace(VOCAB[0], "geändert").upper()
+    assert simhash(text) == simhash(text.upper())
+    assert similarity(simhash(text), simhash(edited)) >= 0.85
+    assert similarity(simhash(text), simhash(random_text(2, 400))) < 0.8
+
+
+def test_signed_roundtrip():
+    for value in (0, 1, (1 << 63) - 1, 1 << 63, (1 << 64) - 1):
+        signed = to_signed(value)
+        assert -(1 << 63) <= signed < 1 << 63
+        assert to_unsigned(signed) == value
+
+
+@pytest.mark.parametrize("min_similarity", [1.0, 0.95, 0.9])
+def test_index_finds_everything_within_distance_k(min_similarity):
+    index = SimHashIndex(min_similarity)
+    k = index.max_distance
+    rng = random.Random(7)
+    base = rng.getrandbits(BITS)
+
+    # Pro Distanz ein Eintrag mit zufälligen, über alle Bänder verteilten Bits
+    for distance in range(k + 3):
+        index.add(distance + 1, flip_bits(base, rng.sample(range(BITS), distance)))
+    # Worst Case: alle k Bits im selben Band
+    index.add(100, flip_bits(base, range(k)))
+
+    found = dict(index.candidates(base))
+    assert set(found) == set(range(1, k + 2)) | {100}
+    assert all(found[i] == i - 1 for i in range(1, k + 2))
+    assert index.candidates(base, exclude_id=1) == [(i, d) for i, d in index.candidates(base) if i != 1]
+
+
+def test_index_readd_moves_entry():
+    index = SimHashIndex(0.95)
+    index.add(1, 0)
+    index.add(1, (1 << BITS) - 1)
+    assert index.candidates(0) == []
+    assert index.candidates((1 << BITS) - 1) == [(1, 0)]
+    assert hamming(0, (1 << BITS) - 1) == BITS
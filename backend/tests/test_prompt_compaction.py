@@ -0,0 +1,56 @@
+import pytest
+
+from prompt_compaction import _candidates, _is_boilerplate, compact, estimate_tokens
+
+
+@pytest.mark.parametrize("line", [
+    "Anzeige", "— Werbung —", "Cookie-Einstellungen", "Datenschutzerklärung", "Newsletter abonnieren",
+    "Lesen Sie auch: Neue Studie zu Impfschäden", "Mehr zum Thema", "© 2024 Beispiel Verlag GmbH",
+    "Alle Rechte vorbehalten.", "Weiterlesen »",
+])
+def test_whole_boilerplate_lines(line):
+    assert _is_boilerplate(line)
+
+
+@pytest.mark.parametrize("line", [
+    "Die Polizei prüft eine Strafanzeige gegen den Betreiber.",
+    "Werbungskosten lassen sich von der Steuer absetzen.",
+    "Der Datenschutz sei verletzt worden, sagte die Behörde.",
+    "Die Seite funktioniert angeblich nur mit JavaScript.",
+    "Anzeige erstattet.",
+])
+def test_article_sentences_are_not_boilerplate(line):
+    assert not _is_boilerplate(line)
+
+
+def test_text_within_budget_is_unchanged():
+    text = "Anzeige\nDie Polizei prüft eine Strafanzeige.\nCookie-Einstellungen\nDie Polizei prüft eine Strafanzeige."
+    compacted = compact(text, budget=1000)
+    assert compacted.text == text
+    assert compacted.compression == 1.0
+
+
+def test_boilerplate_lines_and_repeats_are_removed_when_over_budget():
+    body = "Die Polizei prüft eine Strafanzeige gegen den Betreiber der Seite."
+    text = "\n".join(["Anzeige", body, "Newsletter abonnieren", body, "Werbungskosten sind absetzbar."])
+    assert [s for _, s in _candidates(text)] == [body, "Werbungskosten sind absetzbar."]
+
+    compacted = compact(text, budget=estimate_tokens(text) - 1)
+    assert compacted.text == f"{body} Werbungskosten sind absetzbar."
+
+
+def test_compression_is_token_ratio():
+    text = " ".join(f"Satz Nummer {i} enthält ein paar Wörter zum Thema." for i in range(200))
+    compacted = compact(text, budget=100)
+    assert compacted.tokens <= 100
+    assert compacted.original_tokens == estimate_tokens(text)
+    assert compacted.compression == round(compacted.tokens / compacted.original_tokens, 3)
+    # Lead-Sätze bleiben in Originalreihenfolge erhalten
+    assert compacted.text.startswith("Satz Nummer 0 ")
+
+
+def test_budget_zero_only_truncates():
+    text = "Anzeige\n" + "x" * 9000
+    compacted = compact(text, budget=0)
+    assert compacted.text == text[:8000]
+    assert compacted.budget == 0
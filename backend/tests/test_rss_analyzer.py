@@ -0,0 +1,107 @@
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+import rss_analyzer
+from models import Article, FailedFeedLink, FeedState
+
+FEEDS = {"inland": "http://feeds.test/inland.xml", "sport": "http://feeds.test/sport.xml"}
+LINKS = {
+    FEEDS["inland"]: ["http://news.test/a1", "http://news.test/kaputt"],
+    FEEDS["sport"]: ["http://news.test/s1"],
+}
+BAD = "http://news.test/kaputt"
+
+
+class FakePipeline:
+    """Statt Fetch/LLM: jeder Link gelingt, außer BAD."""
+
+    processed = []
+
+    async def run(self, urls, on_result=None):
+        errors = 0
+        async for url in urls:
+            FakePipeline.processed.append(url)
+            if url == BAD:
+                errors += 1
+                await on_result({"url": url, "status": "error", "stage": "fetch", "error": "HTTPStatusError: 404"})
+            else:
+                await on_result({"url": url, "status": "ok", "result": {}})
+        return SimpleNamespace(errors=errors, as_dict=lambda: {"errors": errors})
+
+
+@pytest.fixture
+def cycle(monkeypatch):
+    fetches = []
+
+    async def fetch_feed(name, feed_url, state):
+        fetches.append((feed_url, state.get("etag")))
+        response = SimpleNamespace(headers={"ETag": f'"{name}-1"'})
+        if state.get("etag") == response.headers["ETag"]:
+            return None, response    # 304
+        entries = [SimpleNamespace(id=link, link=link) for link in LINKS[feed_url]]
+        return SimpleNamespace(entries=entries), response
+
+    monkeypatch.setattr(rss_analyzer, "RSS_SOURCES", FEEDS)
+    monkeypatch.setattr(rss_analyzer, "fetch_feed", fetch_feed)
+    monkeypatch.setattr(rss_analyzer, "AnalysisPipeline", FakePipeline)
+    # Die Fake-Pipeline speichert keine Artikel → "bekannt" sind nur die erfolgreichen
+    monkeypatch.setattr(rss_analyzer, "filter_new_links", lambda db, links: [l for l in links if l == BAD or l not in FakePipeline.processed])
+    FakePipeline.processed = []
+    return fetches
+
+
+def failed_attempts(db):
+    db.expire_all()
+    return {row.url: row.attempts for row in db.query(FailedFeedLink)}
+
+
+def test_failing_link_does_not_block_feed_state(db, cycle):
+    stats = asyncio.run(rss_analyzer.run_rss_auto_analysis())
+    assert stats["failed_links"] == 1
+
+    states = {s.feed_url: s for s in db.query(FeedState)}
+    assert set(states) == set(FEEDS.values())
+    assert states[FEEDS["inland"]].etag == '"inland-1"'
+    assert states[FEEDS["inland"]].last_seen_id == "http://news.test/a1"
+    assert failed_attempts(db) == {BAD: 1}
+
+
+def test_failed_link_is_retried_until_max_attempts(db, cycle, monkeypatch):
+    monkeypatch.setattr(rss_analyzer, "RSS_LINK_MAX_ATTEMPTS", 3)
+    asyncio.run(rss_analyzer.run_rss_auto_analysis())
+
+    # Feeds antworten jetzt mit 304; der kaputte Link kommt nur noch aus der Tabelle
+    FakePipeline.processed = []
+    stats = asyncio.run(rss_analyzer.run_rss_auto_analysis())
+    assert stats["feeds_not_modified"] == 2
+    assert stats["retried_links"] == 1
+    assert FakePipeline.processed == [BAD]
+    assert failed_attempts(db) == {BAD: 2}
+
+    # Dritter Fehlschlag: aufgegeben und ausgetragen
+    stats = asyncio.run(rss_analyzer.run_rss_auto_analysis())
+    assert stats["dropped_links"] == 1
+    assert failed_attempts(db) == {}
+
+    FakePipeline.processed = []
+    stats = asyncio.run(rss_analyzer.run_rss_auto_analysis())
+    assert stats["retried_links"] == 0
+    assert FakePipeline.processed == []
+
+
+def test_successful_retry_clears_failure(db):
+    rss_analyzer.record_link_results(db, {BAD: "fetch: Timeout"}, set(), {BAD: FEEDS["inland"]})
+    assert failed_attempts(db) == {BAD: 1}
+    rss_analyzer.record_link_results(db, {}, {BAD}, {})
+    assert failed_attempts(db) == {}
+
+
+def test_link_stored_elsewhere_is_removed(db):
+    rss_analyzer.record_link_results(db, {BAD: "fetch: Timeout"}, set(), {BAD: FEEDS["inland"]})
+    # Später über einen anderen Feed gespeichert – taucht nicht mehr in der Retry-Liste auf
+    db.add(Article(url=BAD, title="Doch noch da"))
+    db.commit()
+    assert rss_analyzer.record_link_results(db, {}, set(), {}) == 0
+    assert failed_attempts(db) == {}
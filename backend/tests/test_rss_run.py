@@ -0,0 +1,30 @@
+import pytest
+from fastapi.testclient import TestClient
+
+import main
+
+
+@pytest.fixture
+def client(monkeypatch):
+    async def run_rss_auto_analysis():
+        return {"feeds": 0}
+
+    monkeypatch.setattr(main, "run_rss_auto_analysis", run_rss_auto_analysis)
+    monkeypatch.setattr(main, "rss_cycle_running", lambda: False)
+    # Ohne Kontextmanager laufen keine Startup-Hooks (Scheduler, Job-Worker)
+    return TestClient(main.app)
+
+
+def test_manual_trigger_is_off_by_default(client):
+    assert main.RSS_MANUAL_TRIGGER_ENABLED is False
+    assert client.post("/rss/run").status_code == 404
+
+
+def test_manual_trigger_when_enabled(client, monkeypatch):
+    monkeypatch.setattr(main, "RSS_MANUAL_TRIGGER_ENABLED", True)
+    response = client.post("/rss/run")
+    assert response.status_code == 200
+    assert response.json() == {"feeds": 0}
+
+    monkeypatch.setattr(main, "rss_cycle_running", lambda: True)
+    assert client.post("/rss/run").status_code == 409
@@ -0,0 +1,24 @@
+import pytest
+
+import search_index
+from analysis_service import PreparedArticle, store_results
+
+
+@pytest.fixture
+def articles(db):
+    if not search_index.fts_available:
+        pytest.skip("SQLite ohne FTS5")
+    title = 'Impfung <script>alert("x")</script> & Co'
+    body = "Die Impfung wirkt. <img src=x onerror=alert(1)> Mehr zur Impfung im Bericht."
+    store_results(db, [(
+        PreparedArticle(url="https://example.test/xss", text=body),
+        {"label": "uncertain", "confidence": 50, "red_flags": [], "title": title},
+    )])
+
+
+def test_highlights_are_escaped(db, articles):
+    (hit,) = search_index.search(db, "impfung")
+    assert hit["title"] == "<mark>Impfung</mark> &lt;script&gt;alert(&quot;x&quot;)&lt;/script&gt; &amp; Co"
+    assert "<img" not in hit["snippet"]
+    assert "&lt;img src=x onerror=alert(1)&gt;" in hit["snippet"]
+    assert hit["snippet"].count("<mark>") == hit["snippet"].count("</mark>") == 2
@@ -0,0 +1,86 @@
+import asyncio
+
+import pytest
+
+import analysis_service
+from analysis_service import PreparedArticle, classify_article, store_result, store_results, verdict_cache
+from models import Analysis, Article
+from pipeline import AnalysisPipeline
+
+
+def verdict(**overrides):
+    result = {"label": "likely_real", "confidence": 80, "category": "Seriöse Nachricht", "red_flags": []}
+    result.update(overrides)
+    return result
+
+
+def item(i, **overrides):
+    url = f"https://example.test/{i}"
+    return PreparedArticle(url=url, title=f"Artikel {i}", text=f"Text {i}"), verdict(**overrides)
+
+
+def test_batch_stores_all_rows(db):
+    results = store_results(db, [item(i) for i in range(5)])
+    assert all(result["label"] == "likely_real" for result in results)
+    assert db.query(Article).count() == 5
+    assert db.query(Analysis).count() == 5
+
+
+def test_bad_row_only_fails_itself(db):
+    items = [item(i) for i in range(24)]
+    items.insert(10, item("kaputt", red_flags={"nicht", "serialisierbar"}))
+
+    results = store_results(db, items)
+    errors = [i for i, result in enumerate(results) if isinstance(result, Exception)]
+    assert errors == [10]
+    assert isinstance(results[10], TypeError)
+    assert db.query(Article).filter(Article.latest_analysis_id.isnot(None)).count() == 24
+    assert db.query(Article).filter(Article.url == "https://example.test/kaputt").count() == 0
+
+
+def test_fallback_skips_not_modified_without_article(db):
+    missing = PreparedArticle(url="https://example.test/weg", not_modified=True, etag='"x"')
+    items = [item(1), (missing, None), item("kaputt", red_flags={"x"})]
+
+    results = store_results(db, items)
+    assert results[0]["label"] == "likely_real"
+    assert results[1] == {}
+    assert isinstance(results[2], TypeError)
+
+
+def test_pipeline_reports_only_the_bad_row(db):
+    pipeline = AnalysisPipeline()
+    reported = []
+
+    async def on_result(result):
+        reported.append(result)
+
+    pipeline._on_result = on_result
+    batch = [item(i) for i in range(24)] + [item("kaputt", red_flags={"x"})]
+    asyncio.run(pipeline._write_batch(batch))
+
+    assert (pipeline.stats.stored, pipeline.stats.errors) == (24, 1)
+    failed = [r for r in reported if r["status"] == "error"]
+    assert [(r["url"], r["stage"]) for r in failed] == [("https://example.test/kaputt", "store")]
+
+
+@pytest.mark.parametrize("confidence,expected", [("85%", 85), ("hoch", 0), (140, 100)])
+def test_store_result_normalizes_confidence(db, confidence, expected):
+    prepared, result = item("konfidenz", confidence=confidence)
+    store_result(db, prepared, result)
+    assert db.query(Analysis.confidence).scalar() == expected
+
+
+def test_llm_confidence_is_normalized_before_caching(db, monkeypatch):
+    async def call_llm(prompt):
+        return {"label": "likely_real", "confidence": "85%"}, "parsed-ok"
+
+    monkeypatch.setattr(analysis_service, "call_llm", call_llm)
+    features = {"word_count": 3, "fake_trigger_hits": 0, "uncertainty_hits": 0, "emotion_hits": 0, "is_satire_domain": False}
+    prepared = PreparedArticle(url="https://example.test/prozent", title="Prozent", text="Ein kurzer Text", features=features)
+
+    result = asyncio.run(classify_article(prepared))
+    assert result["confidence"] == 85
+    assert asyncio.run(verdict_cache.aget(verdict_cache.key(prepared.text, features)))["confidence"] == 85
+    store_result(db, prepared, result)
+    assert db.query(Analysis.confidence).scalar() == 85
@@ -0,0 +1,35 @@
+import pytest
+
+import trending
+from models import Analysis, TopicRollup, normalize_confidence
+
+
+@pytest.mark.parametrize("value,expected", [
+    (85, 85), (72.9, 72), ("85", 85), ("85%", 85), (" 60 % ", 60), ("0.5", 0),
+    (None, 0), ("", 0), ("hoch", 0), (float("nan"), 0), (float("inf"), 0),
+    (140, 100), (-5, 0),
+])
+def test_confidence_coercion(value, expected):
+    assert normalize_confidence(value) == expected
+
+
+def test_record_survives_non_numeric_confidence(db):
+    trending.record(db, [("Gesundheit", "85%"), ("Gesundheit", 85.0), ("Politik", "unklar"), (None, None)])
+    db.commit()
+
+    rows = {(row.category, row.confidence): row.count for row in db.query(TopicRollup)}
+    assert rows == {("Gesundheit", 85): 2, ("Politik", 0): 1, ("", 0): 1}
+
+
+def test_backfill_agrees_with_record(db):
+    confidences = [72.9, 140, -5, None]
+    db.add_all(Analysis(article_id=i, label="uncertain", category="Politik", confidence=c) for i, c in enumerate(confidences))
+    db.commit()
+    trending.backfill(db)
+    backfilled = {row.confidence: row.count for row in db.query(TopicRollup)}
+
+    db.query(TopicRollup).delete()
+    trending.record(db, [("Politik", c) for c in confidences])
+    db.commit()
+    recorded = {row.confidence: row.count for row in db.query(TopicRollup)}
+    assert backfilled == recorded == {72: 1, 100: 1, 0: 2}
@@ -0,0 +1,102 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+
+import verdict_cache
+from models import VerdictCache
+from verdict_cache import LRUVerdictCache, cache_key
+
+FEATURES = {"word_count": 300, "fake_trigger_hits": 1}
+
+
+def make_cache(**kwargs) -> LRUVerdictCache:
+    params = {"prompt_version": "v1", "model": "llama3", "max_entries": 2, "ttl_seconds": 3600}
+    params.update(kwargs)
+    return LRUVerdictCache(**params)
+
+
+def test_key_ignores_whitespace_but_not_features_version_or_model():
+    base = cache_key("Ein  Text\nmit Umbruch", FEATURES, "v1", "llama3")
+    assert base == cache_key(" Ein Text mit Umbruch ", FEATURES, "v1", "llama3")
+    assert base != cache_key("Ein Text mit Umbruch", {**FEATURES, "fake_trigger_hits": 2}, "v1", "llama3")
+    assert base != cache_key("Ein Text mit Umbruch", FEATURES, "v2", "llama3")
+    assert base != cache_key("Ein Text mit Umbruch", FEATURES, "v1", "mistral")
+
+
+def test_memory_lru_evicts_least_recently_used(db):
+    cache = make_cache()
+    cache.put("a", {"label": "likely_real"})
+    cache.put("b", {"label": "uncertain"})
+    assert cache.get("a") == {"label": "likely_real"}   # a wird zuletzt benutzt
+    cache.put("c", {"label": "likely_fake"})
+
+    assert list(cache._memory) == ["a", "c"]
+    # b ist nur aus dem Speicher verdrängt, SQLite hat es noch
+    assert cache.get("b") == {"label": "uncertain"}
+    assert cache.memory_hits == 1
+    assert cache.db_hits == 1
+
+
+def test_returned_verdicts_are_copies(db):
+    cache = make_cache()
+    cache.put("a", {"label": "likely_real"})
+    cache.get("a")["label"] = "verändert"
+    assert cache.get("a") == {"label": "likely_real"}
+
+
+def test_memory_entry_expires_after_ttl(db, monkeypatch):
+    cache = make_cache(ttl_seconds=10)
+    now = [1_000_000.0]
+    monkeypatch.setattr(verdict_cache.time, "time", lambda: now[0])
+
+    cache._remember("a", {"label": "likely_real"})
+    now[0] += 5
+    assert cache._memory_get("a") is not None
+    now[0] += 6
+    assert cache._memory_get("a") is None
+    assert "a" not in cache._memory
+    assert cache.expired == 1
+
+
+def test_expired_db_row_is_deleted_on_read(db):
+    cache = make_cache(ttl_seconds=60)
+    db.add(VerdictCache(
+        key="old", prompt_version="v1", model="llama3", verdict='{"label": "uncertain"}',
+        created_at=datetime.now(timezone.utc) - timedelta(seconds=120),
+    ))
+    db.commit()
+
+    assert cache.get("old") is None
+    assert cache.expired == 1
+    assert cache.misses == 1
+    db.expire_all()
+    assert db.get(VerdictCache, "old") is None
+
+
+def test_rows_of_other_prompt_version_are_ignored_and_invalidated(db):
+    old = make_cache(prompt_version="v1")
+    old.put("k", {"label": "likely_fake"})
+    old.put("keep", {"label": "likely_real"})
+
+    new = make_cache(prompt_version="v2")
+    assert new.get("k") is None
+
+    # Nur die Einträge der alten Version werden gelöscht
+    new.put("keep", {"label": "likely_real"})
+    assert new.invalidate() == 1
+    db.expire_all()
+    assert [row.key for row in db.query(VerdictCache)] == ["keep"]
+    assert new._memory == {}
+
+
+def test_async_roundtrip_goes_through_sqlite(db):
+    writer = make_cache()
+    reader = make_cache()
+
+    async def roundtrip():
+        await writer.aput("k", {"label": "uncertain", "confidence": 55})
+        return await reader.aget("k"), await reader.aget("k")
+
+    first, second = asyncio.run(roundtrip())
+    assert first == second == {"label": "uncertain", "confidence": 55}
+    assert (reader.db_hits, reader.memory_hits) == (1, 1)
+    assert reader.stats()["hit_rate"] == 1.0
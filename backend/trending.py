@@ -0,0 +1,96 @@
+import sys
+import time
+from collections import Counter
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import func, text
+from sqlalchemy.dialects.sqlite import insert
+
+from http_pool import env_float
+from models import TopicRollup, normalize_confidence
+
+TRENDING_CACHE_TTL = env_float("TRENDING_CACHE_TTL", 30.0)   # Sekunden
+
+_cache: Dict[tuple, Tuple[float, List[dict]]] = {}
+
+
+def _today() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%d")
+
+
+# ---------- Schreibpfad ----------
+def record(db, verdicts: Iterable[Tuple[Optional[str], Optional[float]]]):
+    """Zählt neue Analysen (category, confidence) in die Tages-Rollups – gleiche Transaktion wie der Insert."""
+    day = _today()
+    counts = Counter((category or "", normalize_confidence(confidence)) for category, confidence in verdicts)
+    if not counts:
+        return
+
+    stmt = insert(TopicRollup).values([
+        {"day": day, "category": category, "confidence": confidence, "count": n}
+        for (category, confidence), n in counts.items()
+    ])
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["day", "category", "confidence"],
+        set_={"count": TopicRollup.count + stmt.excluded.count},
+    )
+    db.execute(stmt)
+
+
+def backfill(db) -> int:
+    """Baut die Rollups komplett aus der analysis-Tabelle neu auf."""
+    db.query(TopicRollup).delete(synchronize_session=False)
+    db.execute(text(
+        "INSERT INTO topic_rollups (day, category, confidence, count) "
+        "SELECT date(created_at), COALESCE(category, ''), MAX(0, MIN(100, CAST(COALESCE(confidence, 0) AS INTEGER))), COUNT(*) "
+        "FROM analysis WHERE created_at IS NOT NULL "
+        "GROUP BY 1, 2, 3"
+    ))
+    db.commit()
+    _cache.clear()
+    return db.query(func.count(TopicRollup.id)).scalar()
+
+
+# ---------- Lesen ----------
+def trending(db, days: int = 3, min_conf: int = 70, limit: int = 10) -> List[dict]:
+    """Top-Kategorien der letzten `days` Kalendertage (inkl. heute) aus den Rollups."""
+    days = max(1, days)
+    key = (_today(), days, min_conf, limit)
+    cached = _cache.get(key)
+    if cached is not None and time.monotonic() - cached[0] < TRENDING_CACHE_TTL:
+        return cached[1]
+
+    since = (datetime.now(timezone.utc) - timedelta(days=days - 1)).strftime("%Y-%m-%d")
+    total = func.sum(TopicRollup.count)
+    rows = (
+        db.query(TopicRollup.category, total.label("count"))
+        .filter(TopicRollup.day >= since, TopicRollup.confidence >= min_conf)
+        .group_by(TopicRollup.category)
+        .order_by(total.desc())
+        .limit(limit)
+        .all()
+    )
+    result = [
+        {"topic": category or "Unbekannt", "count": int(count)}
+        for category, count in rows
+    ]
+
+    if len(_cache) > 256:
+        _cache.clear()
+    _cache[key] = (time.monotonic(), result)
+    return result
+
+
+if __name__ == "__main__":
+    # python trending.py --backfill
+    from db import SessionLocal
+
+    if "--backfill" not in sys.argv:
+        print("Aufruf: python trending.py --backfill")
+        sys.exit(1)
+    db = SessionLocal()
+    try:
+        print(f"✅ Trending-Rollups neu aufgebaut: {backfill(db)} Zeilen")
+    finally:
+        db.close()
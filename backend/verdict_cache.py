@@ -0,0 +1,210 @@
+import hashlib
+import json
+import logging
+import re
+import time
+import unicodedata
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional
+
+from db import SessionLocal, run_db
+from http_pool import env_bool, env_int
+from models import VerdictCache
+
+log = logging.getLogger(__name__)
+
+VERDICT_CACHE_ENABLED = env_bool("VERDICT_CACHE_ENABLED", True)
+VERDICT_CACHE_SIZE = env_int("VERDICT_CACHE_SIZE", 2048)
+VERDICT_CACHE_TTL = env_int("VERDICT_CACHE_TTL", 7 * 24 * 3600)  # Sekunden
+
+_WS_RE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFC", text or "")
+    return _WS_RE.sub(" ", text).strip()
+
+
+def cache_key(text: str, features: dict, prompt_version: str, model: str) -> str:
+    h = hashlib.sha256()
+    for part in (
+        normalize_text(text),
+        json.dumps(features, sort_keys=True, ensure_ascii=False),
+        prompt_version,
+        model,
+    ):
+        h.update(part.encode("utf-8"))
+        h.update(b"\x00")
+    return h.hexdigest()
+
+
+class LRUVerdictCache:
+    """Zweistufiger Cache für LLM-Urteile: In-Memory-LRU vor SQLite-Tabelle."""
+
+    def __init__(self, prompt_version: str, model: str, max_entries: int, ttl_seconds: int):
+        self.prompt_version = prompt_version
+        self.model = model
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+
+        self._memory: "OrderedDict[str, tuple[float, Dict[str, Any]]]" = OrderedDict()
+
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.expired = 0
+
+    def key(self, text: str, features: dict) -> str:
+        return cache_key(text, features, self.prompt_version, self.model)
+
+    # ---------- Lesen ----------
+    def _memory_get(self, key: str) -> Optional[Dict[str, Any]]:
+        entry = self._memory.get(key)
+        if entry is None:
+            return None
+        stored_at, verdict = entry
+        if time.time() - stored_at <= self.ttl_seconds:
+            self._memory.move_to_end(key)
+            self.memory_hits += 1
+            return dict(verdict)
+        self._memory.pop(key, None)
+        self.expired += 1
+        return None
+
+    def _found(self, key: str, verdict: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        if verdict is None:
+            self.misses += 1
+            return None
+        self.db_hits += 1
+        self._remember(key, verdict)
+        return dict(verdict)
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        if not VERDICT_CACHE_ENABLED:
+            return None
+        verdict = self._memory_get(key)
+        if verdict is not None:
+            return verdict
+
+        db = SessionLocal()
+        try:
+            return self._found(key, self._db_get(db, key))
+        finally:
+            db.close()
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        # Wie get, die SQLite-Stufe läuft aber im DB-Thread-Pool
+        if not VERDICT_CACHE_ENABLED:
+            return None
+        verdict = self._memory_get(key)
+        if verdict is not None:
+            return verdict
+        return self._found(key, await run_db(self._db_get, key))
+
+    def _db_get(self, db, key: str) -> Optional[Dict[str, Any]]:
+        try:
+            row = db.get(VerdictCache, key)
+            if row is None:
+                return None
+            if row.prompt_version != self.prompt_version or row.model != self.model:
+                return None
+            if self._is_expired(row.created_at):
+                db.delete(row)
+                db.commit()
+                self.expired += 1
+                return None
+            return json.loads(row.verdict)
+        except Exception as e:
+            log.error(f"VERDICT CACHE LESEFEHLER: {e}")
+            return None
+
+    def _is_expired(self, created_at: Optional[datetime]) -> bool:
+        if created_at is None:
+            return True
+        if created_at.tzinfo is None:
+            created_at = created_at.replace(tzinfo=timezone.utc)
+        return datetime.now(timezone.utc) - created_at > timedelta(seconds=self.ttl_seconds)
+
+    # ---------- Schreiben ----------
+    def put(self, key: str, verdict: Dict[str, Any]):
+        if not VERDICT_CACHE_ENABLED:
+            return
+        self._remember(key, verdict)
+        self.stores += 1
+
+        db = SessionLocal()
+        try:
+            self._db_put(db, key, verdict)
+        finally:
+            db.close()
+
+    async def aput(self, key: str, verdict: Dict[str, Any]):
+        if not VERDICT_CACHE_ENABLED:
+            return
+        self._remember(key, verdict)
+        self.stores += 1
+        await run_db(self._db_put, key, verdict)
+
+    def _db_put(self, db, key: str, verdict: Dict[str, Any]):
+        try:
+            db.merge(VerdictCache(
+                key=key,
+                prompt_version=self.prompt_version,
+                model=self.model,
+                verdict=json.dumps(verdict, ensure_ascii=False),
+                created_at=datetime.now(timezone.utc),
+            ))
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            log.error(f"VERDICT CACHE SCHREIBFEHLER: {e}")
+
+    def _remember(self, key: str, verdict: Dict[str, Any]):
+        self._memory[key] = (time.time(), dict(verdict))
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    # ---------- Invalidierung ----------
+    def invalidate(self, everything: bool = False) -> int:
+        """Löscht Einträge anderer Prompt-Versionen/Modelle und abgelaufene Einträge."""
+        self._memory.clear()
+
+        db = SessionLocal()
+        try:
+            query = db.query(VerdictCache)
+            if not everything:
+                cutoff = datetime.now(timezone.utc) - timedelta(seconds=self.ttl_seconds)
+                query = query.filter(
+                    (VerdictCache.prompt_version != self.prompt_version)
+                    | (VerdictCache.model != self.model)
+                    | (VerdictCache.created_at < cutoff)
+                )
+            deleted = query.delete(synchronize_session=False)
+            db.commit()
+        finally:
+            db.close()
+
+        if deleted:
+            log.info(f"VERDICT CACHE: {deleted} Einträge invalidiert")
+        return deleted
+
+    def stats(self) -> dict:
+        lookups = self.memory_hits + self.db_hits + self.misses
+        hits = self.memory_hits + self.db_hits
+        return {
+            "enabled": VERDICT_CACHE_ENABLED,
+            "prompt_version": self.prompt_version,
+            "model": self.model,
+            "memory_entries": len(self._memory),
+            "max_entries": self.max_entries,
+            "ttl_seconds": self.ttl_seconds,
+            "memory_hits": self.memory_hits,
+            "db_hits": self.db_hits,
+            "misses": self.misses,
+            "stores": self.stores,
+            "expired": self.expired,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
@@ -23,24 +23,68 @@ type AnalysisResult = {
 
 
 
+type StreamEvent =
+  | { type: "stage"; stage: string }
+  | { type: "article"; title: string; word_count: number; excerpt: string }
+  | { type: "fields"; fields: Partial<AnalysisResult> }
+  | { type: "result"; result: AnalysisResult }
+  | { type: "error"; detail: string };
+
+const STAGE_LABELS: Record<string, string> = {
+  fetch: "Lade Artikel...",
+  classify: "Analysiere...",
+  store: "Speichere...",
+};
+
 export default function AnalyzePage() {
   const [url, setUrl] = useState("");
-  const [result, setResult] = useState<AnalysisResult | null>(null);
+  const [result, setResult] = useState<Partial<AnalysisResult> | null>(null);
+  const [stage, setStage] = useState<string | null>(null);
 
   const mutation = useMutation({
     mutationFn: async (targetUrl: string) => {
-      const res = await fetch(`${API_URL}/analyze`, {
+      setResult(null);
+      const res = await fetch(`${API_URL}/analyze/stream`, {
         method: "POST",
         headers: { "Content-Type": "application/json; charset=utf-8" },
         body: JSON.stringify({ url: targetUrl }),
       });
-      if (!res.ok) {
+      if (!res.ok || !res.body) {
         const text = await res.text();
         throw new Error(text || "Analyse fehlgeschlagen");
       }
-      return (await res.json()) as AnalysisResult;
+
+      // NDJSON: Teilergebnisse anzeigen, sobald sie eintreffen
+      const reader = res.body.getReader();
+      const decoder = new TextDecoder();
+      let buffer = "";
+      let final: AnalysisResult | null = null;
+
+      for (;;) {
+        const { done, value } = await reader.read();
+        if (done) break;
+        buffer += decoder.decode(value, { stream: true });
+        const lines = buffer.split("\n");
+        buffer = lines.pop() ?? "";
+
+        for (const line of lines) {
+          if (!line.trim()) continue;
+          const event = JSON.parse(line) as StreamEvent;
+          if (event.type === "stage") setStage(event.stage);
+          else if (event.type === "article") {
+            const { title, word_count, excerpt } = event;
+            setResult((prev) => ({ ...prev, title, word_count, excerpt }));
+          } else if (event.type === "fields") setResult((prev) => ({ ...prev, ...event.fields }));
+          else if (event.type === "result") final = event.result;
+          else if (event.type === "error") throw new Error(event.detail || "Analyse fehlgeschlagen");
+        }
+      }
+
+      if (!final) throw new Error("Analyse fehlgeschlagen");
+      return final;
     },
     onSuccess: (data) => setResult(data),
+    onSettled: () => setStage(null),
   });
 
   return (
@@ -72,7 +116,7 @@ export default function AnalyzePage() {
             type="submit"
             disabled={mutation.isPending}
           >
-            {mutation.isPending ? "Analysiere..." : "Analysieren"}
+            {mutation.isPending ? (stage && STAGE_LABELS[stage]) || "Analysiere..." : "Analysieren"}
           </button>
         </form>
 
@@ -87,7 +131,7 @@ export default function AnalyzePage() {
               </div>
               <div className="text-right">
                 <p className="text-xs uppercase text-slate-400">Konfidenz</p>
-                <p className="text-xl font-bold">{result.confidence}%</p>
+                <p className="text-xl font-bold">{result.confidence ?? "…"}%</p>
               </div>
             </div>
 
@@ -101,22 +145,22 @@ export default function AnalyzePage() {
 
             <p className="text-sm text-slate-200">{result.excerpt}</p>
 
-            {result.red_flags?.length > 0 && (
+            {(result.red_flags?.length ?? 0) > 0 && (
               <div>
                 <p className="text-xs uppercase text-slate-400 mb-1">Auffälligkeiten</p>
                 <ul className="list-disc list-inside text-sm text-slate-300 space-y-1">
-                  {result.red_flags.map((f, i) => (
+                  {result.red_flags?.map((f, i) => (
                     <li key={i}>{f}</li>
                   ))}
                 </ul>
               </div>
             )}
 
-            {result.suggested_counter_sources?.length > 0 && (
+            {(result.suggested_counter_sources?.length ?? 0) > 0 && (
               <div>
                 <p className="text-xs uppercase text-slate-400 mb-1">Gegenprüfung</p>
                 <ul className="list-disc list-inside text-sm text-slate-300 space-y-1">
-                  {result.suggested_counter_sources.map((s, i) => (
+                  {result.suggested_counter_sources?.map((s, i) => (
                     <li key={i}>
                       <a className="underline text-sky-400" href={s} target="_blank" rel="noreferrer">
                         {s}
@@ -1,12 +1,19 @@
+import asyncio
+import hashlib
 import json
 import os
 import re
-from typing import Any, Dict, Optional
+import time
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
 
 import httpx
 from fastapi import FastAPI, HTTPException
+from fastapi.responses import PlainTextResponse, StreamingResponse
 from pydantic import BaseModel
 
+import metrics
+
 app = FastAPI(title="FakeNewsGuard LLM Gateway", version="0.3.0")
 
 LLM_MODE = (os.environ.get("LLM_MODE") or "ollama").lower()
@@ -15,6 +22,29 @@ LLM_MODEL = os.environ.get("LLM_MODEL") or "llama3"
 
 HTTP_TIMEOUT = httpx.Timeout(300.0, connect=20.0, read=300.0, write=60.0)
 
+# Streaming: Token-Stream von Ollama lesen und abbrechen, sobald das JSON-Objekt geschlossen ist
+LLM_STREAM = (os.environ.get("LLM_STREAM") or "0").lower() in ("1", "true", "yes", "on")
+
+OLLAMA_MAX_CONNECTIONS = int(os.environ.get("OLLAMA_MAX_CONNECTIONS") or 8)
+OLLAMA_MAX_KEEPALIVE = int(os.environ.get("OLLAMA_MAX_KEEPALIVE") or 8)
+OLLAMA_KEEPALIVE_EXPIRY = float(os.environ.get("OLLAMA_KEEPALIVE_EXPIRY") or 120.0)
+
+HTTP_LIMITS = httpx.Limits(
+    max_connections=OLLAMA_MAX_CONNECTIONS,
+    max_keepalive_connections=OLLAMA_MAX_KEEPALIVE,
+    keepalive_expiry=OLLAMA_KEEPALIVE_EXPIRY,
+)
+
+# Admission Control: max. parallele Generierungen, begrenzte Warteschlange
+OLLAMA_MAX_CONCURRENCY = int(os.environ.get("OLLAMA_MAX_CONCURRENCY") or 2)
+OLLAMA_MAX_QUEUE = int(os.environ.get("OLLAMA_MAX_QUEUE") or 16)
+OLLAMA_QUEUE_TIMEOUT = float(os.environ.get("OLLAMA_QUEUE_TIMEOUT") or 120.0)
+RETRY_AFTER_SECONDS = int(os.environ.get("RETRY_AFTER_SECONDS") or 10)
+
+# Langlebiger Pool zu Ollama, wird in startup/shutdown verwaltet
+_client: Optional[httpx.AsyncClient] = None
+_pool_stats = {"requests_total": 0, "in_flight": 0, "waits": 0, "errors": 0}
+
 SYSTEM_PROMPT = """Du bist FakeNewsGuard, ein Tool zur Einschätzung von Desinformation.
 
 Du bekommst:
@@ -118,23 +148,403 @@ def _extract_json_from_text(s: str) -> Optional[Dict[str, Any]]:
     return None
 
 
-async def _call_ollama(text: str) -> str:
-    url = f"{LLM_BASE_URL}/api/generate"
-    payload = {
+def _parse_response(raw: str) -> Optional[Dict[str, Any]]:
+    with metrics.extract_json_seconds.time():
+        parsed = _extract_json_from_text(raw)
+    if parsed is None:
+        metrics.parse_failures_total.inc()
+    return parsed
+
+
+def _ollama_payload(text: str, stream: bool) -> dict:
+    return {
         "model": LLM_MODEL,
         "prompt": f"{SYSTEM_PROMPT}\n\nTEXT:\n{text}\n",
-        "stream": False,
+        "stream": stream,
         "format": "json",
         "options": {
             "temperature": 0.2,
             "num_predict": 250,
         },
     }
-    async with httpx.AsyncClient(timeout=HTTP_TIMEOUT) as client:
-        r = await client.post(url, json=payload)
+
+
+async def _call_ollama(text: str) -> str:
+    if LLM_STREAM:
+        return await _call_ollama_streaming(text)
+
+    url = f"{LLM_BASE_URL}/api/generate"
+    payload = _ollama_payload(text, stream=False)
+
+    if _pool_stats["in_flight"] >= OLLAMA_MAX_CONNECTIONS:
+        _pool_stats["waits"] += 1
+
+    _pool_stats["requests_total"] += 1
+    _pool_stats["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        r = await _get_client().post(url, json=payload)
         r.raise_for_status()
         data = r.json()
-        return (data.get("response") or "").strip()
+    except httpx.HTTPError:
+        _pool_stats["errors"] += 1
+        raise
+    finally:
+        _pool_stats["in_flight"] -= 1
+        metrics.upstream_seconds.observe(time.perf_counter() - started, "generate")
+
+    return (data.get("response") or "").strip()
+
+
+# ---------- Streaming ----------
+class _JsonObjectScanner:
+    """Verfolgt das erste JSON-Objekt im Token-Stream.
+
+    Liefert nach jedem Chunk die neu vollständigen Top-Level-Felder und
+    merkt sich, wann das Objekt geschlossen ist.
+    """
+
+    def __init__(self):
+        self.text = ""
+        self.fields: Dict[str, Any] = {}
+        self.closed = False
+        self._pos = 0
+        self._start = -1
+        self._end = -1
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    @property
+    def raw(self) -> str:
+        if self._start >= 0 and self._end >= 0:
+            return self.text[self._start : self._end + 1]
+        return self.text.strip()
+
+    def feed(self, chunk: str) -> Dict[str, Any]:
+        self.text += chunk
+        new: Dict[str, Any] = {}
+
+        while self._pos < len(self.text) and not self.closed:
+            ch = self.text[self._pos]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+            elif self._start < 0:
+                if ch == "{":
+                    self._start = self._pos
+                    self._depth = 1
+            elif ch == '"':
+                self._in_string = True
+            elif ch in "{[":
+                self._depth += 1
+            elif ch in "}]":
+                self._depth -= 1
+                if self._depth == 0:
+                    self._end = self._pos
+                    self.closed = True
+                    new.update(self._new_fields(self.text[self._start : self._pos + 1]))
+            elif ch == "," and self._depth == 1:
+                # Ein Top-Level-Wert ist fertig → bisherigen Stand parsen
+                new.update(self._new_fields(self.text[self._start : self._pos] + "}"))
+            self._pos += 1
+
+        return new
+
+    def _new_fields(self, candidate: str) -> Dict[str, Any]:
+        try:
+            parsed = json.loads(candidate)
+        except Exception:
+            return {}
+        if not isinstance(parsed, dict):
+            return {}
+        new = {k: v for k, v in parsed.items() if self.fields.get(k, object()) != v}
+        self.fields.update(new)
+        return new
+
+
+_stream_stats = {"streams": 0, "early_stops": 0}
+
+
+async def _stream_ollama(text: str) -> AsyncIterator[Tuple[str, Any]]:
+    """Liefert ("fields", {...}) für neue Felder und zum Schluss ("raw", text)."""
+    url = f"{LLM_BASE_URL}/api/generate"
+    payload = _ollama_payload(text, stream=True)
+    scanner = _JsonObjectScanner()
+
+    _stream_stats["streams"] += 1
+    _pool_stats["requests_total"] += 1
+    _pool_stats["in_flight"] += 1
+    started = time.perf_counter()
+    try:
+        async with _get_client().stream("POST", url, json=payload) as r:
+            r.raise_for_status()
+            async for line in r.aiter_lines():
+                if not line.strip():
+                    continue
+                data = json.loads(line)
+                if data.get("error"):
+                    raise HTTPException(status_code=502, detail=f"LLM stream error: {data['error']}")
+
+                new = scanner.feed(data.get("response") or "")
+                if new:
+                    yield "fields", new
+                if scanner.closed:
+                    # Objekt vollständig: Verbindung schließen beendet die Generierung
+                    if not data.get("done"):
+                        _stream_stats["early_stops"] += 1
+                    break
+                if data.get("done"):
+                    break
+    except httpx.HTTPError:
+        _pool_stats["errors"] += 1
+        raise
+    finally:
+        _pool_stats["in_flight"] -= 1
+        metrics.upstream_seconds.observe(time.perf_counter() - started, "stream")
+
+    yield "raw", scanner.raw
+
+
+async def _call_ollama_streaming(text: str) -> str:
+    raw = ""
+    async for kind, value in _stream_ollama(text):
+        if kind == "raw":
+            raw = value
+    return raw
+
+
+def _get_client() -> httpx.AsyncClient:
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(timeout=HTTP_TIMEOUT, limits=HTTP_LIMITS)
+    return _client
+
+
+# ---------- Single-Flight + Admission Control ----------
+_ollama_slots = asyncio.Semaphore(OLLAMA_MAX_CONCURRENCY)
+_inflight: Dict[str, asyncio.Task] = {}
+_queue_waiting = 0
+_admission_stats = {
+    "upstream_calls": 0,
+    "coalesced": 0,
+    "rejected_queue_full": 0,
+    "rejected_queue_timeout": 0,
+}
+
+
+def _prompt_key(text: str) -> str:
+    return hashlib.sha256(f"{LLM_MODEL}\x00{text}".encode("utf-8")).hexdigest()
+
+
+def _saturated(status_code: int, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status_code,
+        detail=detail,
+        headers={"Retry-After": str(RETRY_AFTER_SECONDS)},
+    )
+
+
+def _queue_full() -> bool:
+    return _ollama_slots.locked() and _queue_waiting >= OLLAMA_MAX_QUEUE
+
+
+@asynccontextmanager
+async def _ollama_slot():
+    global _queue_waiting
+
+    started = time.perf_counter()
+    if not _ollama_slots.locked():
+        # Slot frei: acquire() kehrt ohne Warten zurück
+        await _ollama_slots.acquire()
+    else:
+        if _queue_full():
+            _admission_stats["rejected_queue_full"] += 1
+            raise _saturated(429, "LLM ausgelastet, Warteschlange voll")
+
+        _queue_waiting += 1
+        try:
+            await asyncio.wait_for(_ollama_slots.acquire(), timeout=OLLAMA_QUEUE_TIMEOUT)
+        except asyncio.TimeoutError:
+            _admission_stats["rejected_queue_timeout"] += 1
+            raise _saturated(503, "LLM ausgelastet, Wartezeit überschritten")
+        finally:
+            _queue_waiting -= 1
+
+    metrics.queue_wait_seconds.observe(time.perf_counter() - started)
+    try:
+        _admission_stats["upstream_calls"] += 1
+        yield
+    finally:
+        _ollama_slots.release()
+
+
+async def _admitted_call_ollama(text: str) -> str:
+    async with _ollama_slot():
+        return await _call_ollama(text)
+
+
+def _forget_inflight(key: str, task: asyncio.Task):
+    _inflight.pop(key, None)
+    # Exception als abgeholt markieren, falls alle Wartenden abgebrochen haben
+    if not task.cancelled():
+        task.exception()
+
+
+async def _single_flight_call(text: str) -> str:
+    # Identische Prompts teilen sich einen Upstream-Call. Der Call läuft als
+    # eigener Task, damit ein abbrechender Client die anderen nicht mitreißt.
+    key = _prompt_key(text)
+    task = _inflight.get(key)
+    if task is None:
+        task = asyncio.create_task(_admitted_call_ollama(text))
+        _inflight[key] = task
+        task.add_done_callback(lambda t: _forget_inflight(key, t))
+    else:
+        _admission_stats["coalesced"] += 1
+    return await asyncio.shield(task)
+
+
+class _StreamFlight:
+    """Ein laufender Stream-Call zu Ollama, den identische /classify/stream-Anfragen mitlesen.
+
+    Der Call läuft als eigener Task; jeder Leser bekommt die bisherigen
+    fields-Events nachgeliefert und danach die neuen.
+    """
+
+    def __init__(self):
+        self.fields: List[Dict[str, Any]] = []
+        self.raw = ""
+        self.error: Optional[Exception] = None
+        self.done = False
+        self.task: Optional[asyncio.Task] = None
+        self._changed = asyncio.Condition()
+
+    async def _publish(self, fields: Optional[Dict[str, Any]] = None, done: bool = False):
+        async with self._changed:
+            if fields:
+                self.fields.append(fields)
+            self.done = self.done or done
+            self._changed.notify_all()
+
+    async def run(self, text: str):
+        try:
+            async with _ollama_slot():
+                async for kind, value in _stream_ollama(text):
+                    if kind == "fields":
+                        await self._publish(value)
+                    else:
+                        self.raw = value
+        except Exception as e:
+            self.error = e
+        finally:
+            await self._publish(done=True)
+
+    async def follow(self) -> AsyncIterator[Dict[str, Any]]:
+        seen = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: len(self.fields) > seen or self.done)
+                new, done = self.fields[seen:], self.done
+            seen += len(new)
+            for fields in new:
+                yield fields
+            if done:
+                return
+
+
+_inflight_streams: Dict[str, _StreamFlight] = {}
+
+
+def _start_stream_flight(key: str, text: str) -> _StreamFlight:
+    flight = _StreamFlight()
+    _inflight_streams[key] = flight
+
+    def forget(_task: asyncio.Task):
+        if _inflight_streams.get(key) is flight:
+            del _inflight_streams[key]
+
+    flight.task = asyncio.create_task(flight.run(text))
+    flight.task.add_done_callback(forget)
+    return flight
+
+
+def _stream_error(e: Exception) -> dict:
+    if isinstance(e, HTTPException):
+        metrics.requests_total.inc("classify_stream", "rejected" if e.status_code in (429, 503) else "upstream_error")
+        event = {"type": "error", "status": e.status_code, "detail": e.detail}
+        if e.headers and "Retry-After" in e.headers:
+            event["retry_after"] = e.headers["Retry-After"]
+        return event
+    metrics.requests_total.inc("classify_stream", "upstream_error")
+    return {"type": "error", "status": 502, "detail": f"LLM request failed: {type(e).__name__}"}
+
+
+@app.on_event("startup")
+async def startup():
+    _get_client()
+
+
+@app.on_event("shutdown")
+async def shutdown():
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
+
+
+@app.get("/stats/pool")
+async def pool_stats():
+    # httpx legt den httpcore-Pool nicht offiziell offen
+    pool = getattr(getattr(_client, "_transport", None), "_pool", None)
+    connections = list(getattr(pool, "connections", []) or [])
+    idle = sum(1 for c in connections if c.is_idle())
+
+    return {
+        "max_connections": OLLAMA_MAX_CONNECTIONS,
+        "max_keepalive_connections": OLLAMA_MAX_KEEPALIVE,
+        "connections": len(connections),
+        "in_use": len(connections) - idle,
+        "idle": idle,
+        **_pool_stats,
+    }
+
+
+@app.get("/stats/admission")
+async def admission_stats():
+    return {
+        "max_concurrency": OLLAMA_MAX_CONCURRENCY,
+        "max_queue": OLLAMA_MAX_QUEUE,
+        "queue_timeout": OLLAMA_QUEUE_TIMEOUT,
+        "queue_waiting": _queue_waiting,
+        "inflight_prompts": len(_inflight) + len(_inflight_streams),
+        **_admission_stats,
+        **_stream_stats,
+    }
+
+
+# Vorhandene Zähler werden erst beim Scrape gelesen
+metrics.CallbackMetric("fng_gateway_queue_waiting", "Anfragen in der Warteschlange vor Ollama", "gauge",
+                       lambda: _queue_waiting)
+metrics.CallbackMetric("fng_gateway_upstream_in_flight", "Laufende Requests zu Ollama", "gauge",
+                       lambda: _pool_stats["in_flight"])
+metrics.CallbackMetric("fng_gateway_inflight_prompts", "Verschiedene Prompts in Bearbeitung (Single-Flight)", "gauge",
+                       lambda: len(_inflight) + len(_inflight_streams))
+metrics.CallbackMetric("fng_gateway_admission_total", "Admission Control: upstream, coalesced, rejected_*", "counter",
+                       lambda: {(k,): v for k, v in _admission_stats.items()}, ("outcome",))
+metrics.CallbackMetric("fng_gateway_upstream_errors_total", "Transportfehler zu Ollama", "counter",
+                       lambda: _pool_stats["errors"])
+metrics.CallbackMetric("fng_gateway_early_stops_total", "Streams nach geschlossenem JSON-Objekt abgebrochen", "counter",
+                       lambda: _stream_stats["early_stops"])
+
+
+@app.get("/metrics")
+async def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type=metrics.CONTENT_TYPE)
 
 
 @app.get("/health")
@@ -156,16 +566,71 @@ async def classify(req: LLMRequest):
     try:
         if LLM_MODE != "ollama":
             raise HTTPException(status_code=400, detail="Nur LLM_MODE=ollama ist in diesem Prototyp aktiviert")
-        raw = await _call_ollama(text)
+        raw = await _single_flight_call(text)
+    except HTTPException as e:
+        if e.status_code in (429, 503):
+            metrics.requests_total.inc("classify", "rejected")
+        raise
     except httpx.HTTPStatusError as e:
         body = ""
         try:
             body = e.response.text[:500]
         except Exception:
             pass
+        metrics.requests_total.inc("classify", "upstream_error")
         raise HTTPException(status_code=502, detail=f"LLM HTTP {e.response.status_code}: {body}")
     except httpx.HTTPError as e:
+        metrics.requests_total.inc("classify", "upstream_error")
         raise HTTPException(status_code=502, detail=f"LLM request failed: {type(e).__name__}")
 
-    parsed = _extract_json_from_text(raw)
+    parsed = _parse_response(raw)
+    metrics.requests_total.inc("classify", "ok" if parsed is not None else "no_json")
     return LLMResponse(raw=raw, parsed=parsed)
+
+
+@app.post("/classify/stream")
+async def classify_stream(req: LLMRequest):
+    """NDJSON-Stream: {"type": "fields"} für jedes fertige Feld, dann {"type": "result"}.
+
+    Identische Prompts teilen sich einen Upstream-Call: ein laufender Stream
+    wird mitgelesen (inkl. bereits gelieferter Felder), ein laufender
+    /classify-Call liefert nur das Ergebnis.
+    """
+    text = (req.text or "").strip()
+    if not text:
+        raise HTTPException(status_code=400, detail="text ist leer")
+    if LLM_MODE != "ollama":
+        raise HTTPException(status_code=400, detail="Nur LLM_MODE=ollama ist in diesem Prototyp aktiviert")
+
+    key = _prompt_key(text)
+    flight = _inflight_streams.get(key)
+    task = _inflight.get(key) if flight is None else None
+    if flight is None and task is None:
+        if _queue_full():
+            _admission_stats["rejected_queue_full"] += 1
+            metrics.requests_total.inc("classify_stream", "rejected")
+            raise _saturated(429, "LLM ausgelastet, Warteschlange voll")
+        flight = _start_stream_flight(key, text)
+    else:
+        _admission_stats["coalesced"] += 1
+
+    async def events():
+        if flight is None:
+            try:
+                raw = await asyncio.shield(task)
+            except Exception as e:
+                yield json.dumps(_stream_error(e), ensure_ascii=False) + "\n"
+                return
+        else:
+            async for fields in flight.follow():
+                yield json.dumps({"type": "fields", "fields": fields}, ensure_ascii=False) + "\n"
+            if flight.error is not None:
+                yield json.dumps(_stream_error(flight.error), ensure_ascii=False) + "\n"
+                return
+            raw = flight.raw
+
+        parsed = _parse_response(raw)
+        metrics.requests_total.inc("classify_stream", "ok" if parsed is not None else "no_json")
+        yield json.dumps({"type": "result", "raw": raw, "parsed": parsed}, ensure_ascii=False) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
@@ -0,0 +1,215 @@
+"""Prometheus-Metriken (Text-Format 0.0.4) ohne zusätzliche Abhängigkeit.
+
+Gleicher Exporter wie backend/metrics.py – Gateway und Backend werden
+getrennt gebaut, deshalb als Kopie; nur die Metriken unten unterscheiden sich.
+
+Bewusst minimal: Counter, Gauge, Histogram mit festen Label-Namen und
+Callback-Metriken, die vorhandene Zähler (Pools, Caches) beim Scrape
+auslesen statt sie doppelt zu führen. observe()/inc() kosten ein Lock und
+ein paar Additionen – klein genug, um im Betrieb an zu bleiben.
+"""
+import bisect
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Sequence, Tuple, Union
+
+METRICS_ENABLED = (os.environ.get("METRICS_ENABLED") or "1").lower() in ("1", "true", "yes", "on")
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Sekunden: von Cache-Treffern (ms) bis zu langsamen LLM-Antworten (min)
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+LabelValues = Tuple[str, ...]
+
+_registry: List["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(str(v))}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labels)
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labelvalues: Sequence[str]) -> LabelValues:
+        if len(labelvalues) != len(self.labelnames):
+            raise ValueError(f"{self.name}: erwartet Labels {self.labelnames}, bekommen {labelvalues}")
+        return tuple(labelvalues)
+
+    def samples(self) -> Iterator[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self.samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self._values: Dict[LabelValues, float] = {} if self.labelnames else {(): 0.0}
+
+    def inc(self, *labelvalues: str, amount: float = 1.0):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, *labelvalues: str) -> float:
+        return self._values.get(tuple(labelvalues), 0.0)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = list(self._values.items())
+        for key, value in items:
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labelvalues: str, amount: float = 1.0):
+        self.inc(*labelvalues, amount=-amount)
+
+    def set(self, value: float, *labelvalues: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labelvalues)
+        with self._lock:
+            self._values[key] = value
+
+    @contextmanager
+    def track(self, *labelvalues: str):
+        self.inc(*labelvalues)
+        try:
+            yield
+        finally:
+            self.dec(*labelvalues)
+
+
+class _HistogramValues:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = (), buckets: Sequence[float] = DEFAULT_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values: Dict[LabelValues, _HistogramValues] = {}
+
+    def observe(self, value: float, *labelvalues: str):
+        if not METRICS_ENABLED:
+            return
+        key = self._key(labelvalues)
+        # Ein Zähler pro Bucket, kumuliert wird erst beim Scrape
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            entry = self._values.get(key)
+            if entry is None:
+                entry = self._values[key] = _HistogramValues(len(self.buckets) + 1)
+            entry.counts[i] += 1
+            entry.sum += value
+            entry.count += 1
+
+    @contextmanager
+    def time(self, *labelvalues: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, *labelvalues)
+
+    def samples(self) -> Iterator[str]:
+        with self._lock:
+            items = [(key, list(e.counts), e.sum, e.count) for key, e in self._values.items()]
+        bounds = self.buckets + (float("inf"),)
+        for key, counts, total, count in items:
+            cumulative = 0
+            for bound, n in zip(bounds, counts):
+                cumulative += n
+                le = f'le="{_format_value(bound)}"'
+                yield f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}"
+            labels = _format_labels(self.labelnames, key)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+SampleValue = Union[float, Dict[LabelValues, float]]
+
+
+class CallbackMetric(_Metric):
+    """Liest den Wert erst beim Scrape, z. B. aus einem vorhandenen stats()-Zähler.
+
+    fn liefert eine Zahl (ohne Labels) oder {(labelwert, ...): zahl}.
+    """
+
+    def __init__(self, name: str, help: str, kind: str, fn: Callable[[], SampleValue], labels: Sequence[str] = ()):
+        super().__init__(name, help, labels)
+        self.kind = kind
+        self.fn = fn
+
+    def samples(self) -> Iterator[str]:
+        value = self.fn()
+        items = value.items() if isinstance(value, dict) else [((), value)]
+        for key, v in items:
+            if v is None:
+                continue
+            yield f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(v)}"
+
+
+def render() -> str:
+    blocks = []
+    for metric in _registry:
+        try:
+            blocks.append(metric.render())
+        except Exception as e:
+            # Ein defekter Callback darf den Scrape nicht kippen
+            blocks.append(f"# {metric.name}: {type(e).__name__}")
+    return "\n".join(blocks) + "\n"
+
+
+# ---------- Metriken des Gateways ----------
+requests_total = Counter("fng_gateway_requests_total", "Anfragen an /classify und /classify/stream nach Ergebnis", ("endpoint", "result"))
+queue_wait_seconds = Histogram("fng_gateway_queue_wait_seconds", "Wartezeit auf einen freien Ollama-Slot")
+upstream_seconds = Histogram("fng_gateway_upstream_seconds", "Dauer der Generierung bei Ollama", ("mode",))
+extract_json_seconds = Histogram(
+    "fng_gateway_extract_json_seconds", "JSON-Extraktion aus der Modellantwort",
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+parse_failures_total = Counter("fng_gateway_parse_failures_total", "Antworten ohne parsebares JSON")
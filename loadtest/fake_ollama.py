@@ -0,0 +1,246 @@
+"""Simuliertes Ollama (/api/generate) für Lasttests ohne GPU-Rechner.
+
+    python loadtest/fake_ollama.py --port 11500 --parallel 2 \\
+        --load-latency lognormal:0.3,0.5 --prefill-tps 800 --tps 35 \\
+        --error-rate 0.01 --stream-error-rate 0.01 --invalid-json-rate 0.02
+
+Modell der Antwortzeit pro Anfrage (nachdem ein Slot frei ist):
+    load_latency + prompt_tokens / prefill_tps + antwort_tokens / tps
+--parallel entspricht OLLAMA_NUM_PARALLEL; weitere Anfragen warten in einer
+Warteschlange (max. --max-queue, darüber 503 wie bei Ollama). Die Antwort
+ist ein zum Prompt deterministisches Urteil im Schema des Gateways.
+Mit stream=true kommen NDJSON-Chunks im Ollama-Format; bricht der Client ab,
+endet die "Generierung" und der Slot wird frei.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+import re
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Optional
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+from latency import Distribution, parse_distribution
+
+app = FastAPI(title="Fake Ollama")
+
+LABELS = ("likely_fake", "uncertain", "likely_real")
+_TOKEN_RE = re.compile(r"\s*\S{1,4}|\s+")
+
+
+@dataclass
+class Config:
+    parallel: int = 2
+    max_queue: int = 512
+    load_latency: Distribution = field(default_factory=lambda: parse_distribution("0.05"))
+    prefill_tps: float = 800.0
+    tps: float = 35.0
+    error_rate: float = 0.0
+    stream_error_rate: float = 0.0
+    invalid_json_rate: float = 0.0
+    trailing_tokens: int = 0      # Tokens nach dem JSON-Objekt (zeigt den Effekt des Early-Stops)
+    seed: Optional[int] = None
+
+
+config = Config()
+rng = random.Random()
+_slots: Optional[asyncio.Semaphore] = None
+stats = {
+    "requests": 0,
+    "streams": 0,
+    "active": 0,
+    "queued": 0,
+    "max_queued": 0,
+    "rejected_queue_full": 0,
+    "injected_errors": 0,
+    "injected_stream_errors": 0,
+    "invalid_json": 0,
+    "cancelled": 0,
+    "tokens_generated": 0,
+}
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+def verdict_for(prompt: str) -> str:
+    h = int.from_bytes(hashlib.sha256(prompt.encode("utf-8")).digest()[:8], "big")
+    label = LABELS[h % len(LABELS)]
+    return json.dumps({
+        "label": label,
+        "confidence": 55 + h % 40,
+        "red_flags": ["simuliert"] if label != "likely_real" else [],
+        "claims": [],
+        "reasoning_summary": "Simulierte Antwort des Lasttest-Backends – keine echte Einschätzung des Textes.",
+        "suggested_counter_sources": ["https://correctiv.org/faktencheck/"],
+    }, ensure_ascii=False)
+
+
+def response_tokens(prompt: str, num_predict: Optional[int]) -> list:
+    if rng.random() < config.invalid_json_rate:
+        stats["invalid_json"] += 1
+        text = "Dazu kann ich leider keine Einschätzung im gewünschten Format geben."
+    else:
+        text = verdict_for(prompt)
+    tokens = _TOKEN_RE.findall(text) + [" blah"] * config.trailing_tokens
+    if num_predict and num_predict > 0:
+        tokens = tokens[:num_predict]
+    return tokens
+
+
+async def _acquire_slot() -> bool:
+    global _slots
+    if _slots is None:
+        _slots = asyncio.Semaphore(config.parallel)
+    if _slots.locked():
+        if stats["queued"] >= config.max_queue:
+            stats["rejected_queue_full"] += 1
+            return False
+        stats["queued"] += 1
+        stats["max_queued"] = max(stats["max_queued"], stats["queued"])
+        try:
+            await _slots.acquire()
+        finally:
+            stats["queued"] -= 1
+    else:
+        await _slots.acquire()
+    stats["active"] += 1
+    return True
+
+
+def _release_slot():
+    stats["active"] -= 1
+    _slots.release()
+
+
+def _final_chunk(model: str, prompt_tokens: int, tokens: int, started: float) -> dict:
+    return {
+        "model": model,
+        "created_at": _now(),
+        "response": "",
+        "done": True,
+        "total_duration": int((time.perf_counter() - started) * 1e9),
+        "prompt_eval_count": prompt_tokens,
+        "eval_count": tokens,
+    }
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    body = await request.json()
+    model = body.get("model") or "llama3"
+    prompt = body.get("prompt") or ""
+    stream = body.get("stream", True)   # Ollama streamt standardmäßig
+    num_predict = (body.get("options") or {}).get("num_predict")
+    prompt_tokens = max(1, len(prompt) // 4)
+    stats["requests"] += 1
+
+    if rng.random() < config.error_rate:
+        stats["injected_errors"] += 1
+        return JSONResponse({"error": "simulierter Fehler"}, status_code=500)
+
+    tokens = response_tokens(prompt, num_predict)
+    time_to_first = config.load_latency(rng) + prompt_tokens / config.prefill_tps
+    per_token = 1 / config.tps if config.tps > 0 else 0.0
+    started = time.perf_counter()
+
+    if not stream:
+        if not await _acquire_slot():
+            return JSONResponse({"error": "server busy, please try again"}, status_code=503)
+        try:
+            await asyncio.sleep(time_to_first + per_token * len(tokens))
+            stats["tokens_generated"] += len(tokens)
+        except asyncio.CancelledError:
+            stats["cancelled"] += 1
+            raise
+        finally:
+            _release_slot()
+        return {**_final_chunk(model, prompt_tokens, len(tokens), started), "response": "".join(tokens)}
+
+    fail_at = rng.randrange(len(tokens)) if tokens and rng.random() < config.stream_error_rate else None
+
+    async def chunks():
+        stats["streams"] += 1
+        if not await _acquire_slot():
+            yield json.dumps({"error": "server busy, please try again"}) + "\n"
+            return
+        sent = 0
+        try:
+            await asyncio.sleep(time_to_first)
+            for i, token in enumerate(tokens):
+                if i == fail_at:
+                    stats["injected_stream_errors"] += 1
+                    yield json.dumps({"error": "simulierter Abbruch im Stream"}) + "\n"
+                    return
+                await asyncio.sleep(per_token)
+                sent += 1
+                yield json.dumps({"model": model, "created_at": _now(), "response": token, "done": False}, ensure_ascii=False) + "\n"
+            yield json.dumps(_final_chunk(model, prompt_tokens, len(tokens), started)) + "\n"
+        except (asyncio.CancelledError, GeneratorExit):
+            # Client hat die Verbindung geschlossen (z. B. Early-Stop im Gateway)
+            stats["cancelled"] += 1
+            raise
+        finally:
+            stats["tokens_generated"] += sent
+            _release_slot()
+
+    return StreamingResponse(chunks(), media_type="application/x-ndjson")
+
+
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{"name": "llama3:latest", "model": "llama3:latest"}]}
+
+
+@app.get("/api/version")
+async def version():
+    return {"version": "0.0.0-fake"}
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "parallel": config.parallel, "max_queue": config.max_queue}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simuliertes Ollama für Lasttests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--parallel", type=int, default=config.parallel, help="gleichzeitige Generierungen")
+    parser.add_argument("--max-queue", type=int, default=config.max_queue)
+    parser.add_argument("--load-latency", default="0.05", help="Verteilung, z. B. lognormal:0.3,0.5")
+    parser.add_argument("--prefill-tps", type=float, default=config.prefill_tps, help="Prompt-Tokens pro Sekunde")
+    parser.add_argument("--tps", type=float, default=config.tps, help="generierte Tokens pro Sekunde")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Anteil HTTP 500")
+    parser.add_argument("--stream-error-rate", type=float, default=0.0, help="Anteil Abbrüche mitten im Stream")
+    parser.add_argument("--invalid-json-rate", type=float, default=0.0, help="Anteil Antworten ohne JSON")
+    parser.add_argument("--trailing-tokens", type=int, default=0)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    config.parallel = args.parallel
+    config.max_queue = args.max_queue
+    config.load_latency = parse_distribution(args.load_latency)
+    config.prefill_tps = args.prefill_tps
+    config.tps = args.tps
+    config.error_rate = args.error_rate
+    config.stream_error_rate = args.stream_error_rate
+    config.invalid_json_rate = args.invalid_json_rate
+    config.trailing_tokens = args.trailing_tokens
+    config.seed = args.seed
+    if args.seed is not None:
+        rng.seed(args.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
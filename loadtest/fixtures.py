@@ -0,0 +1,158 @@
+"""Lokale Artikel- und RSS-Fixtures für Lasttests (kein Internet nötig).
+
+    python loadtest/fixtures.py --port 8090 [--latency uniform:0.02,0.2] \\
+        [--feed-items 20] [--new-per-fetch 5]
+
+GET /article/{n}      Artikel n: Sätze aus dem Benchmark-Korpus, per n zufällig
+                      gemischt – jeder Artikel ist eigenständig (kein Treffer im
+                      Verdict-Cache oder bei Near-Duplicates). ETag/304 wie echte Seiten.
+GET /feed/{name}.xml  RSS 2.0 mit den neuesten --feed-items Artikeln des Feeds;
+                      jeder Abruf schiebt --new-per-fetch neue Einträge nach.
+GET /stats            Zähler
+"""
+import argparse
+import asyncio
+import glob
+import html
+import os
+import random
+import re
+import zlib
+from email.utils import formatdate
+from typing import Dict, List
+
+import lxml.html
+import uvicorn
+from fastapi import FastAPI, Request, Response
+
+from latency import parse_distribution
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "backend", "benchmarks", "corpus")
+SENTENCES_PER_ARTICLE = 25
+
+app = FastAPI(title="FakeNewsGuard Lasttest-Fixtures")
+
+settings = {"latency": parse_distribution("0"), "feed_items": 20, "new_per_fetch": 5}
+rng = random.Random()
+_feed_offsets: Dict[str, int] = {}
+stats = {"articles": 0, "articles_not_modified": 0, "feeds": 0, "feeds_not_modified": 0}
+
+_SENTENCE_RE = re.compile(r"[^.!?]+[.!?]")
+
+
+def load_sentences(corpus_dir: str = CORPUS_DIR) -> List[str]:
+    seen = set()
+    sentences = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, "*.html"))):
+        with open(path, encoding="utf-8") as f:
+            root = lxml.html.fromstring(f.read())
+        for p in root.iter("p"):
+            for s in _SENTENCE_RE.findall(p.text_content()):
+                s = " ".join(s.split())
+                if len(s.split()) >= 5 and s not in seen:
+                    seen.add(s)
+                    sentences.append(s)
+    return sentences
+
+
+SENTENCES = load_sentences()
+
+
+def article_html(n: int) -> str:
+    r = random.Random(n)
+    body = r.sample(SENTENCES, min(SENTENCES_PER_ARTICLE, len(SENTENCES)))
+    paragraphs = [" ".join(body[i:i + 5]) for i in range(0, len(body), 5)]
+    title = f"Meldung {n}: {' '.join(body[0].split()[:6])}"
+    return (
+        "<!doctype html><html lang=\"de\"><head><meta charset=\"utf-8\">"
+        f"<title>{html.escape(title)}</title>"
+        f"<meta property=\"og:title\" content=\"{html.escape(title)}\">"
+        f"<meta name=\"description\" content=\"{html.escape(body[0])}\">"
+        "</head><body><header><nav>Startseite | Politik | Wirtschaft</nav></header>"
+        f"<article><h1>{html.escape(title)}</h1>"
+        + "".join(f"<p>{html.escape(p)}</p>" for p in paragraphs)
+        + "</article><footer>© Lasttest – Impressum – Datenschutz</footer></body></html>"
+    )
+
+
+def feed_base(name: str) -> int:
+    # Eigener, stabiler id-Bereich pro Feed
+    return (zlib.crc32(name.encode("utf-8")) % 1000) * 1_000_000
+
+
+async def _delay():
+    seconds = settings["latency"](rng)
+    if seconds > 0:
+        await asyncio.sleep(seconds)
+
+
+@app.get("/article/{n}")
+async def article(n: int, request: Request):
+    await _delay()
+    etag = f'"a{n}"'
+    if request.headers.get("if-none-match") == etag:
+        stats["articles_not_modified"] += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    stats["articles"] += 1
+    return Response(article_html(n), media_type="text/html; charset=utf-8", headers={"ETag": etag})
+
+
+@app.get("/feed/{name}.xml")
+async def feed(name: str, request: Request):
+    await _delay()
+    if name not in _feed_offsets:
+        _feed_offsets[name] = settings["feed_items"]
+    else:
+        _feed_offsets[name] += settings["new_per_fetch"]
+    offset = _feed_offsets[name]
+
+    etag = f'"{name}-{offset}"'
+    if request.headers.get("if-none-match") == etag:
+        stats["feeds_not_modified"] += 1
+        return Response(status_code=304, headers={"ETag": etag})
+    stats["feeds"] += 1
+
+    base_url = str(request.base_url).rstrip("/")
+    newest = feed_base(name) + offset
+    items = []
+    for n in range(newest, max(feed_base(name), newest - settings["feed_items"]), -1):
+        link = f"{base_url}/article/{n}"
+        items.append(
+            f"<item><title>Meldung {n}</title><link>{link}</link>"
+            f"<guid>{link}</guid><pubDate>{formatdate(usegmt=True)}</pubDate></item>"
+        )
+    xml = (
+        "<?xml version=\"1.0\" encoding=\"utf-8\"?><rss version=\"2.0\"><channel>"
+        f"<title>{html.escape(name)}</title><link>{base_url}</link><description>Lasttest</description>"
+        + "".join(items)
+        + "</channel></rss>"
+    )
+    return Response(xml, media_type="application/rss+xml; charset=utf-8", headers={"ETag": etag})
+
+
+@app.get("/stats")
+async def get_stats():
+    return {**stats, "sentences": len(SENTENCES), "feed_offsets": dict(_feed_offsets)}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Artikel-/RSS-Fixtures für Lasttests")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8090)
+    parser.add_argument("--latency", default="0", help="Antwortzeit der 'Origin'-Seiten, z. B. uniform:0.02,0.2")
+    parser.add_argument("--feed-items", type=int, default=20)
+    parser.add_argument("--new-per-fetch", type=int, default=5)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+
+    settings["latency"] = parse_distribution(args.latency)
+    settings["feed_items"] = args.feed_items
+    settings["new_per_fetch"] = args.new_per_fetch
+    if args.seed is not None:
+        rng.seed(args.seed)
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
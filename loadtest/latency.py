@@ -0,0 +1,36 @@
+import math
+import random
+from typing import Callable
+
+Distribution = Callable[[random.Random], float]
+
+
+def parse_distribution(spec: str) -> Distribution:
+    """Latenzverteilung in Sekunden aus einer Kurzschreibweise.
+
+    "0.5" / "fixed:0.5", "uniform:0.2,1.5", "normal:0.8,0.2",
+    "lognormal:0.8,0.5" (Median, Sigma), "exp:0.8" (Mittelwert).
+    Negative Werte werden auf 0 gekappt.
+    """
+    kind, _, args = spec.partition(":")
+    if not args:
+        kind, args = "fixed", kind
+    values = [float(v) for v in args.split(",") if v.strip()]
+
+    if kind == "fixed":
+        (value,) = values
+        return lambda rng: max(0.0, value)
+    if kind == "uniform":
+        low, high = values
+        return lambda rng: max(0.0, rng.uniform(low, high))
+    if kind == "normal":
+        mean, sd = values
+        return lambda rng: max(0.0, rng.gauss(mean, sd))
+    if kind == "lognormal":
+        median, sigma = values
+        mu = math.log(median) if median > 0 else 0.0
+        return lambda rng: rng.lognormvariate(mu, sigma)
+    if kind == "exp":
+        (mean,) = values
+        return lambda rng: rng.expovariate(1 / mean) if mean > 0 else 0.0
+    raise ValueError(f"Unbekannte Verteilung: {spec}")
@@ -0,0 +1,271 @@
+"""Lastgenerator für Backend + Gateway: /analyze, /dashboard und /rss/run mit Ziel-Raten.
+
+    python loadtest/loadgen.py --scenario analyze --rates 0.5,1,2,4 --duration 30 \\
+        [--backend http://127.0.0.1:8000] [--fixtures http://127.0.0.1:8090] \\
+        [--gateway http://127.0.0.1:8001] [--ollama http://127.0.0.1:11500] [--json report.json]
+
+Open-Loop: Anfragen starten im vorgegebenen Takt (mit --poisson exponentiell
+verteilt), unabhängig davon, ob vorherige fertig sind – Warteschlangen werden
+so als Latenz sichtbar statt den Generator auszubremsen. Pro Stufe:
+erreichter Durchsatz, p50/p95/p99, Fehlerquote nach Status, max. parallele
+Anfragen und ein Schnappschuss der Warteschlangen in Gateway und Ollama.
+409 von /rss/run (Zyklus läuft bereits) zählt als "busy", nicht als Fehler;
+das Backend braucht dafür RSS_MANUAL_TRIGGER_ENABLED=1 (stack.py setzt es).
+
+Sättigung = erste Stufe, in der der Durchsatz unter 90 % der Zielrate fällt,
+die Fehlerquote über --max-error-rate liegt oder p99 über --slo.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from typing import Any, Awaitable, Dict, List, Optional
+
+import httpx
+
+SCENARIOS = ("analyze", "dashboard", "rss")
+DASHBOARD_SORTS = ("created_at", "confidence", "word_count")
+
+
+def percentile(sorted_values: List[float], p: float) -> float:
+    if not sorted_values:
+        return 0.0
+    k = min(len(sorted_values) - 1, max(0, round(p / 100 * (len(sorted_values) - 1))))
+    return sorted_values[k]
+
+
+class Scenario:
+    def __init__(self, name: str, args, rng: random.Random):
+        self.name = name
+        self.args = args
+        self.rng = rng
+        # Neue Artikel-ids pro Lauf, damit nichts aus früheren Läufen in der DB liegt
+        self._next_article = args.article_base if args.article_base is not None else int(time.time()) * 1000
+        self._analyzed: List[str] = []
+
+    def request(self, client: httpx.AsyncClient) -> Awaitable[httpx.Response]:
+        backend = self.args.backend
+        if self.name == "analyze":
+            if self._analyzed and self.rng.random() < self.args.repeat_ratio:
+                url = self.rng.choice(self._analyzed)
+            else:
+                url = f"{self.args.fixtures}/article/{self._next_article}"
+                self._next_article += 1
+                self._analyzed.append(url)
+            return client.post(f"{backend}/analyze", json={"url": url})
+        if self.name == "dashboard":
+            params = {
+                "limit": self.args.dashboard_limit,
+                "sort": self.rng.choice(DASHBOARD_SORTS),
+                "order": self.rng.choice(("asc", "desc")),
+            }
+            if self.rng.random() < 0.3:
+                params["min_conf"] = self.rng.choice((50, 70, 90))
+            return client.get(f"{backend}/dashboard", params=params)
+        return client.post(f"{backend}/rss/run")
+
+
+async def _snapshot(client: httpx.AsyncClient, args) -> Dict[str, Any]:
+    """Zähler der einzelnen Schichten – zeigt, wo sich die Last staut."""
+    urls = {
+        "backend": f"{args.backend}/stats",
+        "gateway": f"{args.gateway}/stats/admission" if args.gateway else None,
+        "ollama": f"{args.ollama}/stats" if args.ollama else None,
+    }
+    result = {}
+    for name, url in urls.items():
+        if not url:
+            continue
+        try:
+            r = await client.get(url, timeout=10)
+            result[name] = r.json() if r.status_code == 200 else {"status": r.status_code}
+        except httpx.HTTPError as e:
+            result[name] = {"error": type(e).__name__}
+    return result
+
+
+async def run_step(client: httpx.AsyncClient, scenario: Scenario, rate: float, args) -> Dict[str, Any]:
+    loop = asyncio.get_running_loop()
+    latencies: List[float] = []
+    statuses: Counter = Counter()
+    tasks = set()
+    in_flight = max_in_flight = dropped = sent = busy = 0
+
+    async def one():
+        nonlocal in_flight, busy
+        in_flight += 1
+        started = loop.time()
+        try:
+            r = await scenario.request(client)
+            statuses[str(r.status_code)] += 1
+            if r.status_code == 409:
+                # /rss/run: Zyklus läuft schon – gewollter Gegendruck, kein Fehler
+                busy += 1
+            elif r.status_code < 400:
+                latencies.append(loop.time() - started)
+        except httpx.HTTPError as e:
+            statuses[type(e).__name__] += 1
+        finally:
+            in_flight -= 1
+
+    started = loop.time()
+    next_at = started
+    while next_at - started < args.duration:
+        delay = next_at - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        if in_flight >= args.max_in_flight:
+            dropped += 1
+        else:
+            sent += 1
+            task = asyncio.create_task(one())
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+            max_in_flight = max(max_in_flight, in_flight + 1)
+        next_at += scenario.rng.expovariate(rate) if args.poisson else 1 / rate
+
+    if tasks:
+        await asyncio.gather(*tasks)
+    elapsed = loop.time() - started
+
+    ok = len(latencies)
+    errors = sent - ok - busy
+    ordered = sorted(latencies)
+    return {
+        "scenario": scenario.name,
+        "target_rps": rate,
+        "sent": sent,
+        "ok": ok,
+        "errors": errors,
+        "busy": busy,
+        "dropped": dropped,
+        "error_rate": round((errors + dropped) / max(1, sent + dropped), 4),
+        "achieved_rps": round(ok / elapsed, 3) if elapsed else 0.0,
+        "p50_s": round(percentile(ordered, 50), 3),
+        "p95_s": round(percentile(ordered, 95), 3),
+        "p99_s": round(percentile(ordered, 99), 3),
+        "max_in_flight": max_in_flight,
+        "statuses": dict(statuses),
+        "elapsed_s": round(elapsed, 1),
+    }
+
+
+def saturated(row: Dict[str, Any], args) -> Optional[str]:
+    if row["achieved_rps"] < 0.9 * row["target_rps"]:
+        return "Durchsatz < 90 % Ziel"
+    if row["error_rate"] > args.max_error_rate:
+        return f"Fehlerquote {row['error_rate']:.1%}"
+    if args.slo and row["p99_s"] > args.slo:
+        return f"p99 {row['p99_s']} s > SLO {args.slo} s"
+    return None
+
+
+def _layer_summary(snapshot: Dict[str, Any]) -> str:
+    parts = []
+    ollama = snapshot.get("ollama") or {}
+    if "max_queued" in ollama:
+        parts.append(f"ollama max_queued={ollama['max_queued']} active={ollama.get('active')}")
+    gateway = snapshot.get("gateway") or {}
+    if gateway:
+        parts.append(
+            "gateway "
+            + " ".join(f"{k}={v}" for k, v in gateway.items() if isinstance(v, (int, float)) and v)
+        )
+    backend = (snapshot.get("backend") or {}).get("http", {}).get("llm", {})
+    if backend:
+        parts.append(f"backend llm in_flight={backend.get('in_flight')} waits={backend.get('waits')}")
+    return "; ".join(parts)
+
+
+def print_report(rows: List[Dict[str, Any]]):
+    columns = ["scenario", "target_rps", "achieved_rps", "sent", "ok", "errors", "busy", "dropped",
+               "error_rate", "p50_s", "p95_s", "p99_s", "max_in_flight", "saturated"]
+    widths = {c: max(len(c), *(len(str(r.get(c, ""))) for r in rows)) for c in columns}
+    print("  ".join(c.ljust(widths[c]) for c in columns))
+    for r in rows:
+        print("  ".join(str(r.get(c, "")).ljust(widths[c]) for c in columns))
+
+
+def write_report(report: Dict[str, Any], args):
+    print()
+    print_report(report["steps"])
+    print()
+    for name, s in report["saturation"].items():
+        if s["at_rps"] is None:
+            print(f"{name}: keine Sättigung bis {args.rates.split(',')[-1]} rps")
+        else:
+            print(f"{name}: gesättigt bei {s['at_rps']} rps ({s['reason']}), zuletzt ok: {s['last_ok_rps']} rps")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+
+async def run(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    rates = [float(r) for r in args.rates.split(",")]
+    limits = httpx.Limits(max_connections=args.max_in_flight + 10, max_keepalive_connections=args.max_in_flight)
+    report: Dict[str, Any] = {"started_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()), "steps": [], "saturation": {}}
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        for name in args.scenario.split(","):
+            scenario = Scenario(name, args, rng)
+            capacity = None
+            for rate in rates:
+                row = await run_step(client, scenario, rate, args)
+                row["layers"] = await _snapshot(client, args)
+                reason = saturated(row, args)
+                row["saturated"] = reason or ""
+                report["steps"].append(row)
+                print(f"[{name}] {rate} rps → {row['achieved_rps']} rps, p99 {row['p99_s']} s, "
+                      f"Fehler {row['error_rate']:.1%} {('– ' + reason) if reason else ''}")
+                summary = _layer_summary(row["layers"])
+                if summary:
+                    print(f"    {summary}")
+                if reason:
+                    report["saturation"][name] = {"at_rps": rate, "reason": reason, "last_ok_rps": capacity}
+                    if not args.keep_going:
+                        break
+                else:
+                    capacity = rate
+            report["saturation"].setdefault(name, {"at_rps": None, "reason": None, "last_ok_rps": capacity})
+            await asyncio.sleep(args.cooldown)
+    return report
+
+
+def add_arguments(parser: argparse.ArgumentParser):
+    parser.add_argument("--backend", default="http://127.0.0.1:8000")
+    parser.add_argument("--fixtures", default="http://127.0.0.1:8090")
+    parser.add_argument("--gateway", default="http://127.0.0.1:8001")
+    parser.add_argument("--ollama", default="http://127.0.0.1:11500")
+    parser.add_argument("--scenario", default="analyze", help=f"Komma-Liste aus {', '.join(SCENARIOS)}")
+    parser.add_argument("--rates", default="0.5,1,2,4", help="Ziel-Anfragen pro Sekunde, stufenweise")
+    parser.add_argument("--duration", type=float, default=30.0, help="Sekunden pro Stufe")
+    parser.add_argument("--poisson", action="store_true", help="exponentielle statt fester Abstände")
+    parser.add_argument("--max-in-flight", type=int, default=256, help="darüber werden Anfragen verworfen")
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--slo", type=float, default=0.0, help="p99-Grenze in Sekunden (0 = aus)")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--keep-going", action="store_true", help="nach Sättigung weitere Stufen fahren")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="analyze: Anteil bereits analysierter URLs")
+    parser.add_argument("--article-base", type=int, help="analyze: erste Artikel-id der Fixtures")
+    parser.add_argument("--dashboard-limit", type=int, default=50)
+    parser.add_argument("--cooldown", type=float, default=2.0)
+    parser.add_argument("--seed", type=int)
+    parser.add_argument("--json", help="Bericht als JSON schreiben")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lastgenerator für FakeNewsGuard")
+    add_arguments(parser)
+    args = parser.parse_args()
+    for name in args.scenario.split(","):
+        if name not in SCENARIOS:
+            parser.error(f"Unbekanntes Szenario: {name}")
+
+    write_report(asyncio.run(run(args)), args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""Kompletter Lasttest auf einer Maschine: Fake-Ollama, Fixtures, Gateway und Backend starten, Last fahren.
+
+    python loadtest/stack.py --scenario analyze,dashboard,rss --rates 0.5,1,2,4,8 --duration 30 \\
+        --ollama-args "--parallel 2 --tps 35 --load-latency lognormal:0.3,0.5" [--json report.json]
+
+Alle Dienste laufen auf 127.0.0.1 mit eigenen Ports; das Backend bekommt
+eine frische Datenbank in einem Temp-Verzeichnis (FNG_DATA_DIR), RSS-Quellen
+zeigen auf die Fixtures (RSS_SOURCES_JSON), der RSS-Scheduler ist aus – RSS-
+Zyklen kommen nur vom Lastgenerator über /rss/run, das dafür eigens
+freigeschaltet wird (RSS_MANUAL_TRIGGER_ENABLED). Weitere Umgebungsvariablen
+(z. B. PIPELINE_LLM_WORKERS, OLLAMA_MAX_CONCURRENCY) werden durchgereicht.
+Die übrigen Optionen sind die von loadgen.py.
+"""
+import argparse
+import asyncio
+import json
+import os
+import shlex
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+import loadgen
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LOADTEST_DIR = os.path.join(ROOT, "loadtest")
+
+
+def wait_ready(url: str, proc: subprocess.Popen, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f"Prozess beendet (Exit {proc.returncode}) bevor {url} erreichbar war")
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f"{url} nicht erreichbar nach {timeout} s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Lasttest über den ganzen Stack")
+    loadgen.add_arguments(parser)
+    parser.add_argument("--backend-port", type=int, default=18000)
+    parser.add_argument("--gateway-port", type=int, default=18001)
+    parser.add_argument("--ollama-port", type=int, default=11500)
+    parser.add_argument("--fixtures-port", type=int, default=18090)
+    parser.add_argument("--ollama-args", default="", help="zusätzliche Argumente für fake_ollama.py")
+    parser.add_argument("--fixtures-args", default="", help="zusätzliche Argumente für fixtures.py")
+    parser.add_argument("--gateway-stream", action="store_true", help="LLM_STREAM=1 im Gateway")
+    parser.add_argument("--logs", help="Verzeichnis für die Logs der Dienste (Standard: Temp)")
+    args = parser.parse_args()
+
+    args.backend = f"http://127.0.0.1:{args.backend_port}"
+    args.gateway = f"http://127.0.0.1:{args.gateway_port}"
+    args.ollama = f"http://127.0.0.1:{args.ollama_port}"
+    args.fixtures = f"http://127.0.0.1:{args.fixtures_port}"
+
+    with tempfile.TemporaryDirectory(prefix="fng-loadtest-") as tmp:
+        log_dir = args.logs or tmp
+        os.makedirs(log_dir, exist_ok=True)
+        feeds = {name: f"{args.fixtures}/feed/{name}.xml" for name in ("inland", "ausland", "wirtschaft", "wissen", "sport")}
+        base_env = dict(os.environ)
+
+        services = [
+            ("ollama", LOADTEST_DIR,
+             [sys.executable, "fake_ollama.py", "--port", str(args.ollama_port), *shlex.split(args.ollama_args)],
+             {}, f"{args.ollama}/api/version"),
+            ("fixtures", LOADTEST_DIR,
+             [sys.executable, "fixtures.py", "--port", str(args.fixtures_port), *shlex.split(args.fixtures_args)],
+             {}, f"{args.fixtures}/stats"),
+            ("gateway", os.path.join(ROOT, "llm_gateway"),
+             [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.gateway_port), "--log-level", "warning"],
+             {"LLM_BASE_URL": args.ollama, "LLM_STREAM": "1" if args.gateway_stream else "0"},
+             f"{args.gateway}/health"),
+            ("backend", os.path.join(ROOT, "backend"),
+             [sys.executable, "-m", "uvicorn", "main:app", "--port", str(args.backend_port), "--log-level", "warning"],
+             {
+                 "FNG_DATA_DIR": os.path.join(tmp, "data"),
+                 "LLM_GATEWAY_URL": args.gateway,
+                 "RSS_SOURCES_JSON": json.dumps(feeds),
+                 "RSS_SCHEDULER_ENABLED": "0",
+                 "RSS_MANUAL_TRIGGER_ENABLED": "1",
+             },
+             f"{args.backend}/health"),
+        ]
+
+        procs = []
+        try:
+            for name, cwd, cmd, env, ready_url in services:
+                log = open(os.path.join(log_dir, f"{name}.log"), "w")
+                proc = subprocess.Popen(cmd, cwd=cwd, env={**base_env, **env}, stdout=log, stderr=subprocess.STDOUT)
+                procs.append((name, proc, log))
+                wait_ready(ready_url, proc)
+                print(f"✅ {name} läuft ({ready_url})")
+
+            report = asyncio.run(loadgen.run(args))
+        finally:
+            for name, proc, log in reversed(procs):
+                proc.terminate()
+                try:
+                    proc.wait(timeout=15)
+                except subprocess.TimeoutExpired:
+                    proc.kill()
+                log.close()
+
+        loadgen.write_report(report, args)
+        if args.logs:
+            print(f"Logs: {log_dir}")
+
+
+if __name__ == "__main__":
+    main()